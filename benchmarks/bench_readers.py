@@ -0,0 +1,59 @@
+"""
+Compare the Calculator I/O backends on a generated file.
+
+    python benchmarks/bench_readers.py --size-mb 1024 --buffer-kb 8192
+
+Each backend is timed with a warm page cache (file just read) and a cold one (pages dropped
+with POSIX_FADV_DONTNEED beforehand, best effort without root).  Rough expectations:
+- mmap wins on a warm cache: slices of the mapping are hashed without a copy
+- pread is on par with buffered and is the building block for hashing at explicit offsets
+- sequential trades a little warm-cache speed for read-ahead on cold data, and leaves the
+  page cache as it found it
+Once the data is cached, MD5 throughput dominates and the backends converge.
+"""
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from common import drop_cache, make_file
+from calculator import Calculator
+from constants import EtagChunkSizeSet, IOBackend, PACKAGE_NAME, Strategy, Units
+
+
+def run(path: Path, io_backend: str, buffer_in_bytes: int, cold: bool) -> float:
+    if cold:
+        drop_cache(path)
+    else:
+        Calculator(path, Strategy.SINGLE_PART).calculate(Units.ONE_MB)
+    start = time.perf_counter()
+    Calculator(
+        path, Strategy.MULTI_PART, buffer_in_bytes=buffer_in_bytes, io_backend=io_backend
+    ).calculate_many(EtagChunkSizeSet.AWS_S3)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--buffer-kb", type=int, default=8192)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.getLogger(PACKAGE_NAME).setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = make_file(Path(directory) / "bench.bin", args.size_mb * Units.ONE_MB)
+
+        print(f"{'backend':<12}{'cache':<8}{'MB/s':>10}")
+        for io_backend in sorted(IOBackend.ALL):
+            for cold in (False, True):
+                best = min(
+                    run(path, io_backend, args.buffer_kb * Units.ONE_KB, cold)
+                    for _ in range(args.repeat)
+                )
+                print(f"{io_backend:<12}{'cold' if cold else 'warm':<8}{args.size_mb / best:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from constants import Units  # noqa: E402
+
+
+def drop_cache(path: Path) -> None:
+    """
+    Evict a file from the page cache, best effort (POSIX_FADV_DONTNEED does not need root)
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def make_file(path: Path, size: int, sparse: bool = False) -> Path:
+    """
+    Create a file of 'size' bytes, either random or a hole (all zeros, no blocks allocated)
+    """
+    with open(path, "wb") as f:
+        if sparse:
+            f.truncate(size)
+            return path
+        while size > 0:
+            chunk = min(size, 4 * Units.ONE_MB)
+            f.write(os.urandom(chunk))
+            size -= chunk
+    return path
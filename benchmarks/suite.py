@@ -0,0 +1,162 @@
+"""
+Benchmark the Calculator and Comparator hot paths and write machine-readable results.
+
+    python benchmarks/suite.py --sizes 64KB,16MB,1GB --output before.json
+    python benchmarks/suite.py --sizes 64KB,16MB,1GB --output after.json --compare before.json
+
+Every case runs on random and sparse files of each size, with a warm and a cold page cache.
+Time is the best of '--repeat' runs; peak memory is measured with tracemalloc on a separate run
+so it does not skew the timings.  Cases:
+- single_part: the MD5 of the whole file
+- multi_part: the multi-part ETag for one 8MB partition size
+- multi_part_many: multi-part ETags for every size of EtagChunkSizeSet.AWS_S3 in one read
+- mismatch: Comparator.run with a wrong ETag that has a feasible part count, the worst case
+  where every candidate partition size that survives planning is hashed before giving up
+"""
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from common import drop_cache, make_file
+from calculator import Calculator
+from comparator import Comparator
+from constants import EtagChunkSizeSet, PACKAGE_NAME, Strategy, Units
+from s3id_digest import zero_part
+from s3id_planner import parts_for
+
+UNITS = {"KB": Units.ONE_KB, "MB": Units.ONE_MB, "GB": Units.ONE_GB, "B": 1}
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    for suffix, multiplier in UNITS.items():
+        if value.endswith(suffix):
+            return int(float(value[: -len(suffix)]) * multiplier)
+    return int(value)
+
+
+def cases(path: Path) -> Dict[str, Callable[[], Any]]:
+    size: int = path.stat().st_size
+    mismatch_etag: str = f'"{"0" * 32}-{parts_for(size, 8 * Units.ONE_MB)}"'
+    return {
+        "single_part": lambda: Calculator(path, Strategy.SINGLE_PART).calculate(8 * Units.ONE_MB),
+        "multi_part": lambda: Calculator(path, Strategy.MULTI_PART).calculate(8 * Units.ONE_MB),
+        "multi_part_many": lambda: Calculator(path, Strategy.MULTI_PART).calculate_many(
+            EtagChunkSizeSet.AWS_S3
+        ),
+        "mismatch": lambda: Comparator.run(
+            mismatch_etag, path, Strategy.DEFAULT_THRESHOLD, EtagChunkSizeSet.AWS_S3
+        ),
+    }
+
+
+def measure(path: Path, case: Callable[[], Any], cold: bool, repeat: int) -> Dict[str, float]:
+    timings: List[float] = []
+    for _ in range(repeat):
+        if cold:
+            drop_cache(path)
+        else:
+            Calculator(path, Strategy.SINGLE_PART).calculate(Units.ONE_MB)
+        # Digests of all-zero parts are memoized across files: every case starts without them,
+        # so sparse timings do not depend on the cases that ran before
+        zero_part.cache_clear()
+        start: float = time.perf_counter()
+        case()
+        timings.append(time.perf_counter() - start)
+
+    zero_part.cache_clear()
+    tracemalloc.start()
+    case()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds: float = min(timings)
+    return {
+        "seconds": seconds,
+        "mb_per_s": path.stat().st_size / Units.ONE_MB / max(seconds, 1e-9),
+        "peak_memory_bytes": peak,
+    }
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: Path) -> None:
+    """
+    Print the time ratio of each result to the same case in a previous run (> 1 is slower)
+    """
+    baseline = json.loads(baseline_path.read_text())
+    key = lambda r: (r["case"], r["kind"], r["size"], r["cache"])  # noqa: E731
+    previous = {key(r): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline['commit']}:")
+    for result in results:
+        before = previous.get(key(result))
+        if before:
+            print(
+                f"{result['case']:<17}{result['kind']:<8}{result['size']:>12}  {result['cache']:<6}"
+                f"{result['seconds'] / max(before['seconds'], 1e-9):>8.2f}x time  "
+                f"{result['peak_memory_bytes'] / max(before['peak_memory_bytes'], 1):>8.2f}x memory"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="64KB,16MB,256MB", help="comma separated, ex: 64KB,1GB")
+    parser.add_argument("--kinds", default="random,sparse")
+    parser.add_argument("--cases", default=None, help="comma separated subset of the cases")
+    parser.add_argument("--cache", default="warm,cold")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=None, help="write JSON results here")
+    parser.add_argument("--compare", type=Path, default=None, help="JSON results of a previous run")
+    args = parser.parse_args()
+    logging.getLogger(PACKAGE_NAME).setLevel(logging.WARNING)
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in args.kinds.split(","):
+            for size in map(parse_size, args.sizes.split(",")):
+                path = make_file(Path(directory) / f"{kind}_{size}.bin", size, sparse=kind == "sparse")
+                for name, case in cases(path).items():
+                    if args.cases and name not in args.cases.split(","):
+                        continue
+                    for cache in args.cache.split(","):
+                        result = {"case": name, "kind": kind, "size": size, "cache": cache}
+                        result.update(measure(path, case, cache == "cold", args.repeat))
+                        results.append(result)
+                        print(
+                            f"{name:<17}{kind:<8}{size:>12}  {cache:<6}{result['mb_per_s']:>10.1f} MB/s"
+                            f"{result['peak_memory_bytes'] / Units.ONE_MB:>10.1f} MB peak"
+                        )
+                path.unlink()
+
+    report = {
+        "commit": commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,25 @@
+import asyncio
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from hashlib import md5
+from math import gcd
 from pathlib import Path
-from typing import List
-from constants import Strategy, PACKAGE_NAME
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from s3id_cache import DigestCache, file_identity
+from s3id_checkpoint import WHOLE_FILE, Checkpoint, CheckpointStore, prefix_fingerprint
+from s3id_checksums import composite, full_object, new_hash, part_checksums
+from constants import Buffer, Executor, IOBackend, Strategy, PACKAGE_NAME
+from s3id_digest import DIGEST_SIZE, PartDigest, ZeroRun, update_zeros
+from s3id_parts import PART_MD5, ExpectedPart
+from s3id_planner import parts_for
+from s3id_readers import Reader, is_sparse, open_reader
+from s3id_scheduler import DeviceScheduler
+from s3id_stats import S3IDStats
+
+if TYPE_CHECKING:
+    # manifest imports calculator through comparator, only import it for annotations
+    from s3id_manifest import PartManifest
 
 log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
 
@@ -13,14 +30,24 @@ class Calculator:
         local_file_path: Path,
         strategy: str,
         threshold_in_bytes: int = Strategy.DEFAULT_THRESHOLD,
+        buffer_in_bytes: Optional[int] = None,
+        io_backend: str = IOBackend.DEFAULT,
+        workers: int = 1,
+        executor: str = Executor.THREAD,
+        cache: Optional[DigestCache] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        scheduler: Optional[DeviceScheduler] = None,
     ) -> None:
         if not local_file_path or not Path(local_file_path).is_file():
             raise ValueError("'local_file_path' must be a valid pathlib.Path object")
 
         self.local_file_path: Path = local_file_path
-        self.local_file_size: int = local_file_path.stat().st_size
+        self.local_file_stat = local_file_path.stat()
+        self.local_file_size: int = self.local_file_stat.st_size
+        # Holes of a sparse file are hashed as zeros without being read
+        self.sparse: bool = is_sparse(self.local_file_stat)
         log.info(
-            f"Initialized local file at '{self.local_file_path}' with size: {self.local_file_size}"
+            "Initialized local file at '%s' with size: %s", self.local_file_path, self.local_file_size
         )
 
         self.strategy = strategy
@@ -32,6 +59,44 @@ class Calculator:
 
         self.threshold_in_bytes = threshold_in_bytes
 
+        if buffer_in_bytes is None:
+            # Only the default buffer grows to the scheduler's read size, an explicit one is kept
+            buffer_in_bytes = Buffer.DEFAULT_SIZE
+            if scheduler is not None:
+                buffer_in_bytes = max(buffer_in_bytes, scheduler.read_in_bytes)
+
+        if not isinstance(buffer_in_bytes, int) or buffer_in_bytes <= 0:
+            raise ValueError(
+                f"Invalid buffer_in_bytes parameter '{buffer_in_bytes}'. Must be a positive integer."
+            )
+
+        # Peak memory is bounded by this buffer, regardless of file or partition size
+        self.buffer_in_bytes = buffer_in_bytes
+
+        if io_backend not in IOBackend.ALL:
+            raise ValueError(
+                f"Invalid io_backend parameter '{io_backend}'. Must be one of: {sorted(IOBackend.ALL)}"
+            )
+
+        self.io_backend: str = io_backend
+
+        if not isinstance(workers, int) or workers <= 0:
+            raise ValueError(
+                f"Invalid workers parameter '{workers}'. Must be a positive integer."
+            )
+
+        if executor not in Executor.ALL:
+            raise ValueError(
+                f"Invalid executor parameter '{executor}'. Must be one of: {sorted(Executor.ALL)}"
+            )
+
+        self.workers: int = workers
+        self.executor: str = executor
+        self.cache: Optional[DigestCache] = cache
+        self.checkpoints: Optional[CheckpointStore] = checkpoints
+        self.scheduler: Optional[DeviceScheduler] = scheduler
+        self.stats: S3IDStats = S3IDStats()
+
     def calculate(self, partition_in_bytes: int):
         if not isinstance(partition_in_bytes, int) or partition_in_bytes <= 0:
             raise ValueError("'partition_in_bytes' must be an integer greater than 0")
@@ -47,6 +112,247 @@ class Calculator:
             calculate_as_multi_part_etag, partition_in_bytes
         )
 
+    def calculate_many(
+        self, partition_set_in_bytes: Iterable[int], extra: Sequence[PartDigest] = ()
+    ) -> Dict[int, Dict[str, str]]:
+        """
+        Calculate an ETag for every partition size in 'partition_set_in_bytes' while reading
+        the local file only once.  Returns a mapping of partition size to the same result
+        format as 'calculate'.  Digests in 'extra' (ex: additional checksums) are fed and
+        finalized in the same read.
+        """
+        partitions: List[int] = self._validate_partitions(partition_set_in_bytes)
+        return self._many_results(
+            partitions, self._aggregate_checksums_many(self._partitions_to_hash(partitions), extra)
+        )
+
+    def calculate_checksums(
+        self, algorithms: Iterable[str], partition_set_in_bytes: Iterable[int] = ()
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Calculate S3 additional checksums (see ChecksumAlgorithm) from one read of the file.
+        Returns per algorithm the base64 checksum of the whole file, and per partition size
+        the composite checksum ("<base64>-N") and the checksum of each part:
+          {algorithm: {"full_object": str, "composite": {partition: str}, "parts": {partition: [str]}}}
+        """
+        partitions: List[int] = self._validate_partitions(partition_set_in_bytes)
+        # The checksum of the whole file is the only part of a partition as large as the file
+        sizes: List[int] = [max(self.local_file_size, 1)] + partitions
+        digests: Dict[str, List[PartDigest]] = {
+            algorithm: [PartDigest(p, new_hash(algorithm)) for p in sizes]
+            for algorithm in sorted(set(algorithms))
+        }
+        self._aggregate_checksums_many([], [d for ds in digests.values() for d in ds])
+
+        return {
+            algorithm: {
+                "full_object": full_object(whole_file),
+                "composite": {d.partition_in_bytes: composite(d) for d in parts},
+                "parts": {d.partition_in_bytes: part_checksums(d) for d in parts},
+            }
+            for algorithm, (whole_file, *parts) in digests.items()
+        }
+
+    async def calculate_many_async(
+        self,
+        partition_set_in_bytes: Iterable[int],
+        progress: Optional[Callable[[int, Tuple[int, ...]], Any]] = None,
+        slice_in_bytes: int = Buffer.DEFAULT_SLICE_SIZE,
+        extra: Sequence[PartDigest] = (),
+    ) -> Dict[int, Dict[str, str]]:
+        """
+        Same as 'calculate_many', without blocking the event loop: the file is hashed on the
+        default executor one slice of about 'slice_in_bytes' at a time.  After each slice,
+        'progress' is called with the bytes hashed so far and the partition sizes being hashed.
+        Cancelling the awaiting task stops hashing after the current slice and closes the file.
+        """
+        if not isinstance(slice_in_bytes, int) or slice_in_bytes <= 0:
+            raise ValueError(
+                f"Invalid slice_in_bytes parameter '{slice_in_bytes}'. Must be a positive integer."
+            )
+
+        partitions: List[int] = self._validate_partitions(partition_set_in_bytes)
+        loop = asyncio.get_running_loop()
+        # Cache and checkpoint lookups hit SQLite, keep them off the event loop too
+        digests, missing = await loop.run_in_executor(
+            None, self._cached_checksums, self._partitions_to_hash(partitions)
+        )
+        if missing or extra:
+            hashing, skips, offset = await loop.run_in_executor(None, self._resume, missing, extra)
+            slices: Iterator[int] = self._hash_slices(
+                hashing + list(extra), slice_in_bytes, offset, skips
+            )
+            try:
+                while True:
+                    future = loop.run_in_executor(None, next, slices, None)
+                    try:
+                        hashed: Optional[int] = await asyncio.shield(future)
+                    except asyncio.CancelledError:
+                        # The slice in flight cannot be interrupted, wait for it before closing,
+                        # through any further cancellation
+                        while not future.done():
+                            try:
+                                await asyncio.wait([future])
+                            except asyncio.CancelledError:
+                                pass
+                        raise
+                    if hashed is None:
+                        break
+                    if progress is not None:
+                        progress(hashed, tuple(missing))
+            finally:
+                slices.close()
+
+            digests.update(
+                await loop.run_in_executor(
+                    None, self._store_checksums, {d.partition_in_bytes: d for d in hashing}
+                )
+            )
+
+        return self._many_results(partitions, digests)
+
+    def _validate_partitions(self, partition_set_in_bytes: Iterable[int]) -> List[int]:
+        partitions: List[int] = sorted(set(partition_set_in_bytes))
+        if not all(isinstance(p, int) and p > 0 for p in partitions):
+            raise ValueError("'partition_in_bytes' must be an integer greater than 0")
+        return partitions
+
+    def _partitions_to_hash(self, partitions: List[int]) -> List[int]:
+        if not partitions:
+            return []
+        if self.strategy is Strategy.SINGLE_PART:
+            # A single-part ETag does not depend on the partition size, it is the only part
+            # of a partition as large as the file
+            return [self.local_file_size] if self.local_file_size > 0 else []
+        return partitions
+
+    def _many_results(
+        self, partitions: List[int], digests: Dict[int, PartDigest]
+    ) -> Dict[int, Dict[str, str]]:
+        if not partitions:
+            return {}
+        if self.strategy is Strategy.SINGLE_PART:
+            signature: str = (
+                f'"{digests[self.local_file_size].digests[:DIGEST_SIZE].hex()}"'
+                if self.local_file_size > 0
+                else f'"{md5().hexdigest()}"'
+            )
+            log.debug("Single-part signature: %s", signature)
+            result: Dict[str, str] = {"signature": signature, "strategy": Strategy.SINGLE_PART}
+            return {partition_in_bytes: result for partition_in_bytes in partitions}
+
+        return {
+            partition_in_bytes: {
+                "signature": self._multi_part_signature(digests[partition_in_bytes]),
+                "strategy": Strategy.MULTI_PART,
+            }
+            for partition_in_bytes in partitions
+        }
+
+    def calculate_parts(
+        self, partition_in_bytes: int, first_part: int, last_part: int
+    ) -> "PartManifest":
+        """
+        Hash only the parts [first_part, last_part) of the file for 'partition_in_bytes' and
+        return them as a PartManifest.  Manifests of every range, hashed by any number of
+        hosts or processes, are merged into the multi-part ETag by 's3id_manifest.merge_manifests'.
+        """
+        from s3id_manifest import PartManifest  # pylint: disable=import-outside-toplevel
+
+        if not isinstance(partition_in_bytes, int) or partition_in_bytes <= 0:
+            raise ValueError("'partition_in_bytes' must be an integer greater than 0")
+        if not 0 <= first_part < last_part <= parts_for(self.local_file_size, partition_in_bytes):
+            raise ValueError(
+                f"Invalid part range [{first_part}, {last_part}). Must be within "
+                f"[0, {parts_for(self.local_file_size, partition_in_bytes)}) for a file of "
+                f"{self.local_file_size} bytes."
+            )
+
+        offset: int = first_part * partition_in_bytes
+        length: int = min((last_part - first_part) * partition_in_bytes, self.local_file_size - offset)
+        digests, stats = _hash_segment(
+            self.local_file_path,
+            [partition_in_bytes],
+            offset,
+            length,
+            min(self.buffer_in_bytes, length),
+            self.io_backend,
+            self.scheduler,
+            self.local_file_stat.st_dev,
+            self.sparse,
+        )
+        self.stats.merge(stats)
+        return PartManifest(
+            partition_in_bytes,
+            self.local_file_size,
+            first_part,
+            last_part,
+            digests[partition_in_bytes],
+            self.local_file_stat.st_ino,
+            self.local_file_stat.st_mtime_ns,
+        )
+
+    def check_parts(
+        self, parts: Sequence[ExpectedPart], max_mismatches: Optional[int] = None
+    ) -> Tuple[Optional[PartDigest], List[ExpectedPart], List[ExpectedPart]]:
+        """
+        Hash the file part by part, with the (possibly non-uniform) sizes of 'parts', and compare
+        each part with its expected checksums.  Returns the MD5 part digests (None unless every
+        part was hashed), the parts that differ and the parts not compared.  Parts past the end
+        of the local file differ without being read, and once 'max_mismatches' parts differ the
+        remaining parts are not read.
+        """
+        digests: Optional[PartDigest] = PartDigest(max(part.size for part in parts))
+        mismatched: List[ExpectedPart] = []
+        unchecked: List[ExpectedPart] = []
+        buffer_in_bytes: int = min(self.buffer_in_bytes, max(self.local_file_size, 1))
+        with open_reader(self.io_backend, self.local_file_path, buffer_in_bytes) as reader:
+            for part in parts:
+                if max_mismatches is not None and len(mismatched) >= max_mismatches:
+                    unchecked.append(part)
+                    digests = None
+                    continue
+                if part.end > self.local_file_size:
+                    mismatched.append(part)
+                    digests = None
+                    continue
+
+                hashes: Dict[str, Any] = part.new_hashes()
+                chunks: Iterator[memoryview] = self._chunks(reader, part.offset, part.size)
+                for _ in _feed(chunks, list(hashes.values()), self.stats):
+                    pass
+                self.stats.parts_hashed += 1
+                if digests is not None:
+                    digests.digests += hashes[PART_MD5].digest()
+
+                matches: Optional[bool] = part.matches(hashes)
+                if matches is False:
+                    mismatched.append(part)
+                elif matches is None:
+                    unchecked.append(part)
+
+        return digests, mismatched, unchecked
+
+    def calculate_all(self, partition_set_in_bytes: Iterable[int]) -> Tuple[str, Dict[int, str]]:
+        """
+        Calculate the single-part ETag and the multi-part ETag of every partition size in
+        'partition_set_in_bytes' from one read of the file, regardless of 'strategy'.
+        """
+        partitions: List[int] = self._validate_partitions(partition_set_in_bytes)
+        if self.local_file_size < 1:
+            return f'"{md5().hexdigest()}"', {}
+
+        # The single-part MD5 is the only part of a partition as large as the file
+        whole_file: int = self.local_file_size
+        digests: Dict[int, PartDigest] = self._aggregate_checksums_many(
+            sorted(set(partitions) | {whole_file})
+        )
+        single_part: str = f'"{digests[whole_file].digests[:DIGEST_SIZE].hex()}"'
+        return single_part, {
+            partition_in_bytes: self._multi_part_signature(digests[partition_in_bytes])
+            for partition_in_bytes in partitions
+        }
+
     def calculate_with_strategy(
         self, calculate_as_multi_part_etag: bool, partition_in_bytes: int
     ) -> str:
@@ -78,44 +384,353 @@ class Calculator:
         Build a md5 hexdigest of all chunks and format as:
           "{md5([digest1, digest2, ...])}-{number of chunks}"
         """
-        checksums: List[str] = self._aggregate_checksums(partition_in_bytes)
-        checksums_size: int = len(checksums)
+        return self._multi_part_signature(self._aggregate_checksums(partition_in_bytes))
 
-        md5s: List[str] = md5(b"".join(m.digest() for m in checksums))
-        signature: str = f'"{md5s.hexdigest()}-{checksums_size}"'
+    def _multi_part_signature(self, digest: PartDigest) -> str:
+        signature: str = digest.signature()
         log.debug(
-            f"Multi-part signature: {signature} created with chunk size: {partition_in_bytes}"
+            "Multi-part signature: %s created with chunk size: %s", signature, digest.partition_in_bytes
         )
         return signature
 
     def _calculate_single_part(self) -> str:
         """
-        Given a local file path, read 1 chunk (file size) and calculate an MD5 hash.
+        Given a local file path, stream the whole file as 1 chunk and calculate an MD5 hash.
         Note: an MD5 hash is surrounded by '"' (ex: "<md5_hash>")
         """
-        checksums: List[str] = self._aggregate_checksums(self.local_file_size)
-        checksums_size: int = len(checksums)
-
-        # In the case of no checksums, return a static md5 signature
-        if checksums_size < 1:
+        # In the case of an empty file, return a static md5 signature
+        if self.local_file_size < 1:
             return f'"{md5().hexdigest()}"'
 
         # For a file <= the chunk size, produce an md5 of its single chunk
-        signature: str = f'"{checksums[0].hexdigest()}"'
-        log.debug(f"Single-part signature: {signature}")
+        digest: PartDigest = self._aggregate_checksums(self.local_file_size)
+        signature: str = f'"{digest.digests[:DIGEST_SIZE].hex()}"'
+        log.debug("Single-part signature: %s", signature)
         return signature
 
-    def _aggregate_checksums(self, partition_in_bytes: int) -> List[str]:
+    def _aggregate_checksums(self, partition_in_bytes: int) -> PartDigest:
+        """
+        Group a file into "partition_in_bytes" groups and return their MD5 digests
+        """
+        return self._aggregate_checksums_many([partition_in_bytes])[partition_in_bytes]
+
+    def _aggregate_checksums_many(
+        self, partitions: Iterable[int], extra: Sequence[PartDigest] = ()
+    ) -> Dict[int, PartDigest]:
+        """
+        Return the part digests per partition size, from the digest cache when the file is
+        unchanged since they were stored, otherwise by hashing the file.  'extra' digests are
+        never cached, so they are always fed from a read of the file.
+        """
+        digests, missing = self._cached_checksums(list(partitions))
+        if missing or extra:
+            digests.update(self._store_checksums(self._hash_partitions(missing, extra)))
+        return digests
+
+    def _cached_checksums(self, partitions: List[int]) -> Tuple[Dict[int, PartDigest], List[int]]:
+        """
+        Split 'partitions' into the digests found in the cache and the partition sizes to hash
+        """
+        if self.cache is None:
+            return {}, partitions
+
+        identity = file_identity(self.local_file_stat)
+        digests: Dict[int, PartDigest] = {}
+        for partition_in_bytes in partitions:
+            cached: Optional[bytes] = self.cache.get(identity, partition_in_bytes)
+            if cached is not None:
+                digests[partition_in_bytes] = PartDigest(partition_in_bytes)
+                digests[partition_in_bytes].digests += cached
+
+        missing: List[int] = [p for p in partitions if p not in digests]
+        self.stats.cache_hits += len(digests)
+        self.stats.cache_misses += len(missing)
+        return digests, missing
+
+    def _store_checksums(self, digests: Dict[int, PartDigest]) -> Dict[int, PartDigest]:
+        identity = file_identity(self.local_file_stat)
+        # Only store digests if the file did not change while it was being hashed
+        if self.cache is not None and file_identity(self.local_file_path.stat()) == identity:
+            for partition_in_bytes, digest in digests.items():
+                self.cache.put(identity, partition_in_bytes, digest.digests)
+        return digests
+
+    def _hash_partitions(
+        self, partitions: List[int], extra: Sequence[PartDigest] = ()
+    ) -> Dict[int, PartDigest]:
+        """
+        Stream the file once through the configured reader and feed each slice into a
+        running MD5 per partition size, and into every 'extra' digest.  Returns the MD5
+        part digests per partition size.
+        """
+        digests, skips, offset = self._resume(partitions, extra)
+        if self.workers > 1 and not extra and not offset:
+            segment_in_bytes: Optional[int] = self._plan_segments(partitions)
+            if segment_in_bytes:
+                return self._aggregate_checksums_parallel(partitions, segment_in_bytes)
+
+        slices = self._hash_slices(digests + list(extra), max(self.local_file_size, 1), offset, skips)
+        for _ in slices:
+            pass
+
+        return {digest.partition_in_bytes: digest for digest in digests}
+
+    def _resume(
+        self, partitions: List[int], extra: Sequence[PartDigest] = ()
+    ) -> Tuple[List[PartDigest], List[int], int]:
+        """
+        Return a digest per partition size, resumed from a checkpoint of the file before it grew
+        when possible, the offset to read the file from, and per digest the bytes to skip past
+        that offset.  'extra' digests need the whole file, so nothing is resumed with them.
+        """
+        digests: List[PartDigest] = [PartDigest(p) for p in partitions]
+        starts: List[int] = [0] * len(partitions)
+        if self.checkpoints is not None and not extra:
+            fingerprints: Dict[int, bytes] = {}
+            for i, partition_in_bytes in enumerate(partitions):
+                checkpoint = self._checkpoint(partition_in_bytes, fingerprints)
+                if checkpoint is not None:
+                    digests[i], starts[i] = checkpoint.digest, checkpoint.digest.position
+
+        offset: int = min(starts, default=0)
+        if offset:
+            log.debug("Resuming '%s' from checkpoints at byte %s", self.local_file_path, offset)
+        return digests, [start - offset for start in starts], offset
+
+    def _checkpoint(
+        self, partition_in_bytes: int, fingerprints: Dict[int, bytes]
+    ) -> Optional[Checkpoint]:
+        """
+        Return the checkpoint of a prefix of the file for 'partition_in_bytes', if the file has
+        only grown since: it is larger, its timestamps did not go back, and the prefix is
+        unchanged.  A running MD5 of the whole file resumes any partition size it still fits in.
+        """
+        device, inode = self.local_file_stat.st_dev, self.local_file_stat.st_ino
+        for key in (partition_in_bytes, WHOLE_FILE):
+            checkpoint: Optional[Checkpoint] = self.checkpoints.get(device, inode, key)
+            if checkpoint is None or checkpoint.length < 1:
+                continue
+            if not checkpoint.resumable(self.local_file_stat):
+                log.debug("'%s' did not only grow since its checkpoint", self.local_file_path)
+                continue
+            if key == WHOLE_FILE:
+                if checkpoint.length > partition_in_bytes:
+                    continue
+                checkpoint.digest = checkpoint.digest.copy(partition_in_bytes)
+
+            if checkpoint.length not in fingerprints:
+                fingerprints[checkpoint.length] = prefix_fingerprint(
+                    self.local_file_path, checkpoint.length
+                )
+            if fingerprints[checkpoint.length] == checkpoint.fingerprint:
+                return checkpoint
+            log.debug("Prefix of '%s' changed since its checkpoint, rehashing", self.local_file_path)
+        return None
+
+    def _save_checkpoints(self, digests: List[PartDigest], length: int) -> None:
         """
-        Group a file into "partition_in_bytes" groups and return a list of MD5 hashes
+        Checkpoint every MD5 digest fed with the first 'length' bytes of the file, before it is
+        finalized.  A digest with no complete part is also the running MD5 of the whole file.
+        Nothing is checkpointed if the file changed while it was being hashed.
         """
-        checksums: List[str] = []
-        with open(self.local_file_path, "rb") as f:
-            while True:
-                data: bytes = f.read(partition_in_bytes)
-                if not data:
-                    break
-                checksums.append(md5(data))
+        if self.checkpoints is None or length < 1:
+            return
+
+        stat_result = self.local_file_path.stat()
+        if length != stat_result.st_size or file_identity(stat_result) != file_identity(
+            self.local_file_stat
+        ):
+            return
+
+        device, inode = stat_result.st_dev, stat_result.st_ino
+        fingerprint: bytes = prefix_fingerprint(self.local_file_path, length)
+        for digest in digests:
+            if digest.new_hash is not md5 or digest.position != length:
+                continue
+            checkpoint = Checkpoint(
+                length, stat_result.st_mtime_ns, stat_result.st_ctime_ns, fingerprint, digest
+            )
+            self.checkpoints.put(device, inode, digest.partition_in_bytes, checkpoint)
+            if not digest.count:
+                self.checkpoints.put(device, inode, WHOLE_FILE, checkpoint)
+
+    def _hash_slices(
+        self,
+        digests: List[PartDigest],
+        slice_in_bytes: int,
+        offset: int = 0,
+        skips: Sequence[int] = (),
+    ) -> Iterator[int]:
+        """
+        Feed the file from 'offset' into 'digests', yielding the number of bytes hashed so far
+        after about every 'slice_in_bytes'.  'skips' holds, per digest, the bytes it already has
+        past 'offset'.  The digests are checkpointed, then finalized before the last yield.
+        """
+        buffer_in_bytes: int = min(self.buffer_in_bytes, slice_in_bytes, max(self.local_file_size, 1))
+        feeders: List[Any] = [
+            _Skip(digest, skip) if skip else digest
+            for digest, skip in zip(digests, list(skips) + [0] * (len(digests) - len(skips)))
+        ]
+        hashed: int = 0
+        since_yield: int = 0
+        with open_reader(self.io_backend, self.local_file_path, buffer_in_bytes) as reader:
+            for size in _feed(self._chunks(reader, offset), feeders, self.stats):
+                hashed += size
+                since_yield += size
+                if since_yield >= slice_in_bytes:
+                    since_yield = 0
+                    yield hashed
+
+        self._save_checkpoints(digests, offset + hashed)
+        for digest in digests:
+            self.stats.parts_hashed += digest.finalize().count
+        yield hashed
+
+    def _chunks(
+        self, reader: Reader, offset: int, length: Optional[int] = None
+    ) -> Iterator[memoryview]:
+        """
+        Read [offset, offset + length), skipping the holes of a sparse file, through the device
+        scheduler if any
+        """
+        chunks = reader.sparse_chunks(offset, length) if self.sparse else reader.chunks(offset, length)
+        if self.scheduler is None:
+            return chunks
+        return self.scheduler.read(self.local_file_stat.st_dev, chunks)
+
+    def _plan_segments(self, partitions: List[int]) -> Optional[int]:
+        """
+        Return a segment size that falls on a part boundary of every partition, so segments
+        can be hashed on their own and all partitions share one read of the file.  The least
+        common multiple of the partitions must leave at least one segment per worker, unless a
+        single partition splits the file.  Otherwise, as for a partition that does not split
+        the file, None is returned and the file is read once serially.
+        """
+        common: int = 1
+        for partition_in_bytes in partitions:
+            common = common * partition_in_bytes // gcd(common, partition_in_bytes)
+
+        if common * self.workers > self.local_file_size and (
+            len(partitions) != 1 or partitions[0] >= self.local_file_size
+        ):
+            return None
+
+        units: int = -(-self.local_file_size // common)
+        return -(-units // self.workers) * common
+
+    def _aggregate_checksums_parallel(
+        self, partitions: List[int], segment_in_bytes: int
+    ) -> Dict[int, PartDigest]:
+        """
+        Hash each segment on a worker pool and reassemble the part digests in file order
+        """
+        pool_type = ProcessPoolExecutor if self.executor == Executor.PROCESS else ThreadPoolExecutor
+        # Locks cannot be sent to other processes, only threads share the device budgets
+        scheduler = self.scheduler if self.executor == Executor.THREAD else None
+        digests: Dict[int, PartDigest] = {
+            partition_in_bytes: PartDigest(partition_in_bytes) for partition_in_bytes in partitions
+        }
+        offsets = range(0, self.local_file_size, segment_in_bytes)
+        with pool_type(max_workers=self.workers) as pool:
+            results = pool.map(
+                _hash_segment,
+                [self.local_file_path] * len(offsets),
+                [partitions] * len(offsets),
+                offsets,
+                [segment_in_bytes] * len(offsets),
+                [min(self.buffer_in_bytes, segment_in_bytes)] * len(offsets),
+                [self.io_backend] * len(offsets),
+                [scheduler] * len(offsets),
+                [self.local_file_stat.st_dev] * len(offsets),
+                [self.sparse] * len(offsets),
+            )
+            for result, stats in results:
+                self.stats.merge(stats)
+                for partition_in_bytes, part_digests in result.items():
+                    digests[partition_in_bytes].digests += part_digests
+
+        return digests
+
+
+def _hash_segment(
+    local_file_path: Path,
+    partitions: List[int],
+    offset: int,
+    length: int,
+    buffer_in_bytes: int,
+    io_backend: str,
+    scheduler: Optional[DeviceScheduler] = None,
+    device: int = 0,
+    sparse: bool = False,
+) -> Tuple[Dict[int, bytes], S3IDStats]:
+    """
+    Hash [offset, offset + length) of a file for every partition size and return the
+    concatenated part digests.  Module level so it can be sent to a process pool.  With a
+    'scheduler', the read counts against the budget of 'device'.  With 'sparse', holes are
+    not read.
+    """
+    digests: List[PartDigest] = [PartDigest(p) for p in partitions]
+    stats: S3IDStats = S3IDStats()
+    with open_reader(io_backend, local_file_path, buffer_in_bytes) as reader:
+        chunks: Iterator[memoryview] = (
+            reader.sparse_chunks(offset, length) if sparse else reader.chunks(offset, length)
+        )
+        if scheduler is not None:
+            chunks = scheduler.read(device, chunks)
+        for _ in _feed(chunks, digests, stats):
+            pass
+
+    for digest in digests:
+        stats.parts_hashed += digest.finalize().count
+    return {digest.partition_in_bytes: bytes(digest.digests) for digest in digests}, stats
+
+
+class _Skip:
+    """
+    Feed a digest only what follows the first 'skip' bytes, ex: a digest resumed past the
+    offset the file is read from
+    """
+
+    __slots__ = ("digest", "skip")
+
+    def __init__(self, digest: PartDigest, skip: int) -> None:
+        self.digest: PartDigest = digest
+        self.skip: int = skip
+
+    def update(self, data) -> None:
+        if self.skip:
+            skipped: int = min(self.skip, len(data))
+            self.skip -= skipped
+            data = data[skipped:]
+        if data:
+            self.digest.update(data)
+
+    def update_zeros(self, length: int) -> None:
+        skipped: int = min(self.skip, length)
+        self.skip -= skipped
+        if length > skipped:
+            self.digest.update_zeros(length - skipped)
+
 
-        log.debug(f" {len(checksums)} checksum(s) found")
-        return checksums
+def _feed(chunks: Iterator[memoryview], digests: List[Any], stats: S3IDStats) -> Iterator[int]:
+    """
+    Feed every chunk into 'digests', yielding each chunk size.  Time spent waiting for a chunk
+    and time spent hashing it are added to 'stats' separately.  A ZeroRun (a hole of a sparse
+    file) is fed as zeros without having been read.
+    """
+    clock = time.perf_counter
+    started: float = clock()
+    for chunk in chunks:
+        read: float = clock()
+        if isinstance(chunk, ZeroRun):
+            for digest in digests:
+                update_zeros(digest, chunk.length)
+            stats.hole_bytes += chunk.length
+        else:
+            for digest in digests:
+                digest.update(chunk)
+            stats.bytes_read += len(chunk)
+        stats.io_seconds += read - started
+        stats.hash_seconds += clock() - read
+        yield len(chunk)
+        started = clock()
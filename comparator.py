@@ -1,12 +1,20 @@
+import asyncio
 import logging
+import time
 from pathlib import Path
-from typing import Any, Dict, Set, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
 
-from constants import DASH,PACKAGE_NAME,Strategy
+from constants import DASH, PACKAGE_NAME, Buffer, Executor, IOBackend, Strategy
+from s3id_cache import DigestCache
 from calculator import Calculator
+from s3id_checkpoint import CheckpointStore
+from s3id_checksums import ChecksumVerifier
+from s3id_digest import PartDigest
+from s3id_parts import ExpectedPart, expected_parts
+from s3id_planner import discover_partitions, feasible_partitions, part_count
 from s3id_result import S3IDResultMatch, S3IDResultMismatch
-
-logging.basicConfig(level=logging.DEBUG)
+from s3id_scheduler import DeviceScheduler
+from s3id_stats import StatsHook, emit
 
 log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
 
@@ -19,6 +27,19 @@ class Comparator(Calculator):
         local_file_path: Path,
         threshold_in_bytes: int,
         partition_set_in_bytes: Set[int],
+        discover: bool = False,
+        buffer_in_bytes: Optional[int] = None,
+        io_backend: str = IOBackend.DEFAULT,
+        workers: int = 1,
+        executor: str = Executor.THREAD,
+        cache: Optional[DigestCache] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        hooks: Iterable[StatsHook] = (),
+        include_stats: bool = False,
+        checksums: Optional[Dict[str, str]] = None,
+        parts: Optional[Sequence[Dict[str, Any]]] = None,
+        max_mismatches: Optional[int] = None,
+        scheduler: Optional[DeviceScheduler] = None,
     ) -> Dict[str, Union[int, str]]:
         """
         Iteratively create ETag values over a range of chunk sizes in hopes of matching 'etag'
@@ -29,13 +50,54 @@ class Comparator(Calculator):
             local_file_path,
             threshold_in_bytes,
             partition_set_in_bytes,
+            discover=discover,
+            buffer_in_bytes=buffer_in_bytes,
+            io_backend=io_backend,
+            workers=workers,
+            executor=executor,
+            cache=cache,
+            checkpoints=checkpoints,
+            hooks=hooks,
+            include_stats=include_stats,
+            checksums=checksums,
+            parts=parts,
+            max_mismatches=max_mismatches,
+            scheduler=scheduler,
         ).summary()
+        return cls._report(result, local_file_path)
+
+    @classmethod
+    async def run_async(
+        cls,
+        etag: str,
+        local_file_path: Path,
+        threshold_in_bytes: int,
+        partition_set_in_bytes: Set[int],
+        progress: Optional[Callable[[int, Tuple[int, ...]], Any]] = None,
+        slice_in_bytes: int = Buffer.DEFAULT_SLICE_SIZE,
+        **options: Any,
+    ) -> Dict[str, Union[int, str]]:
+        """
+        Same as 'run' without blocking the event loop.  Remaining keyword arguments are
+        passed to the Comparator (ex: discover, buffer_in_bytes, io_backend, cache).
+        """
+        result: Dict[str, Any] = await Comparator(
+            etag,
+            local_file_path,
+            threshold_in_bytes,
+            partition_set_in_bytes,
+            **options,
+        ).summary_async(progress, slice_in_bytes)
+        return cls._report(result, local_file_path)
+
+    @staticmethod
+    def _report(result: Dict[str, Any], local_file_path: Path) -> Dict[str, Any]:
         if result["match"]:
-            log.info(f"S3 object etag matched local file: '{local_file_path}'")
+            log.info("S3 object etag matched local file: '%s'", local_file_path)
             return result
         else:
             log.info(
-                f"S3 object etag did NOT match local file: '{local_file_path}' with any chunk sizes"
+                "S3 object etag did NOT match local file: '%s' with any chunk sizes", local_file_path
             )
             return result
 
@@ -45,12 +107,44 @@ class Comparator(Calculator):
         local_file_path: Path,
         threshold_in_bytes: int,
         partition_set_in_bytes: Set[int],
+        discover: bool = False,
+        buffer_in_bytes: Optional[int] = None,
+        io_backend: str = IOBackend.DEFAULT,
+        workers: int = 1,
+        executor: str = Executor.THREAD,
+        cache: Optional[DigestCache] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        hooks: Iterable[StatsHook] = (),
+        include_stats: bool = False,
+        checksums: Optional[Dict[str, str]] = None,
+        parts: Optional[Sequence[Dict[str, Any]]] = None,
+        max_mismatches: Optional[int] = None,
+        scheduler: Optional[DeviceScheduler] = None,
     ) -> None:
-        if not etag:
+        """
+        'checksums' are S3 additional checksums ({algorithm: base64 value}, see
+        ChecksumAlgorithm) verified from the same read as 'etag', which may then be blank.
+
+        'parts' are the expected size and checksums of every part of a multi-part 'etag' (see
+        's3id_parts.expected_parts'), so a mismatch reports which parts differ.  Part sizes may be
+        non-uniform.  Once 'max_mismatches' parts differ, the remaining parts are not read.
+        """
+        if not etag and not checksums:
             raise ValueError("'etag' cannot be blank.")
 
-        self.etag: str = etag
-        super().__init__(local_file_path, (Strategy.MULTI_PART if DASH in self.etag else Strategy.SINGLE_PART), threshold_in_bytes)
+        self.etag: str = etag or ""
+        super().__init__(
+            local_file_path,
+            (Strategy.MULTI_PART if DASH in self.etag else Strategy.SINGLE_PART),
+            threshold_in_bytes,
+            buffer_in_bytes=buffer_in_bytes,
+            io_backend=io_backend,
+            workers=workers,
+            executor=executor,
+            cache=cache,
+            checkpoints=checkpoints,
+            scheduler=scheduler,
+        )
 
         if not isinstance(partition_set_in_bytes, set) or not all(
             isinstance(x, int) for x in partition_set_in_bytes
@@ -58,6 +152,51 @@ class Comparator(Calculator):
             raise ValueError("'partition_set_in_bytes' must be a set of integers")
 
         self.partition_set_in_bytes = partition_set_in_bytes
+        self.discover: bool = discover
+        self.hooks: Tuple[StatsHook, ...] = tuple(hooks)
+        self.include_stats: bool = include_stats
+        self.checksums: Optional[ChecksumVerifier] = (
+            ChecksumVerifier(checksums, self.local_file_size, partition_set_in_bytes, discover)
+            if checksums
+            else None
+        )
+
+        self.parts: Optional[List[ExpectedPart]] = expected_parts(parts) if parts else None
+        if self.parts is not None:
+            if checksums:
+                raise ValueError("'parts' cannot be combined with 'checksums'.")
+            if part_count(self.etag) != len(self.parts):
+                raise ValueError(
+                    f"'parts' lists {len(self.parts)} part(s), the ETag '{self.etag}' has "
+                    f"{part_count(self.etag)}."
+                )
+
+        if max_mismatches is not None and (
+            not isinstance(max_mismatches, int) or max_mismatches <= 0
+        ):
+            raise ValueError(
+                f"Invalid max_mismatches parameter '{max_mismatches}'. Must be a positive integer."
+            )
+
+        self.max_mismatches: Optional[int] = max_mismatches
+
+    def plan(self) -> Set[int]:
+        """
+        Return the partition sizes worth hashing.  A multi-part ETag encodes its part count,
+        so any size that cannot split the local file into that many parts is dropped.  With
+        'discover' enabled, every plausible MiB-aligned size is added to the candidates.
+        """
+        expected_parts = part_count(self.etag)
+        if self.strategy is not Strategy.MULTI_PART or expected_parts is None:
+            return set(self.partition_set_in_bytes)
+
+        candidates: Set[int] = feasible_partitions(
+            self.local_file_size, expected_parts, self.partition_set_in_bytes
+        )
+        self.stats.partition_sizes_pruned = sorted(set(self.partition_set_in_bytes) - candidates)
+        if self.discover:
+            candidates |= discover_partitions(self.local_file_size, expected_parts)
+        return candidates
 
     def summary(self) -> Dict[str, Union[int, str]]:
         """
@@ -67,15 +206,115 @@ class Comparator(Calculator):
 
         If no match is found, return: { "match": False }
         """
-        for partition_in_bytes in sorted(self.partition_set_in_bytes):
-            result = self.calculate(partition_in_bytes)
-            signature = result["signature"]
-            log.debug(
-                f"Calculated ETag: {signature} with chunk size (bytes): {partition_in_bytes}"
-            )
-            if self.etag.replace('"', "") == signature.replace('"', ""):
-                return S3IDResultMatch(
-                    signature, result["strategy"], partition_in_bytes
-                ).summary()
+        started: float = time.perf_counter()
+        if self.parts is not None:
+            return self._finish(self._match_parts(), started)
+
+        partitions: Set[int] = self.plan() if self.etag else set()
+        if self.etag and not partitions:
+            log.debug("No partition size can produce the ETag part count, skipping hashing")
+            return self._finish(S3IDResultMismatch(None).summary(), started)
+
+        # Every candidate partition size and checksum is hashed from a single read of the file
+        results = self.calculate_many(partitions, self._checksum_digests())
+        return self._finish(self._match(results), started)
+
+    async def summary_async(
+        self,
+        progress: Optional[Callable[[int, Tuple[int, ...]], Any]] = None,
+        slice_in_bytes: int = Buffer.DEFAULT_SLICE_SIZE,
+    ) -> Dict[str, Union[int, str]]:
+        """
+        Same as 'summary', hashing on an executor in slices (see 'calculate_many_async')
+        """
+        started: float = time.perf_counter()
+        if self.parts is not None:
+            result = await asyncio.get_running_loop().run_in_executor(None, self._match_parts)
+            return self._finish(result, started)
+
+        partitions: Set[int] = self.plan() if self.etag else set()
+        if self.etag and not partitions:
+            log.debug("No partition size can produce the ETag part count, skipping hashing")
+            return self._finish(S3IDResultMismatch(None).summary(), started)
+
+        results = await self.calculate_many_async(
+            partitions, progress, slice_in_bytes, self._checksum_digests()
+        )
+        return self._finish(self._match(results), started)
+
+    def _finish(self, result: Dict[str, Any], started: float) -> Dict[str, Any]:
+        """
+        Record the total time, report stats to the hooks, and attach them to the result if asked
+        """
+        self.stats.total_seconds = time.perf_counter() - started
+        emit(self.hooks, self.stats, result)
+        if self.include_stats:
+            result["stats"] = self.stats.summary()
+        return result
+
+    def _checksum_digests(self) -> Sequence[PartDigest]:
+        return self.checksums.part_digests() if self.checksums else ()
+
+    def _match(self, results: Dict[int, Dict[str, str]]) -> Dict[str, Union[int, str]]:
+        self.stats.partition_sizes_tried = sorted(results)
+        return match_results(
+            self.etag, results, self.checksums.summary() if self.checksums else None
+        )
+
+    def _match_parts(self) -> Dict[str, Union[int, str]]:
+        """
+        Hash the file with the sizes of the expected parts, compare each part, and rebuild the
+        ETag from the part digests when every part was read
+        """
+        digests, mismatched, unchecked = self.check_parts(self.parts, self.max_mismatches)
+        self.stats.partition_sizes_tried = sorted({part.size for part in self.parts})
+        report: Dict[str, Any] = {
+            "mismatched": [
+                {"part_number": part.part_number, "range": [part.offset, part.end]}
+                for part in mismatched
+            ],
+            "unchecked": [part.part_number for part in unchecked],
+        }
+        expected_size: int = self.parts[-1].end
+        if self.local_file_size != expected_size:
+            report["local_size"] = self.local_file_size
+            report["expected_size"] = expected_size
+            digests = None
+
+        signature: Optional[str] = digests.signature() if digests is not None else None
+        log.debug("Parts signature: %s, %s part(s) differ", signature, len(mismatched))
+        matched: bool = signature is not None and self.etag.strip('"') == signature.strip('"')
+        if matched and not mismatched:
+            return S3IDResultMatch(
+                signature, Strategy.MULTI_PART, self.parts[0].size, parts=report
+            ).summary()
+        return S3IDResultMismatch(signature, parts=report).summary()
+
+
+def match_results(
+    etag: str,
+    results: Dict[int, Dict[str, str]],
+    checksums: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Union[int, str]]:
+    """
+    Compare 'etag' with calculated results ({partition size: {"signature", "strategy"}}), trying
+    partition sizes in ascending order, and return a match or mismatch summary.  With additional
+    'checksums' results ({algorithm: {"match": bool, ...}}), every one of them must match too,
+    and a blank 'etag' is matched by the checksums alone.
+    """
+    checksums_match: bool = checksums is None or all(c["match"] for c in checksums.values())
+    signature = None
+    for partition_in_bytes in sorted(results):
+        result = results[partition_in_bytes]
+        signature = result["signature"]
+        log.debug("Calculated ETag: %s with chunk size (bytes): %s", signature, partition_in_bytes)
+        if etag.replace('"', "") == signature.replace('"', ""):
+            if not checksums_match:
+                break
+            return S3IDResultMatch(
+                signature, result["strategy"], partition_in_bytes, checksums
+            ).summary()
 
-        return S3IDResultMismatch(signature).summary()
+    if not etag and checksums and checksums_match:
+        return S3IDResultMatch(None, None, None, checksums).summary()
+    return S3IDResultMismatch(signature, checksums).summary()
@@ -31,3 +31,96 @@ class EtagChunkSizeSet(object):
     # 15MB - s3cmd - https://s3tools.org/kb/item13.htm#:~:text=Size%20of%20each%20chunk%20of,is%205MB%2C%20maximum%20is%205GB.
     # 16MB - https://docs.aws.amazon.com/cli/latest/topic/s3-config.html
     AWS_S3 = {8 * Units.ONE_MB, 15 * Units.ONE_MB, 16 * Units.ONE_MB}
+
+
+class Buffer(object):
+    """
+    Size of each read when streaming a local file through the hashers.  A single buffer
+    feeds every candidate partition size, so the file is only read once.
+    """
+
+    DEFAULT_SIZE = 8 * Units.ONE_MB
+
+    # Bytes hashed on the executor between two checks for cancellation by the async API
+    DEFAULT_SLICE_SIZE = 64 * Units.ONE_MB
+
+
+class S3Limits(object):
+    # https://docs.aws.amazon.com/AmazonS3/latest/userguide/qfacts.html
+    MIN_PART_SIZE = 5 * Units.ONE_MB
+    MAX_PART_SIZE = 5 * Units.ONE_GB
+    MAX_PARTS = 10000
+
+
+class IOBackend(object):
+    """
+    How a local file is read while hashing
+    - BUFFERED --> plain sequential reads into a reused buffer
+    - MMAP --> memory-map the file and hash slices of the mapping without copying
+    - PREAD --> positional reads at explicit offsets (os.preadv / os.pread)
+    - SEQUENTIAL --> buffered reads with posix_fadvise hints (SEQUENTIAL/WILLNEED ahead, DONTNEED behind)
+      so that hashing large files does not evict the rest of the page cache
+    """
+
+    BUFFERED = "buffered"
+    MMAP = "mmap"
+    PREAD = "pread"
+    SEQUENTIAL = "sequential"
+
+    DEFAULT = BUFFERED
+    ALL = {BUFFERED, MMAP, PREAD, SEQUENTIAL}
+
+
+class Executor(object):
+    """
+    Pool used to hash the parts of a single file concurrently when 'workers' > 1
+    - THREAD --> threads, hashlib releases the GIL while hashing large buffers
+    - PROCESS --> processes, for interpreters where hashing does not release the GIL
+    """
+
+    THREAD = "thread"
+    PROCESS = "process"
+
+    ALL = {THREAD, PROCESS}
+
+    # Files verified at once by the batch API (S3ID.unpack_many)
+    DEFAULT_CONCURRENCY = 8
+
+    # Results and partition sizes remembered by the batch API to deduplicate work
+    DEDUPE_ENTRIES = 65536
+
+
+class DeviceLimits(object):
+    """
+    Default budgets of the device-aware I/O scheduler (scheduler.DeviceScheduler)
+    """
+
+    # Files read at once from one device (st_dev)
+    DEFAULT_CONCURRENCY = 2
+
+    # Files stat-ed and reordered by physical layout at once
+    ORDERING_WINDOW = 1024
+
+
+class CacheLimits(object):
+    """
+    Defaults of the persistent digest cache (cache.DigestCache)
+    """
+
+    # Cache hits whose last-used time is kept in memory before being written in one transaction
+    TOUCH_BATCH = 256
+
+
+class ChecksumAlgorithm(object):
+    """
+    S3 additional checksums (x-amz-checksum-*) that can be verified alongside the ETag
+    https://docs.aws.amazon.com/AmazonS3/latest/userguide/checking-object-integrity.html
+    - CRC32C needs the optional 'crc32c' package
+    """
+
+    CRC32 = "crc32"
+    CRC32C = "crc32c"
+    SHA1 = "sha1"
+    SHA256 = "sha256"
+
+    ALL = {CRC32, CRC32C, SHA1, SHA256}
@@ -1,7 +1,14 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
+from s3id_cache import DigestCache
+from s3id_checkpoint import CheckpointStore
 from comparator import Comparator
-from constants import Strategy, EtagChunkSizeSet
-from typing import Set
+from constants import DASH, Buffer, Executor, IOBackend, Strategy, EtagChunkSizeSet
+from s3id_result import S3IDResultError
+from s3id_scheduler import DeviceScheduler
+from s3id_stats import StatsHook
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 
 class S3ID(Comparator):
@@ -16,10 +23,228 @@ class S3ID(Comparator):
         local_file_path: Path,
         threshold_in_bytes: int = Strategy.DEFAULT_THRESHOLD,
         partition_set_in_bytes: Set[int] = EtagChunkSizeSet.AWS_S3,
+        discover: bool = False,
+        buffer_in_bytes: Optional[int] = None,
+        io_backend: str = IOBackend.DEFAULT,
+        workers: int = 1,
+        executor: str = Executor.THREAD,
+        cache: Optional[DigestCache] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        hooks: Iterable[StatsHook] = (),
+        include_stats: bool = False,
+        checksums: Optional[Dict[str, str]] = None,
+        parts: Optional[Sequence[Dict[str, Any]]] = None,
+        max_mismatches: Optional[int] = None,
+        scheduler: Optional[DeviceScheduler] = None,
     ) -> bool:
         return cls.run(
             etag,
             local_file_path,
             threshold_in_bytes,
             partition_set_in_bytes,
+            discover=discover,
+            buffer_in_bytes=buffer_in_bytes,
+            io_backend=io_backend,
+            workers=workers,
+            executor=executor,
+            cache=cache,
+            checkpoints=checkpoints,
+            hooks=hooks,
+            include_stats=include_stats,
+            checksums=checksums,
+            parts=parts,
+            max_mismatches=max_mismatches,
+            scheduler=scheduler,
         )
+
+    @classmethod
+    async def unpack_async(
+        cls,
+        etag: str,
+        local_file_path: Path,
+        threshold_in_bytes: int = Strategy.DEFAULT_THRESHOLD,
+        partition_set_in_bytes: Set[int] = EtagChunkSizeSet.AWS_S3,
+        progress: Optional[Callable[[int, Tuple[int, ...]], Any]] = None,
+        slice_in_bytes: int = Buffer.DEFAULT_SLICE_SIZE,
+        **options: Any,
+    ) -> Dict[str, Any]:
+        """
+        Awaitable 'unpack' that hashes on an executor in slices of about 'slice_in_bytes'.
+        'progress(bytes_hashed, partition_sizes)' is called after each slice, and cancelling the
+        awaiting task stops hashing after the current slice and closes the file.
+        """
+        return await cls.run_async(
+            etag,
+            local_file_path,
+            threshold_in_bytes,
+            partition_set_in_bytes,
+            progress=progress,
+            slice_in_bytes=slice_in_bytes,
+            **options,
+        )
+
+    @classmethod
+    def unpack_many(
+        cls,
+        items: Iterable[Tuple],
+        concurrency: int = Executor.DEFAULT_CONCURRENCY,
+        threshold_in_bytes: int = Strategy.DEFAULT_THRESHOLD,
+        partition_set_in_bytes: Set[int] = EtagChunkSizeSet.AWS_S3,
+        scheduler: Optional[DeviceScheduler] = None,
+        dedupe: bool = False,
+        **options: Any,
+    ) -> Iterator[Tuple[str, Path, Dict[str, Any]]]:
+        """
+        Verify many (etag, local_file_path) or (etag, local_file_path, partition_set_in_bytes)
+        items on a pool of 'concurrency' threads.  Yields (etag, local_file_path, result) as
+        each item completes.  At most 2 * 'concurrency' items are in flight, counting those
+        waiting on a duplicate with 'dedupe', so memory does not grow with the size of 'items'.
+        An item that raises yields {"match": False, "error": ...} instead of aborting the batch.
+        Remaining keyword arguments are passed to 'unpack'.
+
+        With a 'scheduler', items are reordered by device and physical layout (see
+        'DeviceScheduler.order') and every read counts against the budget of its device.
+
+        With 'dedupe', items naming the same physical file (same st_dev and st_ino, ex:
+        hardlinks) with the same ETag and partition sizes are hashed once and share the result.
+        Distinct files with the same size and ETag are still each read, since a copy can be
+        corrupted, but once one of them matches a multi-part ETag the others are only hashed
+        with the partition size that matched.
+        """
+        if not isinstance(concurrency, int) or concurrency <= 0:
+            raise ValueError(
+                f"Invalid concurrency parameter '{concurrency}'. Must be a positive integer."
+            )
+
+        deduplicator: Optional[_Deduplicator] = _Deduplicator() if dedupe else None
+
+        def verify(etag: str, local_file_path: Path, partitions: Set[int]) -> Dict[str, Any]:
+            verify_options: Dict[str, Any] = options
+            if deduplicator is not None:
+                learned: Optional[int] = deduplicator.partition(etag, local_file_path, partitions)
+                if learned is not None:
+                    partitions, verify_options = {learned}, {**options, "discover": False}
+            return cls.unpack(
+                etag,
+                local_file_path,
+                threshold_in_bytes,
+                partitions,
+                scheduler=scheduler,
+                **verify_options,
+            )
+
+        iterator: Iterator[Tuple] = iter(items)
+        if scheduler is not None:
+            iterator = scheduler.order(iterator, key=lambda item: tuple(item)[1])
+        end = object()
+        pending: Dict[Future, Tuple[str, Path, Optional[Tuple]]] = {}
+        # Items waiting for the result of the same physical file, per in-flight key.  They count
+        # against the in-flight bound like submitted items.
+        followers: Dict[Tuple, List[Tuple[str, Path]]] = {}
+        waiting: int = 0
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            try:
+                while True:
+                    while len(pending) + waiting < 2 * concurrency:
+                        item = next(iterator, end)
+                        if item is end:
+                            break
+                        etag, local_file_path, partitions = (tuple(item) + (None, None))[:3]
+                        partitions = partitions or partition_set_in_bytes
+                        key: Optional[Tuple] = None
+                        if deduplicator is not None:
+                            key = deduplicator.key(etag, local_file_path, partitions)
+                            if key in followers:
+                                followers[key].append((etag, local_file_path))
+                                waiting += 1
+                                continue
+                            result: Optional[Dict[str, Any]] = deduplicator.result(key)
+                            if result is not None:
+                                yield etag, local_file_path, result
+                                continue
+                            if key is not None:
+                                followers[key] = []
+                        future = pool.submit(verify, etag, local_file_path, partitions)
+                        pending[future] = (etag, local_file_path, key)
+                    if not pending:
+                        break
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        etag, local_file_path, key = pending.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:  # pylint: disable=broad-except
+                            result = S3IDResultError(e).summary()
+                        if key is not None:
+                            deduplicator.learn(key, etag, result)
+                        yield etag, local_file_path, result
+                        waiting -= len(followers.get(key, ()))
+                        for follower in followers.pop(key, ()):
+                            yield (*follower, dict(result))
+            finally:
+                for future in pending:
+                    future.cancel()
+
+
+class _Deduplicator:
+    """
+    Work shared between the items of 'S3ID.unpack_many(dedupe=True)': results per physical
+    file (only kept for files with several hardlinks), and the partition size that matched each
+    (file size, ETag).  Both are bounded to 'entries', oldest first.
+    """
+
+    def __init__(self, entries: int = Executor.DEDUPE_ENTRIES) -> None:
+        self.entries: int = entries
+        self._results: Dict[Tuple, Dict[str, Any]] = {}
+        self._partitions: Dict[Tuple, int] = {}
+
+    def key(self, etag: str, local_file_path: Path, partitions: Set[int]) -> Optional[Tuple]:
+        """
+        Identify the work of an item: the physical file, its version, the ETag and the
+        partition sizes.  None when the file cannot be stat-ed, it then fails on its own.
+        """
+        try:
+            stat = os.stat(local_file_path)
+        except (OSError, TypeError, ValueError):
+            return None
+        return (
+            stat.st_dev,
+            stat.st_ino,
+            stat.st_size,
+            stat.st_mtime_ns,
+            stat.st_nlink,
+            etag,
+            frozenset(partitions),
+        )
+
+    def result(self, key: Optional[Tuple]) -> Optional[Dict[str, Any]]:
+        result: Optional[Dict[str, Any]] = self._results.get(key) if key is not None else None
+        return dict(result) if result is not None else None
+
+    def partition(self, etag: str, local_file_path: Path, partitions: Set[int]) -> Optional[int]:
+        """
+        The partition size that matched 'etag' for another file of the same size, if any.  The
+        same content split with another partition size gives another ETag, so a file that
+        does not match with this one does not match with any.
+        """
+        if not etag or DASH not in etag or not self._partitions:
+            return None
+        try:
+            size: int = os.stat(local_file_path).st_size
+        except OSError:
+            return None
+        return self._partitions.get((size, etag, frozenset(partitions)))
+
+    def learn(self, key: Tuple, etag: str, result: Dict[str, Any]) -> None:
+        size, nlink, partitions = key[2], key[4], key[6]
+        if nlink > 1 and "error" not in result:
+            self._remember(self._results, key, result)
+        if result.get("match") and etag and DASH in etag and "partition_in_bytes" in result:
+            self._remember(self._partitions, (size, etag, partitions), result["partition_in_bytes"])
+
+    def _remember(self, memory: Dict[Tuple, Any], key: Tuple, value: Any) -> None:
+        memory.pop(key, None)
+        memory[key] = value
+        if len(memory) > self.entries:
+            del memory[next(iter(memory))]
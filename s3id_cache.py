@@ -0,0 +1,267 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from constants import CacheLimits, PACKAGE_NAME
+
+log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
+
+# (st_dev, st_ino, st_size, st_mtime_ns)
+FileIdentity = Tuple[int, int, int, int]
+
+# (table, device, inode, partition_in_bytes)
+EntryKey = Tuple[str, int, int, int]
+
+
+def file_identity(stat_result: os.stat_result) -> FileIdentity:
+    return (
+        stat_result.st_dev,
+        stat_result.st_ino,
+        stat_result.st_size,
+        stat_result.st_mtime_ns,
+    )
+
+
+class DigestCache:
+    """
+    Persistent store of part digests keyed by file identity (device, inode, size, mtime_ns)
+    and partition size, backed by SQLite.  A changed file has a new identity, so stale entries
+    are never returned; they are replaced on the next store for the same (device, inode).
+    Entries are evicted least recently used first beyond 'max_bytes', and after 'max_age_seconds'
+    without a hit.  Hits are recorded in memory and written in batches (on the next store, every
+    'CacheLimits.TOUCH_BATCH' hits and on close).  The size of the store is read once on open
+    and then tracked from the entries this instance stores and evicts.
+    """
+
+    @staticmethod
+    def default_path() -> Path:
+        """
+        Path used when none is given: ~/.cache/s3id/digests.sqlite
+        """
+        return Path.home() / ".cache" / PACKAGE_NAME / "digests.sqlite"
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+    ) -> None:
+        if max_bytes is not None and (not isinstance(max_bytes, int) or max_bytes <= 0):
+            raise ValueError(
+                f"Invalid max_bytes parameter '{max_bytes}'. Must be a positive integer."
+            )
+        if max_age_seconds is not None and max_age_seconds <= 0:
+            raise ValueError(
+                f"Invalid max_age_seconds parameter '{max_age_seconds}'. Must be a positive number."
+            )
+
+        self.path: Path = Path(path) if path is not None else self.default_path()
+        self.max_bytes: Optional[int] = max_bytes
+        self.max_age_seconds: Optional[float] = max_age_seconds
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS digests (
+                    device INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    partition_in_bytes INTEGER NOT NULL,
+                    digests BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (device, inode, partition_in_bytes)
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS digests_last_used ON digests (last_used)"
+            )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    device INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    partition_in_bytes INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    ctime_ns INTEGER NOT NULL,
+                    fingerprint BLOB NOT NULL,
+                    digests BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (device, inode, partition_in_bytes)
+                )
+                """
+            )
+            # Last-used times of the entries hit since the last write
+            self._touched: Dict[EntryKey, float] = {}
+            # Size of the stored digests, only tracked to enforce 'max_bytes'
+            self._total: Optional[int] = None
+            if self.max_bytes is not None:
+                self._total = self._connection.execute(
+                    "SELECT COALESCE(SUM(LENGTH(digests)), 0) FROM digests"
+                ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            with self._connection:
+                self._write_touched()
+            self._connection.close()
+
+    def __enter__(self) -> "DigestCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get(self, identity: FileIdentity, partition_in_bytes: int) -> Optional[bytes]:
+        """
+        Return the concatenated part digests for an unchanged file, or None on a miss
+        """
+        device, inode, size, mtime_ns = identity
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT digests, last_used FROM digests WHERE device = ? AND inode = ?"
+                " AND size = ? AND mtime_ns = ? AND partition_in_bytes = ?",
+                (device, inode, size, mtime_ns, partition_in_bytes),
+            ).fetchone()
+            if row is None:
+                return None
+
+            key: EntryKey = ("digests", device, inode, partition_in_bytes)
+            now: float = time.time()
+            last_used: float = max(row[1], self._touched.get(key, row[1]))
+            if self.max_age_seconds is not None and now - last_used > self.max_age_seconds:
+                self._connection.execute(
+                    "DELETE FROM digests WHERE device = ? AND inode = ? AND partition_in_bytes = ?",
+                    (device, inode, partition_in_bytes),
+                )
+                self._touched.pop(key, None)
+                if self._total is not None:
+                    self._total -= len(row[0])
+                return None
+
+            self._touch(key, now)
+        return bytes(row[0])
+
+    def put(self, identity: FileIdentity, partition_in_bytes: int, digests: bytes) -> None:
+        device, inode, size, mtime_ns = identity
+        with self._lock, self._connection:
+            if self._total is not None:
+                self._total += len(digests) - self._connection.execute(
+                    "SELECT COALESCE(SUM(LENGTH(digests)), 0) FROM digests WHERE device = ?"
+                    " AND inode = ? AND (size != ? OR mtime_ns != ? OR partition_in_bytes = ?)",
+                    (device, inode, size, mtime_ns, partition_in_bytes),
+                ).fetchone()[0]
+            # A new size or mtime for the same inode replaces every stale partition entry
+            self._connection.execute(
+                "DELETE FROM digests WHERE device = ? AND inode = ? AND (size != ? OR mtime_ns != ?)",
+                (device, inode, size, mtime_ns),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (device, inode, size, mtime_ns, partition_in_bytes, bytes(digests), time.time()),
+            )
+            self._evict()
+
+    def get_checkpoint(
+        self, device: int, inode: int, partition_in_bytes: int
+    ) -> Optional[Tuple[int, int, int, bytes, bytes]]:
+        """
+        Return the (length, mtime_ns, ctime_ns, prefix fingerprint, completed part digests) last
+        checkpointed for a file that may have grown since, or None.  The caller checks that the
+        file was only appended to.
+        """
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT length, mtime_ns, ctime_ns, fingerprint, digests FROM checkpoints"
+                " WHERE device = ? AND inode = ?"
+                " AND partition_in_bytes = ?",
+                (device, inode, partition_in_bytes),
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._touch(("checkpoints", device, inode, partition_in_bytes), time.time())
+        return row[0], row[1], row[2], bytes(row[3]), bytes(row[4])
+
+    def put_checkpoint(
+        self,
+        device: int,
+        inode: int,
+        partition_in_bytes: int,
+        length: int,
+        mtime_ns: int,
+        ctime_ns: int,
+        fingerprint: bytes,
+        digests: bytes,
+    ) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    device,
+                    inode,
+                    partition_in_bytes,
+                    length,
+                    mtime_ns,
+                    ctime_ns,
+                    fingerprint,
+                    bytes(digests),
+                    time.time(),
+                ),
+            )
+            self._evict()
+
+    def _touch(self, key: EntryKey, now: float) -> None:
+        self._touched[key] = now
+        if len(self._touched) >= CacheLimits.TOUCH_BATCH:
+            self._write_touched()
+
+    def _write_touched(self) -> None:
+        for table in ("digests", "checkpoints"):
+            self._connection.executemany(
+                f"UPDATE {table} SET last_used = ?"
+                " WHERE device = ? AND inode = ? AND partition_in_bytes = ?",
+                [(now, *key[1:]) for key, now in self._touched.items() if key[0] == table],
+            )
+        self._touched.clear()
+
+    def _evict(self) -> None:
+        # Eviction follows the last-used times, bring them up to date first
+        self._write_touched()
+        if self.max_age_seconds is not None:
+            cutoff: float = time.time() - self.max_age_seconds
+            if self._total is not None:
+                self._total -= self._connection.execute(
+                    "SELECT COALESCE(SUM(LENGTH(digests)), 0) FROM digests WHERE last_used < ?",
+                    (cutoff,),
+                ).fetchone()[0]
+            for table in ("digests", "checkpoints"):
+                self._connection.execute(f"DELETE FROM {table} WHERE last_used < ?", (cutoff,))
+
+        if self._total is None or self._total <= self.max_bytes:
+            return
+
+        evicted: List[Tuple[int, int, int]] = []
+        rows = self._connection.execute(
+            "SELECT device, inode, partition_in_bytes, LENGTH(digests) FROM digests ORDER BY last_used"
+        )
+        # Only the oldest entries are read, up to the bytes to free
+        for device, inode, partition_in_bytes, length in rows:
+            if self._total <= self.max_bytes:
+                break
+            evicted.append((device, inode, partition_in_bytes))
+            self._total -= length
+        rows.close()
+        self._connection.executemany(
+            "DELETE FROM digests WHERE device = ? AND inode = ? AND partition_in_bytes = ?", evicted
+        )
+        log.debug("Evicted %d digest cache entries from '%s'", len(evicted), self.path)
@@ -0,0 +1,130 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from hashlib import md5
+from pathlib import Path
+from typing import Optional, Tuple
+
+from s3id_cache import DigestCache
+from constants import PACKAGE_NAME, Units
+from s3id_digest import PartDigest
+
+log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
+
+# Checkpoint key of a running MD5 over the whole file, with no part boundary yet
+WHOLE_FILE = 0
+
+# Bytes read at each end of the checkpointed prefix to fingerprint it
+FINGERPRINT_BYTES = 64 * Units.ONE_KB
+
+
+def prefix_fingerprint(local_file_path: Path, length: int) -> bytes:
+    """
+    MD5 of the first and last FINGERPRINT_BYTES of [0, length), so a file rotated or rewritten
+    in place (same inode, new content) does not resume from a stale checkpoint
+    """
+    fingerprint = md5(length.to_bytes(8, "big"))
+    with open(local_file_path, "rb") as f:
+        fingerprint.update(f.read(min(length, FINGERPRINT_BYTES)))
+        if length > FINGERPRINT_BYTES:
+            f.seek(max(length - FINGERPRINT_BYTES, FINGERPRINT_BYTES))
+            fingerprint.update(f.read(length - f.tell()))
+    return fingerprint.digest()
+
+
+class Checkpoint:
+    """
+    Part digests of the first 'length' bytes of a file, resumable once the file has grown.
+    'mtime_ns' and 'ctime_ns' are those of the file when it was 'length' bytes long.
+    """
+
+    __slots__ = ("length", "mtime_ns", "ctime_ns", "fingerprint", "digest")
+
+    def __init__(
+        self, length: int, mtime_ns: int, ctime_ns: int, fingerprint: bytes, digest: PartDigest
+    ) -> None:
+        self.length: int = length
+        self.mtime_ns: int = mtime_ns
+        self.ctime_ns: int = ctime_ns
+        self.fingerprint: bytes = fingerprint
+        # Not finalized: with the running state of the trailing part when kept in memory, or
+        # only the completed parts when loaded from a DigestCache
+        self.digest: PartDigest = digest
+
+    def copy(self) -> "Checkpoint":
+        return Checkpoint(
+            self.length, self.mtime_ns, self.ctime_ns, self.fingerprint, self.digest.copy()
+        )
+
+    def resumable(self, stat_result: os.stat_result) -> bool:
+        """
+        Whether a file with 'stat_result' may have only been appended to since the checkpoint:
+        it must have strictly grown, and neither its mtime nor its ctime went back in time.  A
+        file of the same size or smaller, or with older timestamps, was rewritten or replaced.
+        """
+        return (
+            self.length < stat_result.st_size
+            and self.mtime_ns <= stat_result.st_mtime_ns
+            and self.ctime_ns <= stat_result.st_ctime_ns
+        )
+
+
+class CheckpointStore:
+    """
+    Checkpoints of append-only files (ex: log segments, WAL archives) keyed by (device, inode,
+    partition size), so a re-check after the file grew only hashes the bytes appended since.
+    The running MD5 state of the trailing part is kept in memory for the 'max_entries' most
+    recently used keys.  With a 'cache', completed parts are also persisted, and a new process
+    resumes from the last complete part instead.
+    """
+
+    def __init__(self, cache: Optional[DigestCache] = None, max_entries: int = 1024) -> None:
+        if not isinstance(max_entries, int) or max_entries <= 0:
+            raise ValueError(
+                f"Invalid max_entries parameter '{max_entries}'. Must be a positive integer."
+            )
+
+        self.cache: Optional[DigestCache] = cache
+        self.max_entries: int = max_entries
+        self._entries: "OrderedDict[Tuple[int, int, int], Checkpoint]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, device: int, inode: int, partition_in_bytes: int) -> Optional[Checkpoint]:
+        key: Tuple[int, int, int] = (device, inode, partition_in_bytes)
+        with self._lock:
+            checkpoint: Optional[Checkpoint] = self._entries.get(key)
+            if checkpoint is not None:
+                self._entries.move_to_end(key)
+                return checkpoint.copy()
+
+        if self.cache is None or partition_in_bytes == WHOLE_FILE:
+            return None
+        row = self.cache.get_checkpoint(device, inode, partition_in_bytes)
+        if row is None:
+            return None
+
+        length, mtime_ns, ctime_ns, fingerprint, digests = row
+        digest = PartDigest(partition_in_bytes)
+        digest.digests += digests
+        return Checkpoint(length, mtime_ns, ctime_ns, fingerprint, digest)
+
+    def put(self, device: int, inode: int, partition_in_bytes: int, checkpoint: Checkpoint) -> None:
+        key: Tuple[int, int, int] = (device, inode, partition_in_bytes)
+        with self._lock:
+            self._entries[key] = checkpoint.copy()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        if self.cache is not None and partition_in_bytes != WHOLE_FILE and checkpoint.digest.count:
+            self.cache.put_checkpoint(
+                device,
+                inode,
+                partition_in_bytes,
+                checkpoint.length,
+                checkpoint.mtime_ns,
+                checkpoint.ctime_ns,
+                checkpoint.fingerprint,
+                checkpoint.digest.digests,
+            )
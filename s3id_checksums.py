@@ -0,0 +1,151 @@
+import base64
+import copy
+import hashlib
+import logging
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from constants import ChecksumAlgorithm, DASH, PACKAGE_NAME
+from s3id_digest import PartDigest
+from s3id_planner import discover_partitions, feasible_partitions, part_count
+
+log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
+
+
+class Crc32:
+    """
+    hashlib style wrapper of zlib.crc32, the digest is the 4 byte big-endian checksum as S3 encodes it
+    """
+
+    digest_size = 4
+
+    def __init__(self) -> None:
+        self._value: int = 0
+
+    def update(self, data) -> None:
+        self._value = zlib.crc32(data, self._value)
+
+    def digest(self) -> bytes:
+        return self._value.to_bytes(self.digest_size, "big")
+
+    def copy(self) -> "Crc32":
+        return copy.copy(self)
+
+
+class Crc32c(Crc32):
+    """
+    hashlib style wrapper of CRC32C (Castagnoli).  Requires the 'crc32c' package.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        try:
+            import crc32c  # pylint: disable=import-outside-toplevel
+        except ImportError as e:
+            raise ImportError("CRC32C checksums require 'crc32c' to be installed") from e
+        self._crc32c = crc32c.crc32c
+
+    def update(self, data) -> None:
+        self._value = self._crc32c(data, self._value)
+
+
+HASHES: Dict[str, Callable[[], Any]] = {
+    ChecksumAlgorithm.CRC32: Crc32,
+    ChecksumAlgorithm.CRC32C: Crc32c,
+    ChecksumAlgorithm.SHA1: hashlib.sha1,
+    ChecksumAlgorithm.SHA256: hashlib.sha256,
+}
+
+
+def new_hash(algorithm: str) -> Callable[[], Any]:
+    """
+    Return the constructor of a running hash for 'algorithm'
+    """
+    if algorithm not in ChecksumAlgorithm.ALL:
+        raise ValueError(
+            f"Invalid checksum algorithm '{algorithm}'. Must be one of: {sorted(ChecksumAlgorithm.ALL)}"
+        )
+    return HASHES[algorithm]
+
+
+def encode(digest: bytes) -> str:
+    return base64.b64encode(digest).decode("ascii")
+
+
+def full_object(digest: PartDigest) -> str:
+    """
+    Format a digest fed with a partition at least as large as the file as a full-object checksum
+    """
+    return encode(bytes(digest.digests[: digest.digest_size]) or digest.new_hash().digest())
+
+
+def composite(digest: PartDigest) -> str:
+    """
+    Format finalized parts as a composite checksum, as S3 reports for multipart uploads:
+      "{base64(hash(checksum1 + checksum2 + ...))}-{number of parts}"
+    """
+    combined = digest.new_hash()
+    combined.update(bytes(digest.digests))
+    return f"{encode(combined.digest())}{DASH}{digest.count}"
+
+
+def part_checksums(digest: PartDigest) -> List[str]:
+    size: int = digest.digest_size
+    return [encode(bytes(digest.digests[i : i + size])) for i in range(0, len(digest.digests), size)]
+
+
+class ChecksumVerifier:
+    """
+    Part digests to feed alongside the ETag for a set of expected S3 additional checksums
+    ({algorithm: value}), so every checksum is verified from the same read of the file.  A
+    composite value ("<base64>-N") is tried with every partition size splitting the file into
+    N parts, any other value is compared with the checksum of the whole file.
+    """
+
+    def __init__(
+        self,
+        expected: Dict[str, str],
+        file_size: int,
+        partition_set_in_bytes: Iterable[int],
+        discover: bool = False,
+    ) -> None:
+        self.expected: Dict[str, str] = {}
+        self.digests: Dict[str, List[PartDigest]] = {}
+        for algorithm, value in expected.items():
+            hash_type = new_hash(algorithm)
+            if not value:
+                raise ValueError(f"Checksum for '{algorithm}' cannot be blank.")
+
+            self.expected[algorithm] = value.strip('"')
+            expected_parts: Optional[int] = part_count(self.expected[algorithm])
+            if expected_parts is None:
+                partitions: Set[int] = {max(file_size, 1)}
+            else:
+                partitions = feasible_partitions(file_size, expected_parts, partition_set_in_bytes)
+                if discover:
+                    partitions |= discover_partitions(file_size, expected_parts)
+            self.digests[algorithm] = [PartDigest(p, hash_type) for p in sorted(partitions)]
+
+    def part_digests(self) -> List[PartDigest]:
+        """
+        Every part digest to feed, for all algorithms
+        """
+        return [digest for digests in self.digests.values() for digest in digests]
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return {algorithm: {"match": bool, ...}} once the part digests are finalized.  A matching
+        composite checksum also reports the partition size that produced it.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        for algorithm, value in self.expected.items():
+            results[algorithm] = {"match": False}
+            for digest in self.digests[algorithm]:
+                checksum: str = full_object(digest) if DASH not in value else composite(digest)
+                log.debug("Calculated %s checksum: %s", algorithm, checksum)
+                if checksum == value:
+                    results[algorithm] = {"match": True, "checksum": checksum}
+                    if DASH in value:
+                        results[algorithm]["partition_in_bytes"] = digest.partition_in_bytes
+                    break
+        return results
@@ -0,0 +1,221 @@
+"""
+Bulk verify local files against S3 ETags.
+
+The manifest (a file, or '-' for stdin) lists one entry per line, as NDJSON objects or CSV with
+a header row, with the fields:
+- etag (required)
+- path (required)
+- size (optional): expected size in bytes, entries with another local size are mismatches
+  without being hashed
+- partition_sizes (optional): partition sizes in bytes for this entry, a JSON list or a CSV
+  field separated by ';'
+
+One NDJSON result is written to stdout per entry as it completes (a malformed NDJSON line gets
+an "error" result with its line number), and throughput to stderr.
+The exit status is 1 if any entry did not match.
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from collections import deque
+from itertools import chain
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from constants import Buffer, EtagChunkSizeSet, Executor, IOBackend
+from s3id import S3ID
+from s3id_result import S3IDResultError
+
+Entry = Dict[str, Any]
+
+
+def _partition_sizes(value: Any) -> Optional[set]:
+    if value in (None, "", []):
+        return None
+    if isinstance(value, str):
+        value = [v for v in value.replace(",", ";").split(";") if v.strip()]
+    return {int(v) for v in value}
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number: int = int(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"invalid value '{value}', must be a positive integer")
+    return number
+
+
+def read_manifest(stream: TextIO) -> Iterator[Entry]:
+    """
+    Yield manifest entries from NDJSON or CSV (with a header row), detected from the first line.
+    An NDJSON line that is not a JSON object yields an entry with only an "error".
+    """
+    first: str = stream.readline()
+    skipped: int = 0
+    while first and not first.strip():
+        first = stream.readline()
+        skipped += 1
+    if not first:
+        return
+
+    lines: Iterator[str] = chain([first], stream)
+    if first.lstrip().startswith("{"):
+        for number, line in enumerate(lines, skipped + 1):
+            if not line.strip():
+                continue
+            try:
+                entry: Any = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"error": f"{type(e).__name__}: {e} (line {number})"}
+                continue
+            if not isinstance(entry, dict):
+                yield {"error": f"ValueError: expected a JSON object (line {number})"}
+                continue
+            yield entry
+    else:
+        yield from csv.DictReader(lines)
+
+
+class Throughput:
+    """
+    Running count of files and bytes verified, reported to stderr
+    """
+
+    def __init__(self, stream: TextIO, interval_in_seconds: float) -> None:
+        self.stream: TextIO = stream
+        self.interval_in_seconds: float = interval_in_seconds
+        self.start: float = time.monotonic()
+        self.last_report: float = self.start
+        self.files: int = 0
+        self.bytes: int = 0
+        self.mismatches: int = 0
+
+    def add(self, size: int, match: bool) -> None:
+        self.files += 1
+        self.bytes += size
+        self.mismatches += 0 if match else 1
+        now: float = time.monotonic()
+        if self.interval_in_seconds and now - self.last_report >= self.interval_in_seconds:
+            self.last_report = now
+            self.report()
+
+    def report(self) -> None:
+        elapsed: float = max(time.monotonic() - self.start, 1e-9)
+        self.stream.write(
+            f"{self.files} file(s), {self.mismatches} mismatch(es) in {elapsed:.1f}s: "
+            f"{self.files / elapsed:.1f} files/s, {self.bytes / elapsed / 1e6:.1f} MB/s\n"
+        )
+        self.stream.flush()
+
+
+def verify(
+    entries: Iterator[Entry], args: argparse.Namespace
+) -> Iterator[Tuple[Entry, Dict[str, Any], int]]:
+    """
+    Yield (entry, result, local size) as entries complete.  Entries whose expected size differs
+    from the local size, or that cannot be read from the manifest, are answered without hashing,
+    ahead of the next entry that completes.
+    """
+    early: Deque[Tuple[Entry, Dict[str, Any], int]] = deque()
+    pending: Dict[Tuple[Any, Path], Entry] = {}
+
+    def items() -> Iterator[Tuple[Any, Path, Optional[set]]]:
+        for entry in entries:
+            if "error" in entry:
+                early.append((entry, {"match": False, "error": entry["error"]}, 0))
+                continue
+            try:
+                path = Path(entry["path"])
+                partitions = _partition_sizes(entry.get("partition_sizes"))
+                expected = entry.get("size")
+                if expected not in (None, "") and path.is_file() and path.stat().st_size != int(expected):
+                    early.append((entry, {"match": False, "reason": "size"}, 0))
+                    continue
+            except (KeyError, TypeError, ValueError) as e:
+                early.append((entry, S3IDResultError(e).summary(), 0))
+                continue
+            pending[(entry.get("etag"), path)] = entry
+            yield entry.get("etag"), path, partitions
+
+    results = S3ID.unpack_many(
+        items(),
+        concurrency=args.workers,
+        partition_set_in_bytes=args.partition_sizes,
+        discover=args.discover,
+        buffer_in_bytes=args.buffer_size,
+        io_backend=args.io_backend,
+    )
+    for etag, path, result in results:
+        while early:
+            yield early.popleft()
+        entry = pending.pop((etag, path), {"etag": etag, "path": str(path)})
+        try:
+            size = path.stat().st_size
+        except OSError:
+            size = 0
+        yield entry, result, size
+    while early:
+        yield early.popleft()
+
+
+def parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="s3id", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("manifest", nargs="?", default="-", help="manifest file, '-' for stdin")
+    parser.add_argument(
+        "-w", "--workers", type=_positive_int, default=Executor.DEFAULT_CONCURRENCY
+    )
+    parser.add_argument(
+        "-p",
+        "--partition-sizes",
+        type=_partition_sizes,
+        default=EtagChunkSizeSet.AWS_S3,
+        help="default partition sizes in bytes, separated by ';' or ','",
+    )
+    parser.add_argument(
+        "--discover", action="store_true", help="also try every plausible MiB-aligned size"
+    )
+    parser.add_argument("--buffer-size", type=_positive_int, default=Buffer.DEFAULT_SIZE)
+    parser.add_argument("--io-backend", choices=sorted(IOBackend.ALL), default=IOBackend.DEFAULT)
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=5.0,
+        help="seconds between throughput reports on stderr, 0 to report only at the end",
+    )
+    return parser.parse_args(argv)
+
+
+def main(
+    argv: Optional[List[str]] = None,
+    stdout: Optional[TextIO] = None,
+    stderr: Optional[TextIO] = None,
+) -> int:
+    args = parse_args(argv)
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    throughput = Throughput(stderr, args.progress_interval)
+
+    if args.manifest == "-":
+        manifest: TextIO = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    else:
+        manifest = open(args.manifest, encoding="utf-8", newline="")
+
+    with manifest:
+        for entry, result, size in verify(read_manifest(manifest), args):
+            output: Dict[str, Any] = {"etag": entry.get("etag"), "path": entry.get("path"), **result}
+            stdout.write(json.dumps(output) + "\n")
+            throughput.add(size, result["match"])
+
+    throughput.report()
+    return 1 if throughput.mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+from functools import lru_cache
+from hashlib import md5
+from typing import Any, Callable, Optional
+
+DIGEST_SIZE = md5().digest_size
+
+# Shared source of zeros for the holes of sparse files, never written to
+ZERO_BUFFER_SIZE = 1024 * 1024
+ZEROS = memoryview(bytes(ZERO_BUFFER_SIZE))
+
+
+class ZeroRun:
+    """
+    A run of 'length' zero bytes (ex: a hole of a sparse file) fed in place of a read chunk
+    """
+
+    __slots__ = ("length",)
+
+    def __init__(self, length: int) -> None:
+        self.length: int = length
+
+    def __len__(self) -> int:
+        return self.length
+
+
+def update_zeros(digest: Any, length: int) -> None:
+    """
+    Feed 'length' zero bytes into 'digest', through 'update_zeros' when it has one (ex: a
+    PartDigest) or from the shared zero buffer
+    """
+    zeros: Optional[Callable[[int], None]] = getattr(digest, "update_zeros", None)
+    if zeros is not None:
+        zeros(length)
+        return
+    while length > 0:
+        take: int = min(length, ZERO_BUFFER_SIZE)
+        digest.update(ZEROS[:take])
+        length -= take
+
+
+@lru_cache(maxsize=64)
+def zero_part(new_hash: Callable[[], Any], partition_in_bytes: int) -> Any:
+    """
+    The running state of a part of 'partition_in_bytes' zeros, hashed once per process.  Copy
+    it before feeding it.
+    """
+    state = new_hash()
+    update_zeros(state, partition_in_bytes)
+    return state
+
+
+class PartDigest:
+    """
+    Running MD5 state for a single partition size.  Data is fed in arbitrarily sized
+    slices and split on partition boundaries, so several partition sizes can share
+    the same read buffer.  Only the 16 byte digest of each completed part is kept.
+    Another hash (ex: SHA-256, CRC32) can be used per part by passing its constructor.
+    """
+
+    def __init__(self, partition_in_bytes: int, new_hash: Callable[[], Any] = md5) -> None:
+        if not isinstance(partition_in_bytes, int) or partition_in_bytes <= 0:
+            raise ValueError("'partition_in_bytes' must be an integer greater than 0")
+
+        self.partition_in_bytes: int = partition_in_bytes
+        self.new_hash: Callable[[], Any] = new_hash
+        self.digest_size: int = new_hash().digest_size
+        self.digests: bytearray = bytearray()
+        self._current = new_hash()
+        self._filled: int = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.digests) // self.digest_size
+
+    @property
+    def position(self) -> int:
+        """
+        Number of bytes fed so far (before 'finalize')
+        """
+        return self.count * self.partition_in_bytes + self._filled
+
+    def copy(self, partition_in_bytes: Optional[int] = None) -> "PartDigest":
+        """
+        Return an independent copy, running state of the trailing part included, that can keep
+        being fed.  While no part is complete, the copy may use a larger 'partition_in_bytes'
+        (ex: to keep hashing a file that grew as a single part).
+        """
+        partition_in_bytes = partition_in_bytes or self.partition_in_bytes
+        if partition_in_bytes != self.partition_in_bytes and (
+            self.count or partition_in_bytes < self._filled
+        ):
+            raise ValueError("'partition_in_bytes' cannot change once a part is complete")
+
+        clone = PartDigest(partition_in_bytes, self.new_hash)
+        clone.digests += self.digests
+        clone._current = self._current.copy()
+        clone._filled = self._filled
+        return clone
+
+    def update(self, data) -> None:
+        """
+        Feed 'data' (bytes or memoryview) into the running part, closing parts on
+        every partition boundary crossed.
+        """
+        view = memoryview(data)
+        length: int = len(view)
+        position: int = 0
+        while position < length:
+            # A full part is only closed once more data arrives, so the running state of a
+            # part ending on the last byte fed can still be copied (see 'copy')
+            if self._filled == self.partition_in_bytes:
+                self.digests += self._current.digest()
+                self._current = self.new_hash()
+                self._filled = 0
+            take: int = min(self.partition_in_bytes - self._filled, length - position)
+            self._current.update(view[position : position + take])
+            self._filled += take
+            position += take
+
+    def update_zeros(self, length: int) -> None:
+        """
+        Same as 'update' with 'length' zero bytes.  A part made only of zeros takes the
+        memoized state of an all-zero part instead of being hashed.
+        """
+        while length > 0:
+            if self._filled == self.partition_in_bytes:
+                self.digests += self._current.digest()
+                self._current = self.new_hash()
+                self._filled = 0
+            if not self._filled and length >= self.partition_in_bytes:
+                self._current = zero_part(self.new_hash, self.partition_in_bytes).copy()
+                self._filled = self.partition_in_bytes
+                length -= self.partition_in_bytes
+                continue
+            take: int = min(self.partition_in_bytes - self._filled, length)
+            update_zeros(self._current, take)
+            self._filled += take
+            length -= take
+
+    def finalize(self) -> "PartDigest":
+        """
+        Close the trailing partial part (if any)
+        """
+        if self._filled:
+            self.digests += self._current.digest()
+            self._current = self.new_hash()
+            self._filled = 0
+        return self
+
+    def signature(self) -> str:
+        """
+        Format the finalized parts as a multi-part ETag:
+          "{md5(digest1 + digest2 + ...)}-{number of parts}"
+        """
+        return f'"{md5(self.digests).hexdigest()}-{self.count}"'
@@ -0,0 +1,207 @@
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from os.path import commonprefix
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from constants import Executor, PACKAGE_NAME
+from s3id import S3ID
+
+log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
+
+# Objects returned by one ListObjectsV2 page at most
+LIST_PAGE_SIZE = 1000
+
+
+class S3Object:
+    """
+    ETag and size of an S3 object, or the error that prevented fetching them
+    """
+
+    __slots__ = ("bucket", "key", "etag", "size", "error")
+
+    def __init__(
+        self,
+        bucket: str,
+        key: str,
+        etag: Optional[str],
+        size: Optional[int],
+        error: Optional[str] = None,
+    ) -> None:
+        self.bucket: str = bucket
+        self.key: str = key
+        self.etag: Optional[str] = etag
+        self.size: Optional[int] = size
+        self.error: Optional[str] = error
+
+    def __repr__(self) -> str:
+        fields = (self.bucket, self.key, self.etag, self.size, self.error)
+        return f"S3Object{fields!r}"
+
+
+def make_client(
+    concurrency: int = Executor.DEFAULT_CONCURRENCY,
+    endpoint_url: Optional[str] = None,
+    **options: Any,
+) -> Any:
+    """
+    Create a boto3 S3 client with a connection pool large enough for 'concurrency' requests in
+    flight.  'endpoint_url' points it at any S3-compatible endpoint (ex: a local moto server).
+    Requires boto3.
+    """
+    try:
+        import boto3  # pylint: disable=import-outside-toplevel
+        from botocore.config import Config  # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise ImportError(
+            "Fetching ETags from S3 requires 'boto3' to be installed (pip install s3id[s3])"
+        ) from e
+
+    config = Config(max_pool_connections=concurrency, retries={"mode": "adaptive"})
+    return boto3.session.Session().client("s3", endpoint_url=endpoint_url, config=config, **options)
+
+
+class EtagFetcher:
+    """
+    Fetch the ETags and sizes of S3 objects with as few requests as possible: ListObjectsV2
+    pages (up to 1000 objects per request) for a prefix or for keys close together, and
+    concurrent HeadObject requests over one pooled client for the rest.  Pass a boto3 S3
+    'client', or keyword arguments for 'make_client' (ex: endpoint_url, region_name).
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        concurrency: int = Executor.DEFAULT_CONCURRENCY,
+        **client_options: Any,
+    ) -> None:
+        if not isinstance(concurrency, int) or concurrency <= 0:
+            raise ValueError(
+                f"Invalid concurrency parameter '{concurrency}'. Must be a positive integer."
+            )
+
+        self.concurrency: int = concurrency
+        self.client: Any = client or make_client(concurrency, **client_options)
+        self.requests: Dict[str, int] = {"list": 0, "head": 0}
+
+    def list(self, bucket: str, prefix: str = "", start_after: str = "") -> Iterator[S3Object]:
+        """
+        Yield every object under 'prefix', in key order, one ListObjectsV2 page at a time
+        """
+        for page in self._pages(bucket, prefix, start_after):
+            yield from page
+
+    def _pages(self, bucket: str, prefix: str, start_after: str) -> Iterator[List[S3Object]]:
+        pages = self.client.get_paginator("list_objects_v2").paginate(
+            Bucket=bucket,
+            Prefix=prefix,
+            StartAfter=start_after,
+            PaginationConfig={"PageSize": LIST_PAGE_SIZE},
+        )
+        for page in pages:
+            self.requests["list"] += 1
+            yield [
+                S3Object(bucket, item["Key"], item["ETag"], item["Size"])
+                for item in page.get("Contents", ())
+            ]
+
+    def head(self, bucket: str, keys: Iterable[str]) -> Iterator[S3Object]:
+        """
+        Yield objects as their HeadObject requests complete, with at most 2 * 'concurrency'
+        requests queued.  A failed request yields an S3Object with its error.
+        """
+
+        def head_object(key: str) -> S3Object:
+            response: Dict[str, Any] = self.client.head_object(Bucket=bucket, Key=key)
+            return S3Object(bucket, key, response["ETag"], response["ContentLength"])
+
+        iterator: Iterator[str] = iter(keys)
+        pending: Dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            try:
+                while True:
+                    for key in islice(iterator, 2 * self.concurrency - len(pending)):
+                        self.requests["head"] += 1
+                        pending[pool.submit(head_object, key)] = key
+                    if not pending:
+                        break
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        key = pending.pop(future)
+                        try:
+                            yield future.result()
+                        except Exception as e:  # pylint: disable=broad-except
+                            yield S3Object(bucket, key, None, None, f"{type(e).__name__}: {e}")
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def fetch(
+        self, bucket: str, keys: Optional[Iterable[str]] = None, prefix: str = ""
+    ) -> Iterator[S3Object]:
+        """
+        Yield the objects of 'keys', or every object under 'prefix' if no keys are given.  Keys
+        are first looked up by listing their common prefix, page by page until a page holds
+        none of them (the keys are too sparse for listing to pay off), then the remaining keys
+        are fetched with HeadObject.
+        """
+        if keys is None:
+            yield from self.list(bucket, prefix)
+            return
+
+        missing: Set[str] = set(keys)
+        if len(missing) > 1:
+            first, last = min(missing), max(missing)
+            pages: int = self.requests["list"]
+            for page in self._pages(bucket, commonprefix([first, last]), first[:-1]):
+                hits: List[S3Object] = [item for item in page if item.key in missing]
+                for item in hits:
+                    missing.discard(item.key)
+                    yield item
+                if not hits or not missing or not page or page[-1].key >= last:
+                    break
+            log.debug(
+                "Listed %s page(s), %s key(s) left", self.requests["list"] - pages, len(missing)
+            )
+
+        yield from self.head(bucket, sorted(missing))
+
+    def verify(
+        self,
+        bucket: str,
+        root: Path,
+        keys: Optional[Iterable[str]] = None,
+        prefix: str = "",
+        **options: Any,
+    ) -> Iterator[Tuple[S3Object, Path, Dict[str, Any]]]:
+        """
+        Fetch objects (see 'fetch') and verify each against the local file at 'root' / (key
+        without 'prefix'), yielding (object, local path, result) as verifications complete.
+        Objects whose size differs from the local file are mismatches without being hashed,
+        yielded ahead of the next verification that completes.  Remaining keyword arguments are
+        passed to 'S3ID.unpack_many' (ex: concurrency, cache).
+        """
+        early: Deque[Tuple[S3Object, Path, Dict[str, Any]]] = deque()
+        pending: Dict[Tuple[str, Path], S3Object] = {}
+
+        def items() -> Iterator[Tuple[str, Path]]:
+            for item in self.fetch(bucket, keys, prefix):
+                relative: str = item.key[len(prefix):] if item.key.startswith(prefix) else item.key
+                path: Path = Path(root) / relative
+                if item.error is not None:
+                    early.append((item, path, {"match": False, "error": item.error}))
+                elif path.is_file() and path.stat().st_size != item.size:
+                    early.append((item, path, {"match": False, "reason": "size"}))
+                else:
+                    pending[(item.etag, path)] = item
+                    yield item.etag, path
+
+        for etag, path, result in S3ID.unpack_many(items(), **options):
+            while early:
+                yield early.popleft()
+            yield pending.pop((etag, path)), path, result
+        while early:
+            yield early.popleft()
@@ -0,0 +1,186 @@
+import csv
+import json
+import logging
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, DefaultDict, Dict, Iterable, Iterator, List, Set, TextIO, Tuple
+from urllib.parse import unquote_plus
+
+from calculator import Calculator
+from constants import EtagChunkSizeSet, PACKAGE_NAME, Strategy
+
+log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
+
+# Column order of an S3 Inventory CSV report with the ETag field enabled
+INVENTORY_FIELDS = ("bucket", "key", "size", "etag")
+
+
+class Reconciliation(object):
+    """
+    Status of an inventory row after a join against an EtagIndex
+    - MATCHED --> a local file with the same size and ETag exists at the key, or elsewhere when
+      there is no local file at the key
+    - DIVERGENT --> a local file exists at the key, but with a different size or ETag
+    - MISSING --> no local file at the key, and no local file with the same content
+    """
+
+    MATCHED = "matched"
+    DIVERGENT = "divergent"
+    MISSING = "missing"
+
+
+def _normalize(etag: str) -> str:
+    return etag.replace('"', "").lower()
+
+
+class EtagIndex:
+    """
+    Reverse index from ETag to local file, built by walking a directory once.  For each file the
+    single-part ETag and the multi-part ETag of every partition size are computed from a single
+    read, so an inventory can be joined in one pass with dictionary lookups.
+    """
+
+    def __init__(self, root: Path, partition_set_in_bytes: Set[int] = EtagChunkSizeSet.AWS_S3) -> None:
+        self.root: Path = Path(root)
+        self.partition_set_in_bytes: Set[int] = set(partition_set_in_bytes)
+        # ETag -> relative paths, relative path -> (size, ETags), and the set of sizes on disk
+        self.etags: DefaultDict[str, List[str]] = defaultdict(list)
+        self.files: Dict[str, Tuple[int, Tuple[str, ...]]] = {}
+        self.sizes: Set[int] = set()
+
+    @classmethod
+    def build(
+        cls,
+        root: Path,
+        partition_set_in_bytes: Set[int] = EtagChunkSizeSet.AWS_S3,
+        **options: Any,
+    ) -> "EtagIndex":
+        """
+        Walk 'root' and index every regular file.  Files and directories that vanish or cannot
+        be read during the walk are logged and skipped.  Remaining keyword arguments are passed
+        to Calculator (ex: buffer_in_bytes, io_backend, cache).
+        """
+        index = cls(root, partition_set_in_bytes)
+        skipped: int = 0
+        for path in index._walk(index.root):
+            try:
+                calculator = Calculator(path, Strategy.MULTI_PART, **options)
+                single_part, multi_part = calculator.calculate_all(index.partition_set_in_bytes)
+            except (OSError, ValueError) as e:
+                # ValueError: the file is no longer a regular file
+                log.warning("Skipping '%s': %s", path, e)
+                skipped += 1
+                continue
+            index.add(
+                path.relative_to(index.root).as_posix(),
+                calculator.local_file_size,
+                [single_part, *multi_part.values()],
+            )
+        log.info("Indexed %d file(s) under '%s', skipped %d", len(index.files), index.root, skipped)
+        return index
+
+    @staticmethod
+    def _walk(directory: Path) -> Iterator[Path]:
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            log.warning("Skipping '%s': %s", directory, e)
+            return
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from EtagIndex._walk(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    yield Path(entry.path)
+
+    def add(self, relative_path: str, size: int, etags: Iterable[str]) -> None:
+        normalized: Tuple[str, ...] = tuple(sorted({_normalize(etag) for etag in etags}))
+        self.files[relative_path] = (size, normalized)
+        self.sizes.add(size)
+        for etag in normalized:
+            self.etags[etag].append(relative_path)
+
+    def lookup(self, etag: str, size: int) -> List[str]:
+        """
+        Return the relative paths of local files of 'size' bytes whose content has 'etag'
+        """
+        if size not in self.sizes:
+            return []
+        return [p for p in self.etags.get(_normalize(etag), ()) if self.files[p][0] == size]
+
+    def reconcile(
+        self, inventory: Iterable[Tuple[str, int, str]], prefix: str = ""
+    ) -> Iterator[Tuple[str, str, List[str]]]:
+        """
+        Join a stream of (key, size, etag) inventory rows against the index and yield
+        (status, key, local relative paths) for each row.  'prefix' is stripped from keys
+        to obtain the relative path a mirrored object is expected at.  A divergent key lists
+        the local file at the key first, then any local file with the content of the object.
+        """
+        for key, size, etag in inventory:
+            size = int(size)
+            relative_path: str = key[len(prefix):] if prefix and key.startswith(prefix) else key
+            local = self.files.get(relative_path)
+            if local is not None and local[0] == size and _normalize(etag) in local[1]:
+                yield Reconciliation.MATCHED, key, [relative_path]
+                continue
+
+            # The content may still exist locally under another name
+            elsewhere: List[str] = self.lookup(etag, size)
+            if local is not None:
+                yield Reconciliation.DIVERGENT, key, [relative_path, *elsewhere]
+            elif elsewhere:
+                yield Reconciliation.MATCHED, key, elsewhere
+            else:
+                yield Reconciliation.MISSING, key, []
+
+    def save(self, path: Path) -> None:
+        """
+        Persist the index as JSON lines: a {"root": ..., "partition_sizes": [...]} header, then
+        one [size, relative path, [etag, ...]] line per file.  JSON escaping keeps any file name
+        (tabs, newlines, undecodable bytes) on its own line.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            header = {"root": str(self.root), "partition_sizes": sorted(self.partition_set_in_bytes)}
+            f.write(json.dumps(header) + "\n")
+            for relative_path, (size, etags) in self.files.items():
+                f.write(json.dumps([size, relative_path, list(etags)]) + "\n")
+
+    @classmethod
+    def load(cls, path: Path) -> "EtagIndex":
+        with open(path, encoding="utf-8") as f:
+            header: Dict[str, Any] = json.loads(f.readline())
+            index = cls(Path(header["root"]), set(header["partition_sizes"]))
+            for line in f:
+                size, relative_path, etags = json.loads(line)
+                index.add(relative_path, size, etags)
+        return index
+
+
+def read_inventory_csv(
+    stream: TextIO, fields: Tuple[str, ...] = INVENTORY_FIELDS
+) -> Iterator[Tuple[str, int, str]]:
+    """
+    Stream (key, size, etag) rows from an S3 Inventory style CSV.  'fields' names each column
+    in order and must include "key", "size" and "etag".  Keys are URL decoded, as in S3 Inventory.
+    """
+    key_column, size_column, etag_column = (fields.index(name) for name in ("key", "size", "etag"))
+    for row in csv.reader(stream):
+        if not row or not row[size_column]:
+            continue
+        yield unquote_plus(row[key_column]), int(row[size_column]), row[etag_column]
+
+
+def read_inventory_parquet(path: Path) -> Iterator[Tuple[str, int, str]]:
+    """
+    Stream (key, size, etag) rows from an S3 Inventory Parquet file.  Requires pyarrow.
+    """
+    try:
+        import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise ImportError("Reading Parquet inventories requires 'pyarrow' to be installed") from e
+
+    for batch in pq.ParquetFile(path).iter_batches(columns=["key", "size", "e_tag"]):
+        columns = batch.to_pydict()
+        yield from zip(columns["key"], columns["size"], columns["e_tag"])
@@ -0,0 +1,155 @@
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from comparator import match_results
+from constants import PACKAGE_NAME, Strategy
+from s3id_digest import DIGEST_SIZE, PartDigest
+from s3id_planner import parts_for
+
+log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
+
+
+class PartManifest:
+    """
+    MD5 digests of the parts [first_part, last_part) of a file of 'file_size' bytes split by
+    'partition_in_bytes'.  Small and serializable, so the parts of one object can be hashed on
+    many hosts (or processes) and merged into its multi-part ETag (see 'merge_manifests').
+    'inode' and 'mtime_ns' identify the file that was hashed, so manifests of different files
+    (or of a file rewritten between shards) are not merged.  The device is left out: it differs
+    between hosts mounting the same shared storage.
+    """
+
+    __slots__ = (
+        "partition_in_bytes",
+        "file_size",
+        "first_part",
+        "last_part",
+        "digests",
+        "inode",
+        "mtime_ns",
+    )
+
+    def __init__(
+        self,
+        partition_in_bytes: int,
+        file_size: int,
+        first_part: int,
+        last_part: int,
+        digests: bytes,
+        inode: Optional[int] = None,
+        mtime_ns: Optional[int] = None,
+    ) -> None:
+        if not isinstance(partition_in_bytes, int) or partition_in_bytes <= 0:
+            raise ValueError("'partition_in_bytes' must be an integer greater than 0")
+        if not 0 <= first_part < last_part <= parts_for(file_size, partition_in_bytes):
+            raise ValueError(
+                f"Invalid part range [{first_part}, {last_part}). Must be within "
+                f"[0, {parts_for(file_size, partition_in_bytes)}) for a file of {file_size} bytes."
+            )
+        if len(digests) != (last_part - first_part) * DIGEST_SIZE:
+            raise ValueError(
+                f"Expected {last_part - first_part} part digest(s), got {len(digests) / DIGEST_SIZE}"
+            )
+
+        self.partition_in_bytes: int = partition_in_bytes
+        self.file_size: int = file_size
+        self.first_part: int = first_part
+        self.last_part: int = last_part
+        self.digests: bytes = bytes(digests)
+        self.inode: Optional[int] = inode
+        self.mtime_ns: Optional[int] = mtime_ns
+
+    def to_dict(self) -> Dict[str, Union[int, str]]:
+        return {
+            "partition_in_bytes": self.partition_in_bytes,
+            "file_size": self.file_size,
+            "first_part": self.first_part,
+            "last_part": self.last_part,
+            "digests": self.digests.hex(),
+            "inode": self.inode,
+            "mtime_ns": self.mtime_ns,
+        }
+
+    @classmethod
+    def from_dict(cls, value: Dict[str, Any]) -> "PartManifest":
+        return cls(
+            int(value["partition_in_bytes"]),
+            int(value["file_size"]),
+            int(value["first_part"]),
+            int(value["last_part"]),
+            bytes.fromhex(value["digests"]),
+            value.get("inode"),
+            value.get("mtime_ns"),
+        )
+
+    def dumps(self) -> str:
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def loads(cls, value: Union[str, bytes]) -> "PartManifest":
+        return cls.from_dict(json.loads(value))
+
+
+def part_ranges(file_size: int, partition_in_bytes: int, shards: int) -> List[range]:
+    """
+    Split the parts of a file into at most 'shards' contiguous [first_part, last_part) ranges
+    of about the same number of parts, one per worker
+    """
+    if not isinstance(shards, int) or shards <= 0:
+        raise ValueError(f"Invalid shards parameter '{shards}'. Must be a positive integer.")
+
+    parts: int = parts_for(file_size, partition_in_bytes)
+    per_shard: int = -(-parts // shards) if parts else 1
+    return [range(first, min(first + per_shard, parts)) for first in range(0, parts, per_shard)]
+
+
+def merge_manifests(manifests: Iterable[PartManifest]) -> PartDigest:
+    """
+    Combine manifests of one file and partition size, in any order, into the finalized part
+    digests of the whole file.  Raises ValueError unless they cover every part exactly once, or
+    if their file size, inode or mtime differ.
+    """
+    ordered: List[PartManifest] = sorted(manifests, key=lambda m: m.first_part)
+    if not ordered:
+        raise ValueError("'manifests' cannot be empty.")
+
+    first: PartManifest = ordered[0]
+    merged = PartDigest(first.partition_in_bytes)
+    expected_part: int = 0
+    for manifest in ordered:
+        same_file: bool = (manifest.file_size, manifest.inode, manifest.mtime_ns) == (
+            first.file_size,
+            first.inode,
+            first.mtime_ns,
+        )
+        if not same_file or manifest.partition_in_bytes != first.partition_in_bytes:
+            raise ValueError("Cannot merge manifests of different files or partition sizes")
+        if manifest.first_part != expected_part:
+            raise ValueError(
+                f"Manifests do not cover part {expected_part}, next range starts at {manifest.first_part}"
+            )
+        merged.digests += manifest.digests
+        expected_part = manifest.last_part
+
+    total: int = parts_for(first.file_size, first.partition_in_bytes)
+    if expected_part != total:
+        raise ValueError(f"Manifests cover {expected_part} of {total} part(s)")
+    return merged
+
+
+def compare_manifests(etag: str, manifests: Iterable[PartManifest]) -> Dict[str, Union[int, str]]:
+    """
+    Merge 'manifests' and compare the multi-part ETag with 'etag', with the same result as
+    'S3ID.unpack'
+    """
+    if not etag:
+        raise ValueError("'etag' cannot be blank.")
+
+    merged: PartDigest = merge_manifests(manifests)
+    signature: str = merged.signature()
+    log.debug("Merged %s part(s) into signature: %s", merged.count, signature)
+    return match_results(
+        etag,
+        {merged.partition_in_bytes: {"signature": signature, "strategy": Strategy.MULTI_PART}},
+    )
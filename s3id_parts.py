@@ -0,0 +1,110 @@
+import base64
+from hashlib import md5
+from typing import Any, Dict, Iterable, List, Optional
+
+from s3id_checksums import new_hash
+from constants import ChecksumAlgorithm
+
+# Key of the expected MD5 (hex, as in a part ETag) of a part, next to the ChecksumAlgorithm keys
+PART_MD5 = "md5"
+
+# GetObjectAttributes part fields of each additional checksum
+OBJECT_ATTRIBUTES_CHECKSUMS = {
+    "ChecksumCRC32": ChecksumAlgorithm.CRC32,
+    "ChecksumCRC32C": ChecksumAlgorithm.CRC32C,
+    "ChecksumSHA1": ChecksumAlgorithm.SHA1,
+    "ChecksumSHA256": ChecksumAlgorithm.SHA256,
+}
+
+
+class ExpectedPart:
+    """
+    Size, position and expected checksums of one part of a multi-part upload
+    """
+
+    __slots__ = ("part_number", "offset", "size", "checksums")
+
+    def __init__(self, part_number: int, offset: int, size: int, checksums: Dict[str, str]) -> None:
+        self.part_number: int = part_number
+        self.offset: int = offset
+        self.size: int = size
+        # {PART_MD5 or ChecksumAlgorithm: expected value}
+        self.checksums: Dict[str, str] = checksums
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+    def new_hashes(self) -> Dict[str, Any]:
+        """
+        A running MD5 (for the ETag) and a running hash of every other expected checksum
+        """
+        hashes: Dict[str, Any] = {PART_MD5: md5()}
+        for algorithm in self.checksums:
+            if algorithm != PART_MD5:
+                hashes[algorithm] = new_hash(algorithm)()
+        return hashes
+
+    def matches(self, hashes: Dict[str, Any]) -> Optional[bool]:
+        """
+        Compare the finished 'hashes' of the local part with every expected checksum, None if
+        there is nothing to compare with
+        """
+        if not self.checksums:
+            return None
+        for algorithm, expected in self.checksums.items():
+            digest: bytes = hashes[algorithm].digest()
+            if algorithm == PART_MD5:
+                actual: str = digest.hex()
+            else:
+                actual = base64.b64encode(digest).decode("ascii")
+            if actual != expected:
+                return False
+        return True
+
+
+def expected_parts(parts: Iterable[Dict[str, Any]]) -> List[ExpectedPart]:
+    """
+    Validate per-part expectations, in part order, each a dict with a "size" in bytes, an
+    optional "part_number" (default: position + 1), and any of an "md5" (hex, as in a part ETag)
+    and "crc32", "crc32c", "sha1", "sha256" (base64) checksums.  Parts may have any size.
+    """
+    expected: List[ExpectedPart] = []
+    offset: int = 0
+    for index, part in enumerate(parts):
+        size = part.get("size")
+        if not isinstance(size, int) or size <= 0:
+            raise ValueError(
+                f"Invalid size for part {index + 1} '{size}'. Must be a positive integer."
+            )
+
+        checksums: Dict[str, str] = {}
+        for name, value in part.items():
+            if name in ("size", "part_number") or value in (None, ""):
+                continue
+            if name != PART_MD5 and name not in ChecksumAlgorithm.ALL:
+                raise ValueError(
+                    f"Invalid checksum '{name}' for part {index + 1}. Must be one of: "
+                    f"{sorted(ChecksumAlgorithm.ALL | {PART_MD5})}"
+                )
+            checksums[name] = value.strip('"').lower() if name == PART_MD5 else value
+
+        part_number: int = int(part.get("part_number", index + 1))
+        expected.append(ExpectedPart(part_number, offset, size, checksums))
+        offset += size
+    return expected
+
+
+def parts_from_object_attributes(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Convert a GetObjectAttributes response (with ObjectAttributes=["ObjectParts"]) into part
+    expectations.  S3 only returns the parts of objects uploaded with additional checksums.
+    """
+    parts: List[Dict[str, Any]] = []
+    for part in sorted(response["ObjectParts"]["Parts"], key=lambda p: p["PartNumber"]):
+        expected: Dict[str, Any] = {"part_number": part["PartNumber"], "size": part["Size"]}
+        for field, algorithm in OBJECT_ATTRIBUTES_CHECKSUMS.items():
+            if part.get(field):
+                expected[algorithm] = part[field]
+        parts.append(expected)
+    return parts
@@ -0,0 +1,86 @@
+import logging
+from typing import Iterable, Optional, Set
+
+from constants import DASH, PACKAGE_NAME, S3Limits, Units
+
+log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
+
+
+def part_count(etag: str) -> Optional[int]:
+    """
+    Return the number of parts encoded in a multi-part ETag (ex: "<hash>-<N>"), or None
+    for a single-part or unparsable ETag.
+    """
+    if not etag or DASH not in etag:
+        return None
+
+    suffix: str = etag.replace('"', "").rsplit(DASH, 1)[1]
+    if not suffix.isdigit():
+        return None
+    return int(suffix)
+
+
+def parts_for(file_size: int, partition_in_bytes: int) -> int:
+    """
+    Number of parts a file of 'file_size' bytes is split into with 'partition_in_bytes'
+    """
+    return -(-file_size // partition_in_bytes)
+
+
+def feasible_partitions(
+    file_size: int, expected_parts: int, partition_set_in_bytes: Iterable[int]
+) -> Set[int]:
+    """
+    Keep only the partition sizes that split 'file_size' into exactly 'expected_parts' parts.
+    Any other size cannot reproduce the ETag, so there is no reason to hash with it.
+    """
+    feasible: Set[int] = {
+        p for p in partition_set_in_bytes if parts_for(file_size, p) == expected_parts
+    }
+    log.debug("Pruned partition sizes from %s to %s", partition_set_in_bytes, feasible)
+    return feasible
+
+
+def partition_range(file_size: int, expected_parts: int) -> Optional[range]:
+    """
+    Return the inclusive bounds (as a range) of every partition size producing exactly
+    'expected_parts' parts for 'file_size' bytes, or None if no size can.
+    """
+    if expected_parts < 1 or file_size < 1:
+        return None
+
+    lowest: int = parts_for(file_size, expected_parts)
+    if expected_parts == 1:
+        highest: int = S3Limits.MAX_PART_SIZE
+    else:
+        # The first N-1 parts must leave at least one byte for the last part
+        highest = (file_size - 1) // (expected_parts - 1)
+
+    if lowest > highest:
+        return None
+    return range(lowest, highest + 1)
+
+
+def discover_partitions(
+    file_size: int, expected_parts: int, alignment: int = Units.ONE_MB
+) -> Set[int]:
+    """
+    List every 'alignment'-aligned partition size (MiB by default) that an uploader could
+    have used to produce 'expected_parts' parts, bounded by the S3 multi-part limits.
+    """
+    if expected_parts > S3Limits.MAX_PARTS:
+        return set()
+
+    bounds: Optional[range] = partition_range(file_size, expected_parts)
+    if bounds is None:
+        return set()
+
+    lowest: int = max(bounds.start, S3Limits.MIN_PART_SIZE if expected_parts > 1 else 1)
+    highest: int = min(bounds.stop - 1, S3Limits.MAX_PART_SIZE)
+    first: int = parts_for(lowest, alignment) * alignment
+
+    if expected_parts == 1:
+        # Every size >= the file size yields the same single part, one candidate is enough
+        return {first} if first <= highest else set()
+
+    return set(range(first, highest + 1, alignment))
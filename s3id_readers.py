@@ -0,0 +1,224 @@
+import errno
+import logging
+import mmap
+import os
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple, Type, Union
+
+from constants import IOBackend, PACKAGE_NAME
+from s3id_digest import ZeroRun
+
+log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
+
+
+class Reader:
+    """
+    Yield the bytes of [offset, offset + length) of a local file as a series of slices
+    no larger than 'buffer_in_bytes'.  A 'length' of None reads until the end of the file.
+    Slices are only valid until the next one is requested.
+    """
+
+    def __init__(self, local_file_path: Path, buffer_in_bytes: int) -> None:
+        self.local_file_path: Path = local_file_path
+        self.buffer_in_bytes: int = buffer_in_bytes
+        self.fd: int = -1
+        self._view: Optional[memoryview] = None
+
+    def __enter__(self) -> "Reader":
+        self.fd = os.open(self.local_file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def _buffer(self, length: Optional[int]) -> memoryview:
+        size: int = self.buffer_in_bytes if length is None else min(self.buffer_in_bytes, length)
+        size = max(size, 1)
+        # Reused by every call, ex: for each data extent of a sparse file
+        if self._view is None or len(self._view) < size:
+            self._view = memoryview(bytearray(size))
+        return self._view[:size]
+
+    def chunks(self, offset: int = 0, length: Optional[int] = None) -> Iterator[memoryview]:
+        raise NotImplementedError
+
+    def extents(self, offset: int, end: int) -> Iterator[Tuple[int, int, bool]]:
+        """
+        Split [offset, end) into (start, stop, is_data) extents with SEEK_DATA/SEEK_HOLE.  Where
+        the platform or filesystem does not support them, the whole range is data.
+        """
+        if not hasattr(os, "SEEK_DATA"):
+            yield offset, end, True
+            return
+
+        position: int = offset
+        while position < end:
+            try:
+                data: int = os.lseek(self.fd, position, os.SEEK_DATA)
+            except OSError as e:
+                if e.errno != errno.ENXIO:
+                    log.debug("SEEK_DATA failed on '%s': %s", self.local_file_path, e)
+                    yield position, end, True
+                    return
+                # No data past 'position', the rest is a hole
+                data = end
+            data = min(data, end)
+            if data > position:
+                yield position, data, False
+            if data >= end:
+                return
+            hole: int = min(os.lseek(self.fd, data, os.SEEK_HOLE), end)
+            yield data, hole, True
+            position = hole
+
+    def sparse_chunks(
+        self, offset: int = 0, length: Optional[int] = None
+    ) -> Iterator[Union[memoryview, ZeroRun]]:
+        """
+        Same as 'chunks', except that holes are not read: each one is yielded as a ZeroRun
+        """
+        file_size: int = os.fstat(self.fd).st_size
+        end: int = file_size if length is None else min(file_size, offset + length)
+        for start, stop, is_data in self.extents(offset, end):
+            if is_data:
+                yield from self.chunks(start, stop - start)
+            else:
+                yield ZeroRun(stop - start)
+
+
+class BufferedReader(Reader):
+    def chunks(self, offset: int = 0, length: Optional[int] = None) -> Iterator[memoryview]:
+        view: memoryview = self._buffer(length)
+        remaining: Optional[int] = length
+        with open(self.fd, "rb", buffering=0, closefd=False) as f:
+            f.seek(offset)
+            while remaining is None or remaining > 0:
+                target = view if remaining is None else view[: min(len(view), remaining)]
+                size: int = f.readinto(target)
+                if not size:
+                    break
+                if remaining is not None:
+                    remaining -= size
+                yield view[:size]
+
+
+class PreadReader(Reader):
+    def chunks(self, offset: int = 0, length: Optional[int] = None) -> Iterator[memoryview]:
+        view: memoryview = self._buffer(length)
+        end: Optional[int] = None if length is None else offset + length
+        position: int = offset
+        while end is None or position < end:
+            want: int = len(view) if end is None else min(len(view), end - position)
+            if hasattr(os, "preadv"):
+                size: int = os.preadv(self.fd, [view[:want]], position)
+            else:
+                data: bytes = os.pread(self.fd, want, position)
+                size = len(data)
+                view[:size] = data
+            if not size:
+                break
+            position += size
+            yield view[:size]
+
+
+class MmapReader(Reader):
+    """
+    Slices of one read-only mapping of the file, made on the first read and kept until the
+    reader is closed, so reading many ranges (ex: the parts or data extents of a file) maps it
+    once.  Bytes appended to the file after the mapping was made are not read.
+    """
+
+    def __init__(self, local_file_path: Path, buffer_in_bytes: int) -> None:
+        super().__init__(local_file_path, buffer_in_bytes)
+        self._mapping: Optional[mmap.mmap] = None
+        self._mapped: Optional[memoryview] = None
+
+    def close(self) -> None:
+        if self._mapping is not None:
+            self._mapped.release()
+            try:
+                self._mapping.close()
+            except BufferError:
+                # A chunk is still referenced, the mapping is unmapped once it is released
+                pass
+            self._mapping = self._mapped = None
+        super().close()
+
+    def _map(self) -> memoryview:
+        if self._mapped is None:
+            self._mapping = mmap.mmap(self.fd, 0, access=mmap.ACCESS_READ)
+            if hasattr(self._mapping, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                self._mapping.madvise(mmap.MADV_SEQUENTIAL)
+            self._mapped = memoryview(self._mapping)
+        return self._mapped
+
+    def chunks(self, offset: int = 0, length: Optional[int] = None) -> Iterator[memoryview]:
+        file_size: int = os.fstat(self.fd).st_size
+        end: int = file_size if length is None else min(file_size, offset + length)
+        if end <= offset:
+            return
+
+        view: memoryview = self._map()
+        for position in range(offset, min(end, len(view)), self.buffer_in_bytes):
+            chunk: memoryview = view[position : min(position + self.buffer_in_bytes, end)]
+            try:
+                yield chunk
+            finally:
+                chunk.release()
+
+
+class SequentialReader(BufferedReader):
+    """
+    Buffered reads that tell the kernel the access pattern: read ahead of the cursor
+    (SEQUENTIAL/WILLNEED) and drop what has been hashed (DONTNEED).  Falls back to plain
+    buffered reads where posix_fadvise is unavailable.
+    """
+
+    def _advise(self, offset: int, length: int, advice_name: str) -> None:
+        advice = getattr(os, advice_name, None)
+        if advice is None or not hasattr(os, "posix_fadvise"):
+            return
+        try:
+            os.posix_fadvise(self.fd, offset, length, advice)
+        except OSError as e:
+            log.debug("posix_fadvise(%s) failed on '%s': %s", advice_name, self.local_file_path, e)
+
+    def chunks(self, offset: int = 0, length: Optional[int] = None) -> Iterator[memoryview]:
+        self._advise(offset, length or 0, "POSIX_FADV_SEQUENTIAL")
+        self._advise(offset, self.buffer_in_bytes * 2, "POSIX_FADV_WILLNEED")
+        position: int = offset
+        for chunk in super().chunks(offset, length):
+            size: int = len(chunk)
+            self._advise(position + size, self.buffer_in_bytes * 2, "POSIX_FADV_WILLNEED")
+            yield chunk
+            self._advise(position, size, "POSIX_FADV_DONTNEED")
+            position += size
+
+
+def is_sparse(stat: os.stat_result) -> bool:
+    """
+    Whether a file has fewer blocks allocated than its size needs, so it may have holes
+    """
+    blocks: Optional[int] = getattr(stat, "st_blocks", None)
+    return blocks is not None and blocks * 512 < stat.st_size
+
+
+READERS: Dict[str, Type[Reader]] = {
+    IOBackend.BUFFERED: BufferedReader,
+    IOBackend.MMAP: MmapReader,
+    IOBackend.PREAD: PreadReader,
+    IOBackend.SEQUENTIAL: SequentialReader,
+}
+
+
+def open_reader(io_backend: str, local_file_path: Path, buffer_in_bytes: int) -> Reader:
+    if io_backend not in READERS:
+        raise ValueError(
+            f"Invalid io_backend parameter '{io_backend}'. Must be one of: {sorted(READERS)}"
+        )
+    return READERS[io_backend](local_file_path, buffer_in_bytes)
@@ -1,38 +1,71 @@
 from constants import Strategy
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 
 class S3IDResult:
     def __init__(
-        self, match: bool, signature: str, upload_strategy: str, partition_in_bytes: int
+        self,
+        match: bool,
+        signature: str,
+        upload_strategy: str,
+        partition_in_bytes: int,
+        checksums: Optional[Dict[str, Dict[str, Any]]] = None,
+        parts: Optional[Dict[str, Any]] = None,
     ) -> None:
         self.match: bool = match
         self.signature: str = signature
         self.upload_strategy: str = upload_strategy
         self.partition_in_bytes: int = partition_in_bytes
+        # Additional checksums verified, as {algorithm: {"match": bool, ...}}
+        self.checksums: Optional[Dict[str, Dict[str, Any]]] = checksums
+        # Parts compared one by one, as {"mismatched": [...], "unchecked": [...]}
+        self.parts: Optional[Dict[str, Any]] = parts
 
     def summary(self):
-        if not self.match:
-            return {"match": False}
-
-        output: Dict[str, Any] = {
-            "match": self.match,
-            "signature": self.signature,
-            "upload_strategy": self.upload_strategy,
-        }
-        if self.upload_strategy == Strategy.MULTI_PART:
-            output["partition_in_bytes"] = self.partition_in_bytes
+        output: Dict[str, Any] = {"match": self.match}
+        if self.match and self.signature is not None:
+            output["signature"] = self.signature
+            output["upload_strategy"] = self.upload_strategy
+            if self.upload_strategy == Strategy.MULTI_PART:
+                output["partition_in_bytes"] = self.partition_in_bytes
 
+        if self.checksums is not None:
+            output["checksums"] = self.checksums
+        if self.parts is not None:
+            output["parts"] = self.parts
         return output
 
 
 class S3IDResultMatch(S3IDResult):
     def __init__(
-        self, signature: str, upload_strategy: str, partition_in_bytes: int
+        self,
+        signature: str,
+        upload_strategy: str,
+        partition_in_bytes: int,
+        checksums: Optional[Dict[str, Dict[str, Any]]] = None,
+        parts: Optional[Dict[str, Any]] = None,
     ) -> None:
-        super().__init__(True, signature, upload_strategy, partition_in_bytes)
+        super().__init__(True, signature, upload_strategy, partition_in_bytes, checksums, parts)
 
 
 class S3IDResultMismatch(S3IDResult):
-    def __init__(self, signature: str) -> None:
+    def __init__(
+        self,
+        signature: str,
+        checksums: Optional[Dict[str, Dict[str, Any]]] = None,
+        parts: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(False, None, None, None, checksums, parts)
+
+
+class S3IDResultError(S3IDResult):
+    """
+    Returned by batch verification in place of raising, so one bad item does not abort the batch
+    """
+
+    def __init__(self, error: Exception) -> None:
         super().__init__(False, None, None, None)
+        self.error: str = f"{type(error).__name__}: {error}"
+
+    def summary(self):
+        return {"match": False, "error": self.error}
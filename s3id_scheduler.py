@@ -0,0 +1,175 @@
+import logging
+import os
+import struct
+import threading
+import time
+from itertools import islice, zip_longest
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from constants import Buffer, DeviceLimits, PACKAGE_NAME
+
+log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
+
+# FS_IOC_FIEMAP ioctl (Linux): map the first extent of a file to its physical offset
+FS_IOC_FIEMAP = 0xC020660B
+FIEMAP_HEADER = struct.Struct("=QQLLLL")
+FIEMAP_EXTENT = struct.Struct("=QQQQQLLLL")
+
+
+def physical_offset(local_file_path: Path) -> Optional[int]:
+    """
+    Physical byte offset of the first extent of a file on its device, None where the platform
+    or filesystem cannot tell (ex: not Linux, network filesystems, empty files)
+    """
+    try:
+        import fcntl  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+
+    request = bytearray(FIEMAP_HEADER.size + FIEMAP_EXTENT.size)
+    FIEMAP_HEADER.pack_into(request, 0, 0, 2**64 - 1, 0, 0, 1, 0)
+    try:
+        fd: int = os.open(local_file_path, os.O_RDONLY)
+        try:
+            fcntl.ioctl(fd, FS_IOC_FIEMAP, request)
+        finally:
+            os.close(fd)
+    except OSError:
+        return None
+
+    mapped: int = FIEMAP_HEADER.unpack_from(request)[3]
+    if not mapped:
+        return None
+    return FIEMAP_EXTENT.unpack_from(request, FIEMAP_HEADER.size)[1]
+
+
+class _Device:
+    """
+    Budget and running state of one device
+    """
+
+    __slots__ = ("slots", "bytes_per_second", "due")
+
+    def __init__(self, concurrency: int, bytes_per_second: Optional[int]) -> None:
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.bytes_per_second: Optional[int] = bytes_per_second
+        # When the bandwidth budget allows the next read to start
+        self.due: float = 0.0
+
+
+class DeviceScheduler:
+    """
+    Share the local disks between concurrent verifications.  Reads are grouped by device
+    (st_dev): at most 'concurrency' files are read at once from a device, optionally paced to
+    'bytes_per_second', and each file is read sequentially in reads of 'read_in_bytes' (the
+    default read buffer of a Calculator, an explicit 'buffer_in_bytes' takes precedence).
+    'limits' overrides the budget of some devices, keyed by st_dev or by any path on the device
+    (ex: a mount point), as (concurrency, bytes_per_second).
+
+    'order' sorts batches of files by physical layout, so each device is read front to back
+    and the devices are kept busy at the same time instead of one after another.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DeviceLimits.DEFAULT_CONCURRENCY,
+        bytes_per_second: Optional[int] = None,
+        read_in_bytes: int = Buffer.DEFAULT_SIZE,
+        limits: Optional[Mapping[Union[int, Path], Tuple[int, Optional[int]]]] = None,
+        window: int = DeviceLimits.ORDERING_WINDOW,
+        physical: bool = False,
+    ) -> None:
+        budgets: Dict[Any, Tuple[int, Optional[int]]] = {
+            None: (concurrency, bytes_per_second),
+            **(limits or {}),
+        }
+        for device, (device_concurrency, device_bandwidth) in budgets.items():
+            if not isinstance(device_concurrency, int) or device_concurrency <= 0:
+                raise ValueError(
+                    f"Invalid concurrency parameter '{device_concurrency}' for device '{device}'. "
+                    "Must be a positive integer."
+                )
+            if device_bandwidth is not None and (
+                not isinstance(device_bandwidth, int) or device_bandwidth <= 0
+            ):
+                raise ValueError(
+                    f"Invalid bytes_per_second parameter '{device_bandwidth}' for device "
+                    f"'{device}'. Must be a positive integer."
+                )
+
+        for name, value in (("read_in_bytes", read_in_bytes), ("window", window)):
+            if not isinstance(value, int) or value <= 0:
+                raise ValueError(f"Invalid {name} parameter '{value}'. Must be a positive integer.")
+
+        self.concurrency: int = concurrency
+        self.bytes_per_second: Optional[int] = bytes_per_second
+        self.read_in_bytes: int = read_in_bytes
+        self.window: int = window
+        self.physical: bool = physical
+        self.limits: Dict[int, Tuple[int, Optional[int]]] = {
+            (device if isinstance(device, int) else os.stat(device).st_dev): budget
+            for device, budget in (limits or {}).items()
+        }
+        self._devices: Dict[int, _Device] = {}
+        self._lock = threading.Lock()
+
+    def _device(self, device: int) -> _Device:
+        with self._lock:
+            if device not in self._devices:
+                budget = self.limits.get(device, (self.concurrency, self.bytes_per_second))
+                self._devices[device] = _Device(*budget)
+            return self._devices[device]
+
+    def read(self, device: int, chunks: Iterator[memoryview]) -> Iterator[memoryview]:
+        """
+        Pass 'chunks' through once a read slot of 'device' is free, paced to its bandwidth
+        budget.  The slot is held until the chunks are exhausted or closed.
+        """
+        state: _Device = self._device(device)
+        started: float = time.perf_counter()
+        with state.slots:
+            waited: float = time.perf_counter() - started
+            if waited > 0.001:
+                log.debug("Waited %.3fs for a read slot on device %s", waited, device)
+            for chunk in chunks:
+                if state.bytes_per_second is not None:
+                    self._pace(state, len(chunk))
+                yield chunk
+
+    def _pace(self, state: _Device, size: int) -> None:
+        with self._lock:
+            now: float = time.monotonic()
+            start: float = max(state.due, now)
+            state.due = start + size / state.bytes_per_second
+        if start > now:
+            time.sleep(start - now)
+
+    def order(self, items: Iterable[Any], key: Callable[[Any], Path]) -> Iterator[Any]:
+        """
+        Reorder 'items' one window at a time: group them by the device of the file 'key' returns,
+        sort each group by physical offset (with 'physical', where available) or inode, then
+        alternate between devices.  Items whose file cannot be stat-ed keep their place first.
+        """
+        iterator = iter(items)
+        while True:
+            window: List[Any] = list(islice(iterator, self.window))
+            if not window:
+                return
+
+            devices: Dict[int, List[Tuple[Tuple[int, int], int, Any]]] = {}
+            for index, item in enumerate(window):
+                try:
+                    stat = os.stat(key(item))
+                except (OSError, TypeError, ValueError):
+                    yield item
+                    continue
+                position: Optional[int] = physical_offset(key(item)) if self.physical else None
+                layout: Tuple[int, int] = (0, position) if position is not None else (1, stat.st_ino)
+                devices.setdefault(stat.st_dev, []).append((layout, index, item))
+
+            groups = [sorted(group, key=lambda entry: entry[:2]) for group in devices.values()]
+            for batch in zip_longest(*groups):
+                for entry in batch:
+                    if entry is not None:
+                        yield entry[2]
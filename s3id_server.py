@@ -0,0 +1,353 @@
+"""
+Long-running verification server with a local HTTP API, over a Unix socket or localhost TCP.
+
+    s3id-server --socket /run/s3id.sock --concurrency 8
+    curl --unix-socket /run/s3id.sock -d '{"etag": "...", "path": "/data/file"}' http://s3id/verify
+
+Endpoints:
+- POST /verify: a JSON object with "etag" and "path", and optionally "priority" (lower runs
+  first, default 0), "partition_sizes" (a list of sizes in bytes), "discover", "checksums",
+  "parts" and "max_mismatches".  Responds with the same result as 'S3ID.unpack' once the file
+  is verified.
+- GET /stats: queue and request counters
+- GET /health
+
+Requests share one digest cache and pool of verification threads for the lifetime of the
+server, so a repeated check of an unchanged file costs a stat and a lookup.  With
+--checkpoints, they also share a checkpoint store, so a re-check of a grown file only reads
+the appended bytes: only enable it for append-only trees.  The Unix socket is only accessible
+to its owner unless --socket-mode says otherwise.
+"""
+import argparse
+import heapq
+import http.client
+import itertools
+import json
+import logging
+import os
+import socket
+import stat
+import sys
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from s3id_cache import DigestCache
+from s3id_checkpoint import CheckpointStore
+from constants import EtagChunkSizeSet, Executor, PACKAGE_NAME, Strategy
+from s3id import S3ID
+from s3id_result import S3IDResultError
+
+log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
+
+# A TCP (host, port) or the path of a Unix socket
+Address = Union[Tuple[str, int], str, Path]
+
+
+class VerificationQueue:
+    """
+    Verify files on 'concurrency' threads, lowest 'priority' first then in submission order.
+    Identical requests (same ETag, resolved path, partition sizes and checksums) submitted while
+    one is queued or running share its result instead of hashing the file again.  Remaining
+    keyword arguments are passed to 'S3ID.unpack' for every request (ex: cache, checkpoints,
+    io_backend).
+    """
+
+    def __init__(
+        self,
+        concurrency: int = Executor.DEFAULT_CONCURRENCY,
+        threshold_in_bytes: int = Strategy.DEFAULT_THRESHOLD,
+        partition_set_in_bytes: Set[int] = EtagChunkSizeSet.AWS_S3,
+        **options: Any,
+    ) -> None:
+        if not isinstance(concurrency, int) or concurrency <= 0:
+            raise ValueError(
+                f"Invalid concurrency parameter '{concurrency}'. Must be a positive integer."
+            )
+
+        self.concurrency: int = concurrency
+        self.threshold_in_bytes: int = threshold_in_bytes
+        self.partition_set_in_bytes: Set[int] = partition_set_in_bytes
+        self.options: Dict[str, Any] = options
+        self.counters: Dict[str, int] = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "completed": 0,
+            "errors": 0,
+        }
+
+        self._heap: List[Tuple[int, int, Tuple, Dict[str, Any]]] = []
+        self._sequence = itertools.count()
+        self._pending: Dict[Tuple, Future] = {}
+        self._running: int = 0
+        self._closed: bool = False
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = [
+            threading.Thread(target=self._work, name=f"{PACKAGE_NAME}-verify-{i}", daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(
+        self,
+        etag: str,
+        local_file_path: Path,
+        priority: int = 0,
+        partition_set_in_bytes: Optional[Set[int]] = None,
+        **options: Any,
+    ) -> Future:
+        """
+        Queue a verification and return a Future of its result.  'options' (ex: discover,
+        checksums) override the queue options for this request.
+        """
+        local_file_path = Path(local_file_path)
+        partitions: Set[int] = set(partition_set_in_bytes or self.partition_set_in_bytes)
+        key: Tuple = (
+            etag,
+            str(local_file_path.resolve()),
+            frozenset(partitions),
+            json.dumps(options, sort_keys=True, default=str),
+        )
+        request: Dict[str, Any] = {
+            "etag": etag,
+            "local_file_path": local_file_path,
+            "partition_set_in_bytes": partitions,
+            **options,
+        }
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Cannot submit to a closed VerificationQueue")
+
+            self.counters["submitted"] += 1
+            if key in self._pending:
+                self.counters["deduplicated"] += 1
+                return self._pending[key]
+
+            future: Future = Future()
+            self._pending[key] = future
+            heapq.heappush(self._heap, (priority, next(self._sequence), key, request))
+            self._condition.notify()
+        return future
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {"queued": len(self._heap), "running": self._running, **self.counters}
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop accepting requests.  Queued requests are still verified.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while not self._heap and not self._closed:
+                    self._condition.wait()
+                if not self._heap:
+                    return
+                _, _, key, request = heapq.heappop(self._heap)
+                future: Future = self._pending[key]
+                self._running += 1
+
+            result: Optional[Dict[str, Any]] = None
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = S3ID.unpack(
+                        threshold_in_bytes=self.threshold_in_bytes, **{**self.options, **request}
+                    )
+                except Exception as e:  # pylint: disable=broad-except
+                    result = S3IDResultError(e).summary()
+
+            with self._condition:
+                # Later identical requests verify again, from the warm caches
+                del self._pending[key]
+                self._running -= 1
+                if result is not None:
+                    self.counters["completed"] += 1
+                    self.counters["errors"] += 1 if "error" in result else 0
+            if result is not None:
+                future.set_result(result)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = f"{PACKAGE_NAME}-server"
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        if self.path == "/stats":
+            self._reply(200, self.server.queue.stats())
+        elif self.path == "/health":
+            self._reply(200, {"status": "ok"})
+        else:
+            self._reply(404, {"error": f"Unknown endpoint '{self.path}'"})
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        if self.path != "/verify":
+            self._reply(404, {"error": f"Unknown endpoint '{self.path}'"})
+            return
+
+        try:
+            length: int = int(self.headers.get("Content-Length", 0))
+            body: Dict[str, Any] = json.loads(self.rfile.read(length))
+            options: Dict[str, Any] = {
+                name: body[name]
+                for name in ("discover", "checksums", "parts", "max_mismatches")
+                if name in body
+            }
+            future: Future = self.server.queue.submit(
+                body.get("etag"),
+                Path(body["path"]),
+                priority=int(body.get("priority", 0)),
+                partition_set_in_bytes={int(p) for p in body.get("partition_sizes") or ()},
+                **options,
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            self._reply(400, S3IDResultError(e).summary())
+            return
+        self._reply(200, future.result())
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        data: bytes = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        log.debug("%s " + format, self.address_string(), *args)
+
+
+class _TCPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(
+    address: Address, queue: VerificationQueue, mode: int = 0o600
+) -> Union[_TCPServer, _UnixServer]:
+    """
+    Bind the HTTP API of 'queue' to a (host, port) or a Unix socket path, call
+    'serve_forever()' on the result to serve requests.  A stale socket left at the path is
+    replaced, any other file is an error.  The socket is created with 'mode' (default: the owner
+    only) by binding it under a matching umask, as any local user able to connect, even
+    briefly, can have files read.
+    """
+    if isinstance(address, tuple):
+        server: Union[_TCPServer, _UnixServer] = _TCPServer(address, _Handler)
+    else:
+        try:
+            existing = os.lstat(address)
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(existing.st_mode):
+                raise FileExistsError(f"'{address}' exists and is not a socket")
+            os.unlink(address)
+        previous: int = os.umask(0o777 & ~mode)
+        try:
+            server = _UnixServer(str(address), _Handler)
+        finally:
+            os.umask(previous)
+    server.queue = queue
+    return server
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path: str = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def verify_remote(
+    address: Address,
+    etag: str,
+    local_file_path: Path,
+    timeout: Optional[float] = None,
+    **fields: Any,
+) -> Dict[str, Any]:
+    """
+    Verify a file through a running server and return its result.  'fields' are the optional
+    request fields (priority, partition_sizes, discover, checksums, parts,
+    max_mismatches).
+    """
+    if isinstance(address, tuple):
+        connection: http.client.HTTPConnection = http.client.HTTPConnection(
+            *address, timeout=timeout
+        )
+    else:
+        connection = _UnixConnection(str(address), timeout=timeout)
+    try:
+        request: Dict[str, Any] = {"etag": etag, "path": str(local_file_path), **fields}
+        body: bytes = json.dumps(request).encode("utf-8")
+        connection.request("POST", "/verify", body, {"Content-Type": "application/json"})
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="s3id-server", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    listen = parser.add_mutually_exclusive_group()
+    listen.add_argument("--socket", type=Path, help="path of a Unix socket to listen on")
+    listen.add_argument("--port", type=int, default=8765, help="localhost TCP port to listen on")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-c", "--concurrency", type=int, default=Executor.DEFAULT_CONCURRENCY)
+    parser.add_argument(
+        "--socket-mode",
+        type=lambda value: int(value, 8),
+        default=0o600,
+        help="permissions of the Unix socket, in octal (default: 600)",
+    )
+    parser.add_argument(
+        "--cache", type=Path, help="digest cache path (default: ~/.cache/s3id/digests.sqlite)"
+    )
+    parser.add_argument(
+        "--checkpoints",
+        action="store_true",
+        help="resume the hashing of grown files (only for append-only trees)",
+    )
+    args = parser.parse_args(argv)
+
+    with DigestCache(args.cache) as cache:
+        checkpoints: Optional[CheckpointStore] = None
+        if args.checkpoints:
+            checkpoints = CheckpointStore(cache)
+        queue = VerificationQueue(args.concurrency, cache=cache, checkpoints=checkpoints)
+        server = make_server(args.socket or (args.host, args.port), queue, args.socket_mode)
+        log.info("Listening on %s", args.socket or f"{args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import logging
+import os
+from hashlib import md5
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Set, Tuple
+
+from constants import DASH, PACKAGE_NAME, EtagChunkSizeSet, Strategy
+from s3id_planner import part_count
+
+log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
+
+
+class SmallFileResult:
+    """
+    Outcome of verifying one file, kept to a few slots as batches can hold millions of them.
+    'match' is None for a file larger than the small-file limit, which was not verified.
+    'partition_in_bytes' is the partition size a multi-part ETag matched with.
+    """
+
+    __slots__ = ("etag", "path", "size", "match", "signature", "error", "partition_in_bytes")
+
+    def __init__(
+        self,
+        etag: str,
+        path: str,
+        size: Optional[int],
+        match: Optional[bool],
+        signature: Optional[str] = None,
+        error: Optional[str] = None,
+        partition_in_bytes: Optional[int] = None,
+    ) -> None:
+        self.etag: str = etag
+        self.path: str = path
+        self.size: Optional[int] = size
+        self.match: Optional[bool] = match
+        self.signature: Optional[str] = signature
+        self.error: Optional[str] = error
+        self.partition_in_bytes: Optional[int] = partition_in_bytes
+
+    def __repr__(self) -> str:
+        fields = (self.etag, self.path, self.size, self.match, self.signature, self.error)
+        return f"SmallFileResult{fields!r}"
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        The same result format as 'S3ID.unpack'.  A file that was not verified (too large) is
+        not a match, with "reason": "unverified" to tell it apart from a mismatch.
+        """
+        if self.error is not None:
+            return {"match": False, "error": self.error}
+        if self.match is None:
+            return {"match": False, "reason": "unverified"}
+        if not self.match:
+            return {"match": False}
+        if DASH in self.signature:
+            return {
+                "match": True,
+                "signature": self.signature,
+                "upload_strategy": Strategy.MULTI_PART,
+                "partition_in_bytes": self.partition_in_bytes,
+            }
+        return {"match": True, "signature": self.signature, "upload_strategy": Strategy.SINGLE_PART}
+
+
+class SmallFileVerifier:
+    """
+    Verify batches of files no larger than the smallest partition size with as little work per
+    file as possible: each file is sized with one stat (from its 'os.scandir' entry when
+    verifying a directory, which only scans directories holding keys), opened once and read
+    with positional reads into one buffer shared by the whole batch, and results are compact
+    'SmallFileResult's.  Such a file is a single part with any partition
+    size, so one MD5 answers both a single-part ETag and a "<hash>-1" multi-part ETag, and any
+    other part count is a mismatch without reading the file.
+    """
+
+    def __init__(
+        self,
+        partition_set_in_bytes: Set[int] = EtagChunkSizeSet.AWS_S3,
+        max_size_in_bytes: Optional[int] = None,
+    ) -> None:
+        if (
+            not isinstance(partition_set_in_bytes, set)
+            or not partition_set_in_bytes
+            or not all(isinstance(x, int) and x > 0 for x in partition_set_in_bytes)
+        ):
+            raise ValueError("'partition_set_in_bytes' must be a set of integers")
+
+        self.partition_in_bytes: int = min(partition_set_in_bytes)
+        if max_size_in_bytes is None:
+            max_size_in_bytes = self.partition_in_bytes
+        if (
+            not isinstance(max_size_in_bytes, int)
+            or max_size_in_bytes <= 0
+            or max_size_in_bytes > self.partition_in_bytes
+        ):
+            raise ValueError(
+                f"Invalid max_size_in_bytes parameter '{max_size_in_bytes}'. Must be a positive "
+                f"integer no larger than the smallest partition size ({self.partition_in_bytes})."
+            )
+
+        self.max_size_in_bytes: int = max_size_in_bytes
+        self.counters: Dict[str, int] = {"files": 0, "bytes_read": 0, "skipped": 0, "errors": 0}
+        # Allocated on the first read and reused for every file of every batch
+        self._view: Optional[memoryview] = None
+
+    def verify(self, etag: str, path: str, size: int) -> SmallFileResult:
+        """
+        Verify one file of 'size' bytes (as reported by a stat), None match if it is too large
+        """
+        if size > self.max_size_in_bytes:
+            return SmallFileResult(etag, path, size, None)
+
+        self.counters["files"] += 1
+        expected_parts: Optional[int] = part_count(etag)
+        if DASH in etag and expected_parts != (1 if size else 0):
+            self.counters["skipped"] += 1
+            return SmallFileResult(etag, path, size, False)
+
+        try:
+            digest: bytes = self._md5(path, size)
+        except OSError as e:
+            self.counters["errors"] += 1
+            return SmallFileResult(etag, path, size, False, error=f"{type(e).__name__}: {e}")
+
+        if expected_parts is None:
+            signature: str = f'"{digest.hex()}"'
+        else:
+            # An empty file has no part at all
+            signature = f'"{md5(digest if size else b"").hexdigest()}-{expected_parts}"'
+        match: bool = etag.strip('"') == signature.strip('"')
+        partition_in_bytes: Optional[int] = None
+        if expected_parts is not None:
+            partition_in_bytes = self.partition_in_bytes
+        return SmallFileResult(etag, path, size, match, signature, None, partition_in_bytes)
+
+    def verify_many(self, items: Iterable[Tuple[str, Path]]) -> Iterator[SmallFileResult]:
+        """
+        Verify (etag, local_file_path) items in order, with one 'os.stat' per file
+        """
+        for etag, local_file_path in items:
+            path: str = os.fspath(local_file_path)
+            try:
+                size: int = os.stat(path).st_size
+            except OSError as e:
+                self.counters["errors"] += 1
+                yield SmallFileResult(etag, path, None, False, error=f"{type(e).__name__}: {e}")
+                continue
+            yield self.verify(etag, path, size)
+
+    def verify_directory(self, root: Path, etags: Mapping[str, str]) -> Iterator[SmallFileResult]:
+        """
+        Verify the files under 'root' named by the keys of 'etags' (paths relative to 'root' with
+        '/' separators, ex: S3 keys without their prefix), sizing them with 'DirEntry.stat()'
+        (one stat per file on POSIX).  Only directories holding some of the keys are scanned.
+        Keys without a regular file yield an error after the scanned files.
+        """
+        remaining: Dict[str, str] = dict(etags)
+        directories: Set[str] = {""}
+        for key in remaining:
+            parts = key.split("/")[:-1]
+            directories.update("/".join(parts[: i + 1]) for i in range(len(parts)))
+
+        pending = [(os.fspath(root), "")]
+        while pending:
+            directory, relative = pending.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError as e:
+                log.debug("Cannot scan '%s': %s", directory, e)
+                continue
+            with entries:
+                for entry in entries:
+                    key: str = f"{relative}{entry.name}"
+                    if key in remaining and entry.is_file():
+                        yield self.verify(remaining.pop(key), entry.path, entry.stat().st_size)
+                    elif key in directories and entry.is_dir():
+                        pending.append((entry.path, f"{key}/"))
+
+        for key, etag in remaining.items():
+            self.counters["errors"] += 1
+            path: str = os.path.join(root, key)
+            yield SmallFileResult(etag, path, None, False, error=f"FileNotFoundError: {path}")
+
+    def _md5(self, path: str, size: int) -> bytes:
+        if not size:
+            return md5().digest()
+        if self._view is None:
+            self._view = memoryview(bytearray(self.max_size_in_bytes))
+        digest = md5()
+        fd: int = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            position: int = 0
+            while position < size:
+                want: memoryview = self._view[: size - position]
+                if hasattr(os, "preadv"):
+                    read: int = os.preadv(fd, [want], position)
+                else:
+                    data: bytes = os.pread(fd, len(want), position)
+                    read = len(data)
+                    want[:read] = data
+                if not read:
+                    break
+                digest.update(want[:read])
+                position += read
+        finally:
+            os.close(fd)
+        self.counters["bytes_read"] += position
+        return digest.digest()
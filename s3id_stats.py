@@ -0,0 +1,101 @@
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from constants import PACKAGE_NAME
+
+log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
+
+
+class S3IDStats:
+    """
+    Counters collected while calculating or comparing ETags for one local file
+    """
+
+    __slots__ = (
+        "bytes_read",
+        "hole_bytes",
+        "parts_hashed",
+        "partition_sizes_tried",
+        "partition_sizes_pruned",
+        "io_seconds",
+        "hash_seconds",
+        "total_seconds",
+        "cache_hits",
+        "cache_misses",
+    )
+
+    def __init__(self) -> None:
+        self.bytes_read: int = 0
+        # Bytes of sparse file holes hashed without being read
+        self.hole_bytes: int = 0
+        self.parts_hashed: int = 0
+        self.partition_sizes_tried: List[int] = []
+        self.partition_sizes_pruned: List[int] = []
+        self.io_seconds: float = 0.0
+        self.hash_seconds: float = 0.0
+        self.total_seconds: float = 0.0
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+
+    def merge(self, other: "S3IDStats") -> None:
+        """
+        Add the I/O counters of 'other', ex: from a segment hashed by a worker
+        """
+        self.bytes_read += other.bytes_read
+        self.hole_bytes += other.hole_bytes
+        self.parts_hashed += other.parts_hashed
+        self.io_seconds += other.io_seconds
+        self.hash_seconds += other.hash_seconds
+
+    def summary(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# A hook is called with the stats and the result summary of every comparison
+StatsHook = Callable[[S3IDStats, Dict[str, Any]], Any]
+
+
+def emit(hooks: Iterable[StatsHook], stats: S3IDStats, result: Dict[str, Any]) -> None:
+    """
+    Call every hook, a failing hook is logged and never fails the comparison
+    """
+    for hook in hooks:
+        try:
+            hook(stats, result)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Stats hook %r failed", hook)
+
+
+class StatsdHook:
+    """
+    Export stats through a StatsD style client (ex: datadog.DogStatsd, statsd.StatsClient), any
+    object with 'increment(metric, value)' and 'timing(metric, milliseconds)'.  Extra keyword
+    arguments (ex: tags=[...]) are passed along with every metric.
+    """
+
+    def __init__(self, client: Any, prefix: str = PACKAGE_NAME, **metric_options: Any) -> None:
+        self.client = client
+        self.prefix: str = prefix
+        self.metric_options: Dict[str, Any] = metric_options
+
+    def __call__(self, stats: S3IDStats, result: Dict[str, Any]) -> None:
+        counters: Dict[str, Optional[int]] = {
+            "comparisons": 1,
+            "matches": 1 if result.get("match") else 0,
+            "bytes_read": stats.bytes_read,
+            "hole_bytes": stats.hole_bytes,
+            "parts_hashed": stats.parts_hashed,
+            "partition_sizes_tried": len(stats.partition_sizes_tried),
+            "partition_sizes_pruned": len(stats.partition_sizes_pruned),
+            "cache_hits": stats.cache_hits,
+            "cache_misses": stats.cache_misses,
+        }
+        for name, value in counters.items():
+            if value:
+                self.client.increment(f"{self.prefix}.{name}", value, **self.metric_options)
+
+        for name in ("io_seconds", "hash_seconds", "total_seconds"):
+            milliseconds: float = getattr(stats, name) * 1000
+            self.client.timing(
+                f"{self.prefix}.{name[: -len('_seconds')]}_time", milliseconds, **self.metric_options
+            )
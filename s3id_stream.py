@@ -0,0 +1,104 @@
+import logging
+from hashlib import md5
+from typing import Dict, Iterable, Iterator, Set, Tuple, Union
+
+from comparator import match_results
+from constants import Buffer, DASH, EtagChunkSizeSet, PACKAGE_NAME, Strategy
+from s3id_digest import PartDigest
+
+log = logging.getLogger(f"{PACKAGE_NAME}.{__name__}")
+
+
+class StreamCalculator:
+    """
+    Calculate ETags from bytes as they flow through, for a stream of unknown length (a socket,
+    a decompressor, stdin, a download).  The single-part MD5 and the running part digests of
+    every partition size are updated from each chunk, so the ETags are known as soon as the
+    last byte has been seen, without writing the data to disk.
+    """
+
+    def __init__(self, partition_set_in_bytes: Set[int] = EtagChunkSizeSet.AWS_S3) -> None:
+        if not isinstance(partition_set_in_bytes, set) or not all(
+            isinstance(x, int) for x in partition_set_in_bytes
+        ):
+            raise ValueError("'partition_set_in_bytes' must be a set of integers")
+
+        self.partition_set_in_bytes: Set[int] = partition_set_in_bytes
+        self.size: int = 0
+        self._single_part = md5()
+        self._digests = [PartDigest(p) for p in sorted(partition_set_in_bytes)]
+        self._signatures: Union[None, Tuple[str, Dict[int, str]]] = None
+
+    def update(self, data) -> None:
+        if self._signatures is not None:
+            raise ValueError("Cannot update a StreamCalculator after its signatures were read")
+
+        self.size += len(data)
+        self._single_part.update(data)
+        for digest in self._digests:
+            digest.update(data)
+
+    def tee(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Yield 'chunks' unchanged while hashing them, to sit inside a download pipeline
+        """
+        for chunk in chunks:
+            self.update(chunk)
+            yield chunk
+
+    def consume(self, source, buffer_in_bytes: int = Buffer.DEFAULT_SIZE) -> "StreamCalculator":
+        """
+        Hash everything from 'source', a readable file-like object or an iterable of bytes.  Only
+        a read of 0 bytes is the end of the stream: a non-blocking source with no data available
+        (a read returning None) raises BlockingIOError rather than being taken for the end.
+        """
+        if hasattr(source, "readinto"):
+            view = memoryview(bytearray(buffer_in_bytes))
+            while True:
+                size = source.readinto(view)
+                if size is None:
+                    raise BlockingIOError("'source' is non-blocking and has no data available")
+                if not size:
+                    break
+                self.update(view[:size])
+        elif hasattr(source, "read"):
+            while True:
+                data = source.read(buffer_in_bytes)
+                if data is None:
+                    raise BlockingIOError("'source' is non-blocking and has no data available")
+                if not data:
+                    break
+                self.update(data)
+        else:
+            for _ in self.tee(source):
+                pass
+        return self
+
+    def signatures(self) -> Tuple[str, Dict[int, str]]:
+        """
+        Close the stream and return the single-part ETag and the multi-part ETag per partition size
+        """
+        if self._signatures is None:
+            self._signatures = (
+                f'"{self._single_part.hexdigest()}"',
+                {d.partition_in_bytes: d.finalize().signature() for d in self._digests},
+            )
+            log.debug("Stream of %s byte(s) signatures: %s", self.size, self._signatures)
+        return self._signatures
+
+    def compare(self, etag: str) -> Dict[str, Union[int, str]]:
+        """
+        Close the stream and compare it with 'etag', with the same result as 'S3ID.unpack'
+        """
+        if not etag:
+            raise ValueError("'etag' cannot be blank.")
+
+        single_part, multi_part = self.signatures()
+        if DASH in etag:
+            results = {
+                partition_in_bytes: {"signature": signature, "strategy": Strategy.MULTI_PART}
+                for partition_in_bytes, signature in multi_part.items()
+            }
+        else:
+            results = {0: {"signature": single_part, "strategy": Strategy.SINGLE_PART}}
+        return match_results(etag, results)
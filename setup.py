@@ -5,7 +5,7 @@ https://github.com/pypa/sampleproject
 """
 
 # Always prefer setuptools over distutils
-from setuptools import setup, find_packages
+from setuptools import setup
 import pathlib
 
 here = pathlib.Path(__file__).parent.resolve()
@@ -36,12 +36,42 @@ setup(
         "Programming Language :: Python :: 3 :: Only",
     ],
     keywords="AWS, S3, ETag, MD5, match, chunk, multi-part, upload",
-    packages=find_packages(include=["s3id"], exclude=["tests*"]),
+    # Top-level modules, imported by each other and by the console scripts as "from s3id_cache import ..."
+    py_modules=[
+        "calculator",
+        "comparator",
+        "constants",
+        "s3id",
+        "s3id_cache",
+        "s3id_checkpoint",
+        "s3id_checksums",
+        "s3id_cli",
+        "s3id_digest",
+        "s3id_fetcher",
+        "s3id_index",
+        "s3id_manifest",
+        "s3id_parts",
+        "s3id_planner",
+        "s3id_readers",
+        "s3id_result",
+        "s3id_scheduler",
+        "s3id_server",
+        "s3id_small_files",
+        "s3id_stats",
+        "s3id_stream",
+    ],
     python_requires=">=3.6, <4",
     project_urls={
         "Bug Reports": "https://github.com/DataDog/s3id/issues",
         "Source": "https://github.com/DataDog/s3id/",
     },
+    entry_points={
+        "console_scripts": ["s3id=s3id_cli:main", "s3id-server=s3id_server:main"],
+    },
+    extras_require={
+        "s3": ["boto3"],
+        "test": ["moto[server]"],
+    },
     setup_requires=["pytest-runner"],
     tests_require=["pytest"],
 )
@@ -1,7 +1,10 @@
 import os
+import tempfile
 import unittest
+from hashlib import md5
 from pathlib import Path
-from constants import Strategy, Units
+from unittest import mock
+from constants import Executor, Strategy, Units
 from calculator import Calculator
 
 
@@ -82,3 +85,141 @@ class TestCalculator(unittest.TestCase):
             "Invalid threshold_in_bytes parameter '0'. Must be a positive integer.",
         ):
             Calculator(self.fifty_mb_path, Strategy.MULTI_PART, threshold_in_bytes=0)
+
+
+class TestCalculatorMany(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = Path(cls.directory.name) / "random_20mb.bin"
+        cls.path.write_bytes(os.urandom(20 * Units.ONE_MB + 7))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_calculate_many_matches_calculate_for_every_partition(self):
+        partitions = {5 * Units.ONE_MB, 8 * Units.ONE_MB, 15 * Units.ONE_MB, 16 * Units.ONE_MB}
+        calculator = Calculator(self.path, Strategy.MULTI_PART)
+        results = calculator.calculate_many(partitions)
+        self.assertEqual(set(results), partitions)
+        for partition_in_bytes in partitions:
+            self.assertEqual(
+                results[partition_in_bytes], calculator.calculate(partition_in_bytes)
+            )
+
+    def test_calculate_many_reads_the_file_once(self):
+        calculator = Calculator(self.path, Strategy.MULTI_PART)
+        with mock.patch("builtins.open", wraps=open) as opened:
+            calculator.calculate_many({8 * Units.ONE_MB, 16 * Units.ONE_MB})
+        self.assertEqual(opened.call_count, 1)
+
+    def test_calculate_many_with_single_part_strategy(self):
+        results = Calculator(self.path, Strategy.SINGLE_PART).calculate_many(
+            {8 * Units.ONE_MB, 16 * Units.ONE_MB}
+        )
+        self.assertEqual(
+            {r["signature"] for r in results.values()},
+            {f'"{md5(self.path.read_bytes()).hexdigest()}"'},
+        )
+
+    def test_calculate_many_with_a_small_unaligned_buffer(self):
+        partitions = {5 * Units.ONE_MB, 8 * Units.ONE_MB}
+        self.assertEqual(
+            Calculator(self.path, Strategy.MULTI_PART, buffer_in_bytes=Units.ONE_KB + 3).calculate_many(
+                partitions
+            ),
+            Calculator(self.path, Strategy.MULTI_PART).calculate_many(partitions),
+        )
+
+    def test_single_part_streams_through_a_bounded_buffer(self):
+        calculator = Calculator(self.path, Strategy.SINGLE_PART, buffer_in_bytes=Units.ONE_MB)
+        with mock.patch("s3id_readers.bytearray", wraps=bytearray) as allocated:
+            result = calculator.calculate(8 * Units.ONE_MB)
+        allocated.assert_called_once_with(Units.ONE_MB)
+        self.assertEqual(result["signature"], f'"{md5(self.path.read_bytes()).hexdigest()}"')
+
+    def test_with_an_invalid_buffer_in_bytes(self):
+        with self.assertRaisesRegex(
+            ValueError,
+            "Invalid buffer_in_bytes parameter '0'. Must be a positive integer.",
+        ):
+            Calculator(self.path, Strategy.MULTI_PART, buffer_in_bytes=0)
+
+    def test_calculate_many_with_workers(self):
+        partitions = {Units.ONE_MB, 5 * Units.ONE_MB, 8 * Units.ONE_MB, 15 * Units.ONE_MB}
+        expected = Calculator(self.path, Strategy.MULTI_PART).calculate_many(partitions)
+        for executor in Executor.ALL:
+            with self.subTest(executor=executor):
+                self.assertEqual(
+                    Calculator(
+                        self.path, Strategy.MULTI_PART, workers=3, executor=executor
+                    ).calculate_many(partitions),
+                    expected,
+                )
+
+    def test_calculate_many_with_workers_reads_the_file_once(self):
+        size = self.path.stat().st_size
+        partitions = {Units.ONE_MB, 5 * Units.ONE_MB, 8 * Units.ONE_MB, 15 * Units.ONE_MB}
+        calculator = Calculator(self.path, Strategy.MULTI_PART, workers=3)
+        with mock.patch.object(calculator, "_aggregate_checksums_parallel") as parallel:
+            calculator.calculate_many(partitions)
+        parallel.assert_not_called()
+        self.assertEqual(calculator.stats.bytes_read, size)
+
+        calculator = Calculator(self.path, Strategy.MULTI_PART, workers=3)
+        calculator.calculate_many({8 * Units.ONE_MB})
+        self.assertEqual(calculator.stats.bytes_read, size)
+
+    def test_with_an_invalid_workers(self):
+        with self.assertRaisesRegex(
+            ValueError, "Invalid workers parameter '0'. Must be a positive integer."
+        ):
+            Calculator(self.path, Strategy.MULTI_PART, workers=0)
+
+    def test_calculate_all(self):
+        partitions = {8 * Units.ONE_MB, 16 * Units.ONE_MB}
+        single_part, multi_part = Calculator(self.path, Strategy.MULTI_PART).calculate_all(partitions)
+        self.assertEqual(
+            single_part,
+            Calculator(self.path, Strategy.SINGLE_PART).calculate(8 * Units.ONE_MB)["signature"],
+        )
+        self.assertEqual(
+            multi_part,
+            {
+                p: r["signature"]
+                for p, r in Calculator(self.path, Strategy.MULTI_PART).calculate_many(partitions).items()
+            },
+        )
+
+
+class TestCalculatorSparse(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "sparse.img"
+        self.data = os.urandom(Units.ONE_MB)
+        with open(self.path, "wb") as f:
+            f.truncate(64 * Units.ONE_MB)
+            f.seek(9 * Units.ONE_MB + 5)
+            f.write(self.data)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_holes_are_not_read(self):
+        calculator = Calculator(self.path, Strategy.MULTI_PART)
+        results = calculator.calculate_many({5 * Units.ONE_MB, 8 * Units.ONE_MB})
+        contents = self.path.read_bytes()
+        for partition_in_bytes, result in results.items():
+            parts = [
+                md5(contents[i : i + partition_in_bytes]).digest()
+                for i in range(0, len(contents), partition_in_bytes)
+            ]
+            self.assertEqual(
+                result["signature"], f'"{md5(b"".join(parts)).hexdigest()}-{len(parts)}"'
+            )
+        if calculator.sparse:
+            self.assertLess(calculator.stats.bytes_read, 8 * Units.ONE_MB)
+            self.assertEqual(
+                calculator.stats.bytes_read + calculator.stats.hole_bytes, 64 * Units.ONE_MB
+            )
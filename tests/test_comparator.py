@@ -1,6 +1,8 @@
 import unittest
 import os
+import tempfile
 from pathlib import Path
+from unittest import mock
 from constants import EtagChunkSizeSet, Strategy, Units
 from comparator import Comparator
 from calculator import Calculator
@@ -113,3 +115,59 @@ class TestComparator(unittest.TestCase):
                 Strategy.DEFAULT_THRESHOLD,
                 {"a"},
             )
+
+
+class TestComparatorPlanning(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = Path(cls.directory.name) / "random_20mb.bin"
+        cls.path.write_bytes(os.urandom(20 * Units.ONE_MB + 7))
+        cls.seven_mb_etag = Calculator(cls.path, Strategy.MULTI_PART).calculate(
+            7 * Units.ONE_MB
+        )["signature"]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_plan_prunes_impossible_partition_sizes(self):
+        comparator = Comparator(
+            self.seven_mb_etag, self.path, Strategy.DEFAULT_THRESHOLD, EtagChunkSizeSet.AWS_S3
+        )
+        self.assertEqual(comparator.plan(), {8 * Units.ONE_MB})
+
+    def test_mismatch_without_reading_when_no_partition_fits(self):
+        etag = self.seven_mb_etag.replace("-3", "-5")
+        with mock.patch("builtins.open") as opened:
+            result = Comparator.run(
+                etag, self.path, Strategy.DEFAULT_THRESHOLD, EtagChunkSizeSet.AWS_S3
+            )
+        self.assertEqual(result, {"match": False})
+        opened.assert_not_called()
+
+    def test_run_with_discover(self):
+        self.assertEqual(
+            Comparator.run(
+                self.seven_mb_etag,
+                self.path,
+                Strategy.DEFAULT_THRESHOLD,
+                EtagChunkSizeSet.AWS_S3,
+            ),
+            {"match": False},
+        )
+        self.assertEqual(
+            Comparator.run(
+                self.seven_mb_etag,
+                self.path,
+                Strategy.DEFAULT_THRESHOLD,
+                EtagChunkSizeSet.AWS_S3,
+                discover=True,
+            ),
+            {
+                "match": True,
+                "partition_in_bytes": 7 * Units.ONE_MB,
+                "signature": self.seven_mb_etag,
+                "upload_strategy": "multi_part",
+            },
+        )
@@ -1,9 +1,14 @@
+import asyncio
 import unittest
 import os
+import tempfile
+import time
 from pathlib import Path
+from unittest import mock
 from constants import Strategy, Units
 from s3id import S3ID
 from calculator import Calculator
+from s3id_readers import Reader, open_reader
 
 
 class TestS3ID(unittest.TestCase):
@@ -36,3 +41,173 @@ class TestS3ID(unittest.TestCase):
             S3ID.unpack(self.malformed_etag, self.path),
             {"match": False},
         )
+
+
+class TestS3IDUnpackMany(unittest.TestCase):
+
+    malformed_etag = "669fdad9e309b552f1e9cf7b489c1f74-2"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.paths = []
+        cls.etags = []
+        for index in range(12):
+            path = Path(cls.directory.name) / f"file_{index}.bin"
+            path.write_bytes(os.urandom(Units.ONE_MB * (index % 3) + index))
+            cls.paths.append(path)
+            cls.etags.append(
+                Calculator(path, Strategy.MULTI_PART).calculate(Units.ONE_MB)["signature"]
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_unpack_many(self):
+        items = [(etag, path, {Units.ONE_MB}) for etag, path in zip(self.etags, self.paths)]
+        results = list(S3ID.unpack_many(iter(items), concurrency=3))
+        self.assertEqual(len(results), len(items))
+        self.assertEqual({path for _, path, _ in results}, set(self.paths))
+        self.assertTrue(all(result["match"] for _, _, result in results))
+
+    def test_unpack_many_keeps_errors_per_item(self):
+        missing = Path(self.directory.name) / "missing.bin"
+        items = [(self.etags[0], missing), (self.malformed_etag, self.paths[1]), ("", self.paths[2])]
+        results = {path: result for _, path, result in S3ID.unpack_many(items)}
+        self.assertEqual(
+            results[missing],
+            {
+                "match": False,
+                "error": "ValueError: 'local_file_path' must be a valid pathlib.Path object",
+            },
+        )
+        self.assertEqual(results[self.paths[1]], {"match": False})
+        self.assertEqual(
+            results[self.paths[2]], {"match": False, "error": "ValueError: 'etag' cannot be blank."}
+        )
+
+    def test_unpack_many_hashes_hardlinks_once(self):
+        links = [Path(self.directory.name) / f"link_{index}.bin" for index in range(4)]
+        for link in links:
+            if not link.exists():
+                os.link(self.paths[4], link)
+        items = [(self.etags[4], path, {Units.ONE_MB}) for path in [self.paths[4]] + links]
+        with mock.patch("calculator.open_reader", wraps=open_reader) as opened:
+            results = list(S3ID.unpack_many(items, concurrency=2, dedupe=True))
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual({path for _, path, _ in results}, set(path for _, path, _ in items))
+        self.assertTrue(all(result["match"] for _, _, result in results))
+
+    def test_unpack_many_bounds_items_waiting_on_a_hardlink(self):
+        links = [Path(self.directory.name) / f"bound_{index}.bin" for index in range(20)]
+        for link in links:
+            if not link.exists():
+                os.link(self.paths[5], link)
+        consumed = []
+
+        def items():
+            for path in [self.paths[5]] + links:
+                consumed.append(path)
+                yield self.etags[5], path, {Units.ONE_MB}
+
+        results = S3ID.unpack_many(items(), concurrency=2, dedupe=True)
+        next(results)
+        self.assertLessEqual(len(consumed), 4)
+        self.assertEqual(len(list(results)), len(links))
+
+    def test_unpack_many_reuses_the_matching_partition_of_copies(self):
+        copies = [Path(self.directory.name) / f"copy_{index}.bin" for index in range(4)]
+        for copy in copies:
+            copy.write_bytes(self.paths[4].read_bytes())
+        copies[3].write_bytes(os.urandom(copies[3].stat().st_size))
+        partitions = {Units.ONE_MB, Units.ONE_MB - 4096, Units.ONE_MB - 8192}
+        items = [(self.etags[4], path, partitions) for path in copies]
+        results = {
+            path: result
+            for _, path, result in S3ID.unpack_many(
+                items, concurrency=1, dedupe=True, include_stats=True
+            )
+        }
+        self.assertEqual(len(results[copies[0]]["stats"]["partition_sizes_tried"]), 3)
+        self.assertEqual(results[copies[2]]["stats"]["partition_sizes_tried"], [Units.ONE_MB])
+        self.assertTrue(results[copies[2]]["match"])
+        self.assertFalse(results[copies[3]]["match"])
+
+    def test_with_an_invalid_concurrency(self):
+        with self.assertRaisesRegex(
+            ValueError, "Invalid concurrency parameter '0'. Must be a positive integer."
+        ):
+            list(S3ID.unpack_many([], concurrency=0))
+
+
+class TestS3IDUnpackAsync(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = Path(cls.directory.name) / "random_20mb.bin"
+        cls.path.write_bytes(os.urandom(20 * Units.ONE_MB))
+        cls.etag = Calculator(cls.path, Strategy.MULTI_PART).calculate(8 * Units.ONE_MB)["signature"]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_unpack_async_reports_progress(self):
+        progress = []
+        result = asyncio.run(
+            S3ID.unpack_async(
+                self.etag,
+                self.path,
+                progress=lambda hashed, partitions: progress.append((hashed, partitions)),
+                slice_in_bytes=4 * Units.ONE_MB,
+            )
+        )
+        self.assertEqual(result, S3ID.unpack(self.etag, self.path))
+        self.assertEqual(progress[0], (4 * Units.ONE_MB, (8 * Units.ONE_MB,)))
+        self.assertEqual(progress[-1][0], 20 * Units.ONE_MB)
+
+    def test_unpack_async_cancellation_closes_the_file(self):
+        progress = []
+
+        async def cancel_after_first_slice():
+            task = asyncio.ensure_future(
+                S3ID.unpack_async(
+                    self.etag,
+                    self.path,
+                    progress=lambda hashed, _: progress.append(hashed) or task.cancel(),
+                    slice_in_bytes=Units.ONE_MB,
+                )
+            )
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with mock.patch("s3id_readers.Reader.close", autospec=True, side_effect=Reader.close) as close:
+            asyncio.run(cancel_after_first_slice())
+        self.assertEqual(progress, [Units.ONE_MB])
+        close.assert_called_once()
+
+    def test_unpack_async_waits_for_the_slice_in_flight_when_cancelled_twice(self):
+        hash_slices = Calculator._hash_slices
+
+        def slow_slices(calculator, *args):
+            for hashed in hash_slices(calculator, *args):
+                time.sleep(0.2)
+                yield hashed
+
+        async def cancel_twice():
+            loop = asyncio.get_running_loop()
+
+            def cancel(hashed, partitions):
+                task.cancel()
+                loop.call_later(0.05, task.cancel)
+
+            task = asyncio.ensure_future(
+                S3ID.unpack_async(self.etag, self.path, progress=cancel, slice_in_bytes=Units.ONE_MB)
+            )
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        # Closing the slices while one is hashed on the executor would raise a ValueError
+        with mock.patch.object(Calculator, "_hash_slices", slow_slices):
+            asyncio.run(cancel_twice())
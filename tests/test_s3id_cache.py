@@ -0,0 +1,93 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+from s3id_cache import DigestCache, file_identity
+from calculator import Calculator
+from constants import EtagChunkSizeSet, Strategy, Units
+from s3id import S3ID
+
+
+class TestDigestCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "random_17mb.bin"
+        self.path.write_bytes(os.urandom(17 * Units.ONE_MB))
+        self.cache = DigestCache(Path(self.directory.name) / "cache" / "digests.sqlite")
+        self.etag = Calculator(self.path, Strategy.MULTI_PART).calculate(8 * Units.ONE_MB)[
+            "signature"
+        ]
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_repeated_unpack_hits_the_cache(self):
+        first = S3ID.unpack(self.etag, self.path, cache=self.cache)
+        with mock.patch("calculator.open_reader") as open_reader:
+            second = S3ID.unpack(self.etag, self.path, cache=self.cache)
+        open_reader.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertTrue(second["match"])
+
+    def test_changed_file_is_rehashed(self):
+        S3ID.unpack(self.etag, self.path, cache=self.cache)
+        with open(self.path, "r+b") as f:
+            f.write(b"changed")
+        os.utime(self.path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+        self.assertEqual(S3ID.unpack(self.etag, self.path, cache=self.cache), {"match": False})
+
+        identity = file_identity(self.path.stat())
+        self.assertIsNotNone(self.cache.get(identity, 8 * Units.ONE_MB))
+        stale = identity[:3] + (identity[3] - 10 ** 9,)
+        self.assertIsNone(self.cache.get(stale, 8 * Units.ONE_MB))
+
+    def test_size_based_eviction(self):
+        cache = DigestCache(Path(self.directory.name) / "small.sqlite", max_bytes=64)
+        identity = file_identity(self.path.stat())
+        for partition_in_bytes in sorted(EtagChunkSizeSet.AWS_S3):
+            cache.put(identity, partition_in_bytes, b"x" * 32)
+        self.assertIsNone(cache.get(identity, min(EtagChunkSizeSet.AWS_S3)))
+        self.assertEqual(cache.get(identity, max(EtagChunkSizeSet.AWS_S3)), b"x" * 32)
+        cache.close()
+
+    def test_age_based_eviction(self):
+        cache = DigestCache(Path(self.directory.name) / "aged.sqlite", max_age_seconds=60)
+        identity = file_identity(self.path.stat())
+        cache.put(identity, Units.ONE_MB, b"x" * 16)
+        with mock.patch("s3id_cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(cache.get(identity, Units.ONE_MB))
+        cache.close()
+
+    def test_hits_are_written_in_batches(self):
+        cache = DigestCache(Path(self.directory.name) / "lru.sqlite", max_bytes=64)
+        statements = []
+        cache._connection.set_trace_callback(statements.append)
+        identity = file_identity(self.path.stat())
+        sizes = [Units.ONE_MB * index for index in range(1, 5)]
+        cache.put(identity, sizes[0], b"x" * 32)
+        cache.put(identity, sizes[1], b"y" * 32)
+        for _ in range(10):
+            self.assertEqual(cache.get(identity, sizes[0]), b"x" * 32)
+        self.assertFalse([s for s in statements if s.startswith("UPDATE")])
+        # The least recently used entry is evicted, counting the hits not written yet
+        cache.put(identity, sizes[2], b"z" * 32)
+        self.assertIsNone(cache.get(identity, sizes[1]))
+        self.assertEqual(cache.get(identity, sizes[0]), b"x" * 32)
+        # The size of the store is not recomputed on every store
+        self.assertFalse([s for s in statements if "SUM" in s and "WHERE" not in s])
+        cache.close()
+
+        cache = DigestCache(Path(self.directory.name) / "lru.sqlite", max_bytes=64)
+        cache.put(identity, sizes[3], b"w" * 32)
+        self.assertIsNone(cache.get(identity, sizes[2]))
+        self.assertEqual(cache.get(identity, sizes[0]), b"x" * 32)
+        cache.close()
+
+    def test_default_path_is_resolved_on_use(self):
+        with mock.patch("s3id_cache.Path.home", return_value=Path(self.directory.name)):
+            cache = DigestCache()
+        self.assertEqual(cache.path, Path(self.directory.name) / ".cache" / "s3id" / "digests.sqlite")
+        cache.close()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from s3id_cache import DigestCache
+from calculator import Calculator
+from s3id_checkpoint import CheckpointStore
+from constants import Strategy, Units
+from s3id import S3ID
+
+
+class TestCheckpoints(unittest.TestCase):
+    partition_set_in_bytes = {Units.ONE_MB, 2 * Units.ONE_MB}
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "segment.log"
+        self.path.write_bytes(os.urandom(3 * Units.ONE_MB + 5))
+        self.cache = DigestCache(Path(self.directory.name) / "digests.sqlite")
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def append(self, size):
+        with open(self.path, "ab") as f:
+            f.write(os.urandom(size))
+
+    def calculate(self, strategy, checkpoints):
+        calculator = Calculator(self.path, strategy, checkpoints=checkpoints)
+        results = calculator.calculate_many(self.partition_set_in_bytes)
+        self.assertEqual(results, Calculator(self.path, strategy).calculate_many(self.partition_set_in_bytes))
+        return calculator.stats.bytes_read
+
+    def test_appended_file_hashes_only_the_tail(self):
+        checkpoints = CheckpointStore()
+        for strategy in (Strategy.MULTI_PART, Strategy.SINGLE_PART):
+            with self.subTest(strategy=strategy):
+                self.calculate(strategy, checkpoints)
+                self.append(Units.ONE_MB + 7)
+                self.assertEqual(self.calculate(strategy, checkpoints), Units.ONE_MB + 7)
+                # A file that did not grow is never resumed
+                self.assertEqual(self.calculate(strategy, checkpoints), self.path.stat().st_size)
+
+    def test_persisted_checkpoints_resume_from_the_last_complete_part(self):
+        self.calculate(Strategy.MULTI_PART, CheckpointStore(self.cache))
+        self.append(100)
+        # A new store only has the completed parts persisted in the cache
+        self.assertEqual(self.calculate(Strategy.MULTI_PART, CheckpointStore(self.cache)), Units.ONE_MB + 105)
+
+    def test_rewritten_file_is_rehashed(self):
+        checkpoints = CheckpointStore()
+        self.calculate(Strategy.MULTI_PART, checkpoints)
+        self.path.write_bytes(os.urandom(4 * Units.ONE_MB))
+        self.assertEqual(self.calculate(Strategy.MULTI_PART, checkpoints), 4 * Units.ONE_MB)
+
+    def test_corrupted_file_is_rehashed(self):
+        checkpoints = CheckpointStore(self.cache)
+        self.calculate(Strategy.MULTI_PART, checkpoints)
+        with open(self.path, "r+b") as f:
+            f.seek(Units.ONE_MB + 5)
+            f.write(b"corrupted")
+        size = self.path.stat().st_size
+        self.assertEqual(self.calculate(Strategy.MULTI_PART, checkpoints), size)
+        self.append(10)
+        # The rehash checkpointed the new contents
+        self.assertEqual(self.calculate(Strategy.MULTI_PART, checkpoints), 10)
+
+    def test_corrupted_file_is_a_mismatch(self):
+        checkpoints = CheckpointStore()
+        etag = Calculator(self.path, Strategy.MULTI_PART).calculate(Units.ONE_MB)["signature"]
+        options = {"partition_set_in_bytes": {Units.ONE_MB}, "checkpoints": checkpoints}
+        self.assertTrue(S3ID.unpack(etag, self.path, **options)["match"])
+        with open(self.path, "r+b") as f:
+            f.seek(Units.ONE_MB + 5)
+            f.write(b"corrupted")
+        result = S3ID.unpack(etag, self.path, include_stats=True, **options)
+        self.assertFalse(result["match"])
+        self.assertEqual(result["stats"]["bytes_read"], self.path.stat().st_size)
+
+    def test_unpack_with_checkpoints(self):
+        checkpoints = CheckpointStore()
+        S3ID.unpack('"0"', self.path, checkpoints=checkpoints)
+        self.append(10)
+        etag = Calculator(self.path, Strategy.SINGLE_PART).calculate(Units.ONE_MB)["signature"]
+        result = S3ID.unpack(etag, self.path, checkpoints=checkpoints, include_stats=True)
+        self.assertTrue(result["match"])
+        self.assertEqual(result["stats"]["bytes_read"], 10)
+
+    def test_invalid_max_entries(self):
+        with self.assertRaises(ValueError):
+            CheckpointStore(max_entries=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
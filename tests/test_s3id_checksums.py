@@ -0,0 +1,109 @@
+import base64
+import hashlib
+import os
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+from calculator import Calculator
+from s3id_checksums import ChecksumVerifier, Crc32, composite, full_object
+from constants import ChecksumAlgorithm, Strategy, Units
+from s3id_digest import PartDigest
+from s3id import S3ID
+
+
+def b64(digest):
+    return base64.b64encode(digest).decode("ascii")
+
+
+class TestChecksums(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.data = os.urandom(2 * Units.ONE_MB + 7)
+        self.path = Path(self.directory.name) / "file.bin"
+        self.path.write_bytes(self.data)
+        self.parts = [self.data[i : i + Units.ONE_MB] for i in range(0, len(self.data), Units.ONE_MB)]
+        self.etag = Calculator(self.path, Strategy.MULTI_PART).calculate(Units.ONE_MB)["signature"]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_crc32(self):
+        digest = PartDigest(len(self.data), Crc32)
+        digest.update(self.data)
+        self.assertEqual(full_object(digest.finalize()), b64(zlib.crc32(self.data).to_bytes(4, "big")))
+
+    def test_composite(self):
+        digest = PartDigest(Units.ONE_MB, hashlib.sha256)
+        digest.update(self.data)
+        combined = hashlib.sha256(b"".join(hashlib.sha256(p).digest() for p in self.parts))
+        self.assertEqual(composite(digest.finalize()), f"{b64(combined.digest())}-3")
+
+    def test_calculate_checksums(self):
+        calculator = Calculator(self.path, Strategy.MULTI_PART)
+        checksums = calculator.calculate_checksums(
+            {ChecksumAlgorithm.SHA1, ChecksumAlgorithm.CRC32}, {Units.ONE_MB}
+        )
+        self.assertEqual(calculator.stats.bytes_read, len(self.data))
+        self.assertEqual(checksums[ChecksumAlgorithm.SHA1]["full_object"], b64(hashlib.sha1(self.data).digest()))
+        self.assertEqual(
+            checksums[ChecksumAlgorithm.CRC32]["parts"][Units.ONE_MB],
+            [b64(zlib.crc32(p).to_bytes(4, "big")) for p in self.parts],
+        )
+
+    def test_empty_file(self):
+        empty = Path(self.directory.name) / "empty.bin"
+        empty.write_bytes(b"")
+        checksums = Calculator(empty, Strategy.SINGLE_PART).calculate_checksums({ChecksumAlgorithm.SHA256})
+        self.assertEqual(
+            checksums[ChecksumAlgorithm.SHA256]["full_object"], b64(hashlib.sha256().digest())
+        )
+
+    def test_unpack_with_checksums(self):
+        expected = {
+            ChecksumAlgorithm.SHA256: b64(hashlib.sha256(self.data).digest()),
+            ChecksumAlgorithm.SHA1: Calculator(self.path, Strategy.MULTI_PART).calculate_checksums(
+                {ChecksumAlgorithm.SHA1}, {Units.ONE_MB}
+            )[ChecksumAlgorithm.SHA1]["composite"][Units.ONE_MB],
+        }
+        result = S3ID.unpack(
+            self.etag, self.path, partition_set_in_bytes={Units.ONE_MB}, checksums=expected, include_stats=True
+        )
+        self.assertTrue(result["match"])
+        self.assertEqual(result["partition_in_bytes"], Units.ONE_MB)
+        self.assertEqual(
+            result["checksums"][ChecksumAlgorithm.SHA1],
+            {"match": True, "checksum": expected[ChecksumAlgorithm.SHA1], "partition_in_bytes": Units.ONE_MB},
+        )
+        self.assertTrue(result["checksums"][ChecksumAlgorithm.SHA256]["match"])
+        # The ETag and both checksums come from one read of the file
+        self.assertEqual(result["stats"]["bytes_read"], len(self.data))
+
+    def test_unpack_checksums_only(self):
+        expected = {ChecksumAlgorithm.CRC32: b64(zlib.crc32(self.data).to_bytes(4, "big"))}
+        result = S3ID.unpack(None, self.path, checksums=expected)
+        self.assertTrue(result["match"])
+        self.assertNotIn("signature", result)
+
+    def test_checksum_mismatch(self):
+        result = S3ID.unpack(
+            self.etag,
+            self.path,
+            partition_set_in_bytes={Units.ONE_MB},
+            checksums={ChecksumAlgorithm.SHA256: b64(hashlib.sha256(b"other").digest())},
+        )
+        self.assertEqual(
+            result, {"match": False, "checksums": {ChecksumAlgorithm.SHA256: {"match": False}}}
+        )
+
+    def test_invalid_algorithm(self):
+        with self.assertRaises(ValueError):
+            ChecksumVerifier({"md4": "AAAA"}, len(self.data), {Units.ONE_MB})
+
+    def test_blank_etag_without_checksums(self):
+        with self.assertRaises(ValueError):
+            S3ID.unpack("", self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
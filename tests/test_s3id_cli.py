@@ -0,0 +1,96 @@
+import ast
+import io
+import json
+import modulefinder
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from calculator import Calculator
+from constants import Strategy, Units
+from s3id_cli import main
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.entries = []
+        for index in range(4):
+            path = Path(self.directory.name) / f"file_{index}.bin"
+            path.write_bytes(os.urandom(Units.ONE_MB * index + 1))
+            etag = Calculator(path, Strategy.MULTI_PART).calculate(Units.ONE_MB)["signature"]
+            self.entries.append({"etag": etag, "path": str(path), "partition_sizes": [Units.ONE_MB]})
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_cli(self, manifest, *argv):
+        path = Path(self.directory.name) / "manifest"
+        path.write_text(manifest)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        status = main([str(path), "--progress-interval", "0", *argv], stdout, stderr)
+        results = {r["path"]: r for r in map(json.loads, stdout.getvalue().splitlines())}
+        return status, results, stderr.getvalue()
+
+    def test_ndjson_manifest(self):
+        manifest = "\n".join(json.dumps(entry) for entry in self.entries)
+        status, results, stderr = self.run_cli(manifest, "-w", "2")
+        self.assertEqual(status, 0)
+        self.assertEqual(set(results), {e["path"] for e in self.entries})
+        self.assertTrue(all(r["match"] for r in results.values()))
+        self.assertIn("4 file(s), 0 mismatch(es)", stderr)
+        self.assertIn("files/s", stderr)
+
+    def test_csv_manifest_with_mismatches(self):
+        rows = ["etag,path,size,partition_sizes"]
+        rows.append(f'{self.entries[1]["etag"]},{self.entries[1]["path"]},,{Units.ONE_MB}')
+        rows.append(f'{self.entries[2]["etag"]},{self.entries[2]["path"]},1,')
+        rows.append(f'{self.entries[3]["etag"]},{self.entries[3]["path"]},,')
+        rows.append(f'{self.entries[0]["etag"]},{self.directory.name}/missing.bin,,')
+        status, results, _ = self.run_cli("\n".join(rows), "-p", str(Units.ONE_MB))
+        self.assertEqual(status, 1)
+        self.assertTrue(results[self.entries[1]["path"]]["match"])
+        self.assertEqual(results[self.entries[2]["path"]]["reason"], "size")
+        self.assertFalse(results[self.entries[2]["path"]]["match"])
+        self.assertTrue(results[self.entries[3]["path"]]["match"])
+        self.assertIn("error", results[f"{self.directory.name}/missing.bin"])
+
+    def test_malformed_ndjson_lines_are_errors(self):
+        lines = [json.dumps(self.entries[0]), "{not json", "[1]", json.dumps(self.entries[1])]
+        path = Path(self.directory.name) / "manifest"
+        path.write_text("\n".join(lines))
+        stdout = io.StringIO()
+        status = main([str(path), "--progress-interval", "0"], stdout, io.StringIO())
+        results = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(status, 1)
+        errors = sorted(r["error"] for r in results if r["path"] is None)
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(errors[0].startswith("JSONDecodeError") and errors[0].endswith("(line 2)"))
+        self.assertEqual(errors[1], "ValueError: expected a JSON object (line 3)")
+        self.assertTrue(all(r["match"] for r in results if r["path"] is not None))
+
+    def test_workers_must_be_positive(self):
+        with mock.patch("sys.stderr", io.StringIO()), self.assertRaises(SystemExit):
+            main(["-", "--workers", "0"])
+
+    def test_console_script_modules_are_shipped(self):
+        setup = ast.parse((ROOT / "setup.py").read_text())
+        py_modules = next(
+            ast.literal_eval(keyword.value)
+            for node in ast.walk(setup)
+            if isinstance(node, ast.Call)
+            for keyword in node.keywords
+            if keyword.arg == "py_modules"
+        )
+        for script in ("s3id_cli.py", "s3id_server.py"):
+            finder = modulefinder.ModuleFinder(path=[str(ROOT)])
+            finder.run_script(str(ROOT / script))
+            imported = {
+                name
+                for name, module in finder.modules.items()
+                if name != "__main__" and module.__file__ and Path(module.__file__).parent == ROOT
+            }
+            self.assertLessEqual(imported | {script[: -len(".py")]}, set(py_modules), script)
@@ -0,0 +1,38 @@
+import unittest
+from hashlib import md5, sha256
+from s3id_digest import PartDigest, update_zeros
+
+
+class TestPartDigest(unittest.TestCase):
+    def test_update_splits_on_partition_boundaries(self):
+        data = bytes(range(256)) * 10
+        digest = PartDigest(1000)
+        for offset in range(0, len(data), 333):
+            digest.update(data[offset : offset + 333])
+        digest.finalize()
+
+        parts = [data[i : i + 1000] for i in range(0, len(data), 1000)]
+        self.assertEqual(digest.count, 3)
+        self.assertEqual(bytes(digest.digests), b"".join(md5(p).digest() for p in parts))
+        self.assertEqual(
+            digest.signature(),
+            f'"{md5(b"".join(md5(p).digest() for p in parts)).hexdigest()}-3"',
+        )
+
+    def test_update_zeros_matches_update(self):
+        for new_hash in (md5, sha256):
+            for partition in (1000, 4096):
+                with self.subTest(new_hash=new_hash, partition=partition):
+                    fed = PartDigest(partition, new_hash)
+                    fed.update(b"a" * 1500 + bytes(3 * partition + 7) + b"b" * 10)
+                    zeros = PartDigest(partition, new_hash)
+                    zeros.update(b"a" * 1500)
+                    update_zeros(zeros, 3 * partition + 7)
+                    zeros.update(b"b" * 10)
+                    self.assertEqual(fed.finalize().digests, zeros.finalize().digests)
+
+    def test_with_an_invalid_partition(self):
+        with self.assertRaisesRegex(
+            ValueError, "'partition_in_bytes' must be an integer greater than 0"
+        ):
+            PartDigest(0)
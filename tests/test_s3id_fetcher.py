@@ -0,0 +1,104 @@
+import os
+import socket
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from calculator import Calculator
+from constants import Strategy, Units
+
+try:
+    import boto3  # noqa: F401
+    from moto.server import ThreadedMotoServer
+except ImportError:
+    ThreadedMotoServer = None
+
+from s3id_fetcher import EtagFetcher
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@unittest.skipIf(ThreadedMotoServer is None, "requires boto3 and moto")
+class TestEtagFetcher(unittest.TestCase):
+    bucket = "s3id-test"
+
+    @classmethod
+    def setUpClass(cls):
+        port = free_port()
+        cls.server = ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+        cls.server.start()
+        cls.client_options = {
+            "endpoint_url": f"http://127.0.0.1:{port}",
+            "region_name": "us-east-1",
+            "aws_access_key_id": "testing",
+            "aws_secret_access_key": "testing",
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+        self.fetcher = EtagFetcher(concurrency=4, **self.client_options)
+        self.fetcher.client.create_bucket(Bucket=self.bucket)
+        self.keys = []
+        for index in range(6):
+            data = os.urandom(Units.ONE_KB * (index + 1))
+            key = f"backups/file_{index}.bin"
+            (self.root / f"file_{index}.bin").write_bytes(data)
+            self.fetcher.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+            self.keys.append(key)
+        self.fetcher.client.put_object(Bucket=self.bucket, Key="other/file.bin", Body=b"other")
+
+    def tearDown(self):
+        for key in self.keys + ["other/file.bin"]:
+            self.fetcher.client.delete_object(Bucket=self.bucket, Key=key)
+        self.fetcher.client.delete_bucket(Bucket=self.bucket)
+        self.directory.cleanup()
+
+    def test_list_prefix(self):
+        objects = list(self.fetcher.fetch(self.bucket, prefix="backups/"))
+        self.assertEqual([o.key for o in objects], self.keys)
+        self.assertEqual(self.fetcher.requests, {"list": 1, "head": 0})
+        expected = Calculator(self.root / "file_0.bin", Strategy.SINGLE_PART).calculate(Units.ONE_MB)
+        self.assertEqual(objects[0].etag, expected["signature"])
+        self.assertEqual(objects[0].size, Units.ONE_KB)
+
+    def test_keys_are_listed_before_head(self):
+        objects = list(self.fetcher.fetch(self.bucket, self.keys[1:4] + ["backups/missing"]))
+        self.assertEqual(self.fetcher.requests, {"list": 1, "head": 1})
+        errors = {o.key: o.error for o in objects}
+        self.assertIsNone(errors[self.keys[1]])
+        self.assertIsNotNone(errors["backups/missing"])
+
+    def test_listing_stops_on_a_page_without_keys(self):
+        keys = [self.keys[0], self.keys[5]] + [f"backups/zz_{index}" for index in range(4)]
+        with mock.patch("s3id_fetcher.LIST_PAGE_SIZE", 1):
+            objects = list(self.fetcher.fetch(self.bucket, keys))
+        self.assertEqual(self.fetcher.requests, {"list": 2, "head": 5})
+        self.assertEqual({o.key for o in objects}, set(keys))
+
+    def test_single_key_uses_head(self):
+        objects = list(self.fetcher.fetch(self.bucket, [self.keys[0]]))
+        self.assertEqual(self.fetcher.requests, {"list": 0, "head": 1})
+        self.assertEqual(objects[0].size, Units.ONE_KB)
+
+    def test_verify(self):
+        (self.root / "file_5.bin").write_bytes(b"changed")
+        results = {
+            o.key: result
+            for o, _, result in self.fetcher.verify(self.bucket, self.root, prefix="backups/", concurrency=2)
+        }
+        self.assertEqual(set(results), set(self.keys))
+        self.assertEqual(results[self.keys[5]], {"match": False, "reason": "size"})
+        self.assertTrue(all(results[key]["match"] for key in self.keys[:5]))
+
+
+if __name__ == "__main__":
+    unittest.main()
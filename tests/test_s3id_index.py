@@ -0,0 +1,103 @@
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from calculator import Calculator
+from constants import Strategy, Units
+from s3id_index import EtagIndex, Reconciliation, read_inventory_csv
+
+
+class TestEtagIndex(unittest.TestCase):
+    partition_set_in_bytes = {Units.ONE_MB, 2 * Units.ONE_MB}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.root = Path(cls.directory.name) / "mirror"
+        (cls.root / "nested").mkdir(parents=True)
+        cls.contents = {
+            "a.bin": os.urandom(3 * Units.ONE_MB + 1),
+            "nested/b.bin": os.urandom(100),
+            "nested/c.bin": os.urandom(Units.ONE_MB),
+        }
+        for name, data in cls.contents.items():
+            (cls.root / name).write_bytes(data)
+        cls.index = EtagIndex.build(cls.root, cls.partition_set_in_bytes)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def etag(self, name, partition_in_bytes=None):
+        strategy = Strategy.MULTI_PART if partition_in_bytes else Strategy.SINGLE_PART
+        return Calculator(self.root / name, strategy).calculate(partition_in_bytes or Units.ONE_MB)[
+            "signature"
+        ]
+
+    def test_lookup(self):
+        size = len(self.contents["a.bin"])
+        self.assertEqual(self.index.lookup(self.etag("a.bin"), size), ["a.bin"])
+        self.assertEqual(self.index.lookup(self.etag("a.bin", 2 * Units.ONE_MB), size), ["a.bin"])
+        self.assertEqual(self.index.lookup(self.etag("a.bin"), size + 1), [])
+
+    def test_reconcile(self):
+        inventory = io.StringIO(
+            "\n".join(
+                [
+                    f'bucket,backup/a.bin,{len(self.contents["a.bin"])},{self.etag("a.bin", Units.ONE_MB)}',
+                    f'bucket,backup/nested/b.bin,100,"{"0" * 32}"',
+                    f'bucket,backup/renamed%2Bc.bin,{Units.ONE_MB},{self.etag("nested/c.bin")}',
+                    "bucket,backup/gone.bin,10,0123",
+                ]
+            )
+        )
+        self.assertEqual(
+            list(self.index.reconcile(read_inventory_csv(inventory), prefix="backup/")),
+            [
+                (Reconciliation.MATCHED, "backup/a.bin", ["a.bin"]),
+                (Reconciliation.DIVERGENT, "backup/nested/b.bin", ["nested/b.bin"]),
+                (Reconciliation.MATCHED, "backup/renamed+c.bin", ["nested/c.bin"]),
+                (Reconciliation.MISSING, "backup/gone.bin", []),
+            ],
+        )
+
+    def test_reconcile_other_content_at_the_key(self):
+        # The object holds the content of c.bin, while b.bin is at its key
+        inventory = [("backup/nested/b.bin", Units.ONE_MB, self.etag("nested/c.bin"))]
+        self.assertEqual(
+            list(self.index.reconcile(inventory, prefix="backup/")),
+            [(Reconciliation.DIVERGENT, "backup/nested/b.bin", ["nested/b.bin", "nested/c.bin"])],
+        )
+
+    def test_save_and_load(self):
+        path = Path(self.directory.name) / "index.jsonl"
+        self.index.save(path)
+        loaded = EtagIndex.load(path)
+        self.assertEqual(loaded.root, self.root)
+        self.assertEqual(loaded.partition_set_in_bytes, self.partition_set_in_bytes)
+        self.assertEqual(loaded.files, self.index.files)
+        self.assertEqual(dict(loaded.etags), dict(self.index.etags))
+
+    def test_save_and_load_unusual_names(self):
+        index = EtagIndex(self.root, self.partition_set_in_bytes)
+        names = ["tab\tname.bin", "new\nline.bin", "undecodable\udcff.bin"]
+        for size, name in enumerate(names):
+            index.add(name, size, ['"0123"'])
+        path = Path(self.directory.name) / "unusual.jsonl"
+        index.save(path)
+        self.assertEqual(EtagIndex.load(path).files, index.files)
+
+    def test_build_skips_vanished_files(self):
+        walk = EtagIndex._walk
+
+        def walk_with_a_vanished_file(directory):
+            yield directory / "vanished.bin"
+            yield from walk(directory)
+
+        with mock.patch.object(EtagIndex, "_walk", side_effect=walk_with_a_vanished_file):
+            with self.assertLogs("s3id.s3id_index", "WARNING") as logs:
+                index = EtagIndex.build(self.root, self.partition_set_in_bytes)
+        self.assertEqual(index.files, self.index.files)
+        self.assertIn("vanished.bin", logs.output[0])
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from calculator import Calculator
+from constants import Strategy, Units
+from s3id_manifest import PartManifest, compare_manifests, merge_manifests, part_ranges
+
+
+def hash_range(path, partition_in_bytes, parts):
+    return Calculator(path, Strategy.MULTI_PART).calculate_parts(
+        partition_in_bytes, parts.start, parts.stop
+    ).dumps()
+
+
+class TestPartManifests(unittest.TestCase):
+    partition_in_bytes = Units.ONE_MB
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "object.bin"
+        self.path.write_bytes(os.urandom(7 * Units.ONE_MB + 11))
+        self.calculator = Calculator(self.path, Strategy.MULTI_PART)
+        self.etag = self.calculator.calculate(self.partition_in_bytes)["signature"]
+        self.ranges = part_ranges(7 * Units.ONE_MB + 11, self.partition_in_bytes, 3)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_part_ranges(self):
+        self.assertEqual(self.ranges, [range(0, 3), range(3, 6), range(6, 8)])
+        self.assertEqual(part_ranges(0, self.partition_in_bytes, 3), [])
+
+    def test_merge_in_any_order(self):
+        calculator = Calculator(self.path, Strategy.MULTI_PART)
+        manifests = [
+            calculator.calculate_parts(self.partition_in_bytes, r.start, r.stop)
+            for r in reversed(self.ranges)
+        ]
+        self.assertEqual(merge_manifests(manifests).signature(), self.etag)
+        result = compare_manifests(self.etag, manifests)
+        self.assertTrue(result["match"])
+        self.assertEqual(result["partition_in_bytes"], self.partition_in_bytes)
+        # Every byte is read once across all ranges
+        self.assertEqual(calculator.stats.bytes_read, 7 * Units.ONE_MB + 11)
+
+    def test_serialized_manifests_from_processes(self):
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            serialized = list(
+                pool.map(
+                    hash_range,
+                    [self.path] * len(self.ranges),
+                    [self.partition_in_bytes] * len(self.ranges),
+                    self.ranges,
+                )
+            )
+        manifests = [PartManifest.loads(value) for value in serialized]
+        self.assertEqual(compare_manifests(self.etag, manifests)["match"], True)
+
+    def test_incomplete_or_overlapping_manifests(self):
+        first = self.calculator.calculate_parts(self.partition_in_bytes, 0, 3)
+        last = self.calculator.calculate_parts(self.partition_in_bytes, 6, 8)
+        with self.assertRaises(ValueError):
+            merge_manifests([first, last])
+        with self.assertRaises(ValueError):
+            merge_manifests([first, self.calculator.calculate_parts(self.partition_in_bytes, 2, 8)])
+        with self.assertRaises(ValueError):
+            merge_manifests([first])
+
+    def test_manifests_of_different_files(self):
+        other = Path(self.directory.name) / "other.bin"
+        other.write_bytes(os.urandom(7 * Units.ONE_MB + 11))
+        first = self.calculator.calculate_parts(self.partition_in_bytes, 0, 3)
+        rest = Calculator(other, Strategy.MULTI_PART).calculate_parts(self.partition_in_bytes, 3, 8)
+        with self.assertRaisesRegex(ValueError, "different files"):
+            merge_manifests([first, rest])
+
+    def test_invalid_range(self):
+        with self.assertRaises(ValueError):
+            self.calculator.calculate_parts(self.partition_in_bytes, 3, 9)
+        with self.assertRaises(ValueError):
+            self.calculator.calculate_parts(self.partition_in_bytes, 3, 3)
+
+    def test_mismatch(self):
+        manifests = [
+            self.calculator.calculate_parts(2 * Units.ONE_MB, r.start, r.stop)
+            for r in part_ranges(7 * Units.ONE_MB + 11, 2 * Units.ONE_MB, 2)
+        ]
+        self.assertEqual(compare_manifests(self.etag, manifests), {"match": False})
+
+
+if __name__ == "__main__":
+    unittest.main()
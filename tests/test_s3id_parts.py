@@ -0,0 +1,106 @@
+import base64
+import hashlib
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from constants import Units
+from s3id_parts import expected_parts, parts_from_object_attributes
+from s3id import S3ID
+
+
+def b64(digest):
+    return base64.b64encode(digest).decode("ascii")
+
+
+def etag(chunks):
+    combined = hashlib.md5(b"".join(hashlib.md5(c).digest() for c in chunks))
+    return f'"{combined.hexdigest()}-{len(chunks)}"'
+
+
+class TestParts(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        # Non-uniform part sizes, as uploaded by some tools
+        self.sizes = [Units.ONE_MB, 2 * Units.ONE_MB, Units.ONE_MB, 123]
+        self.chunks = [os.urandom(size) for size in self.sizes]
+        self.path = Path(self.directory.name) / "file.bin"
+        self.path.write_bytes(b"".join(self.chunks))
+        self.etag = etag(self.chunks)
+        self.parts = [
+            {"size": len(chunk), "sha256": b64(hashlib.sha256(chunk).digest())} for chunk in self.chunks
+        ]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def corrupt(self, offset):
+        with open(self.path, "r+b") as f:
+            f.seek(offset)
+            byte = f.read(1)
+            f.seek(offset)
+            f.write(bytes([byte[0] ^ 0xFF]))
+
+    def test_match(self):
+        result = S3ID.unpack(self.etag, self.path, parts=self.parts)
+        self.assertTrue(result["match"])
+        self.assertEqual(result["signature"], self.etag)
+        self.assertEqual(result["parts"], {"mismatched": [], "unchecked": []})
+
+    def test_corrupted_part(self):
+        self.corrupt(Units.ONE_MB + 5)
+        result = S3ID.unpack(self.etag, self.path, parts=self.parts)
+        self.assertFalse(result["match"])
+        self.assertEqual(
+            result["parts"]["mismatched"],
+            [{"part_number": 2, "range": [Units.ONE_MB, 3 * Units.ONE_MB]}],
+        )
+
+    def test_md5_parts(self):
+        parts = [{"size": len(c), "md5": hashlib.md5(c).hexdigest()} for c in self.chunks]
+        self.corrupt(sum(self.sizes) - 1)
+        result = S3ID.unpack(self.etag, self.path, parts=parts)
+        self.assertEqual([p["part_number"] for p in result["parts"]["mismatched"]], [4])
+
+    def test_max_mismatches(self):
+        self.corrupt(0)
+        self.corrupt(Units.ONE_MB)
+        result = S3ID.unpack(self.etag, self.path, parts=self.parts, max_mismatches=1, include_stats=True)
+        self.assertEqual([p["part_number"] for p in result["parts"]["mismatched"]], [1])
+        self.assertEqual(result["parts"]["unchecked"], [2, 3, 4])
+        self.assertEqual(result["stats"]["bytes_read"], Units.ONE_MB)
+
+    def test_truncated_file(self):
+        with open(self.path, "r+b") as f:
+            f.truncate(4 * Units.ONE_MB)
+        result = S3ID.unpack(self.etag, self.path, parts=self.parts)
+        self.assertFalse(result["match"])
+        self.assertEqual([p["part_number"] for p in result["parts"]["mismatched"]], [4])
+        self.assertEqual(result["parts"]["expected_size"], sum(self.sizes))
+
+    def test_part_count_must_match_etag(self):
+        with self.assertRaises(ValueError):
+            S3ID.unpack(self.etag, self.path, parts=self.parts[:2])
+
+    def test_invalid_parts(self):
+        with self.assertRaises(ValueError):
+            expected_parts([{"size": 0}])
+        with self.assertRaises(ValueError):
+            expected_parts([{"size": 1, "md4": "00"}])
+
+    def test_object_attributes(self):
+        response = {
+            "ObjectParts": {
+                "Parts": [
+                    {"PartNumber": 2, "Size": 5, "ChecksumSHA256": "b"},
+                    {"PartNumber": 1, "Size": 10, "ChecksumSHA256": "a"},
+                ]
+            }
+        }
+        parts = expected_parts(parts_from_object_attributes(response))
+        self.assertEqual([(p.part_number, p.offset, p.size) for p in parts], [(1, 0, 10), (2, 10, 5)])
+        self.assertEqual(parts[1].checksums, {"sha256": "b"})
+
+
+if __name__ == "__main__":
+    unittest.main()
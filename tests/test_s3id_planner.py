@@ -0,0 +1,37 @@
+import unittest
+from constants import EtagChunkSizeSet, S3Limits, Units
+from s3id_planner import discover_partitions, feasible_partitions, part_count, partition_range
+
+
+class TestPlanner(unittest.TestCase):
+    def test_part_count(self):
+        self.assertEqual(part_count('"669fdad9e309b552f1e9cf7b489c1f73-2"'), 2)
+        self.assertIsNone(part_count("f1c9645dbc14efddc7d8a322685f26eb"))
+        self.assertIsNone(part_count("669fdad9e309b552f1e9cf7b489c1f73-x"))
+
+    def test_feasible_partitions(self):
+        self.assertEqual(
+            feasible_partitions(10 * Units.ONE_MB, 2, EtagChunkSizeSet.AWS_S3),
+            {8 * Units.ONE_MB},
+        )
+        self.assertEqual(
+            feasible_partitions(10 * Units.ONE_MB, 1, EtagChunkSizeSet.AWS_S3),
+            {15 * Units.ONE_MB, 16 * Units.ONE_MB},
+        )
+        self.assertEqual(
+            feasible_partitions(10 * Units.ONE_MB, 3, EtagChunkSizeSet.AWS_S3), set()
+        )
+
+    def test_partition_range(self):
+        bounds = partition_range(10, 3)
+        self.assertEqual((bounds.start, bounds.stop - 1), (4, 4))
+        self.assertIsNone(partition_range(10, 11))
+
+    def test_discover_partitions(self):
+        self.assertEqual(
+            discover_partitions(20 * Units.ONE_MB + 7, 3),
+            {7 * Units.ONE_MB, 8 * Units.ONE_MB, 9 * Units.ONE_MB, 10 * Units.ONE_MB},
+        )
+        self.assertEqual(discover_partitions(10 * Units.ONE_MB, 1), {10 * Units.ONE_MB})
+        self.assertEqual(discover_partitions(Units.ONE_MB, 2), set())
+        self.assertEqual(discover_partitions(Units.ONE_GB, S3Limits.MAX_PARTS + 1), set())
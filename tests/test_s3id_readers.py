@@ -0,0 +1,75 @@
+import mmap
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from constants import IOBackend, Units
+from s3id_digest import ZeroRun
+from s3id_readers import is_sparse, open_reader
+
+
+class TestReaders(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = Path(cls.directory.name) / "random_1mb.bin"
+        cls.data = os.urandom(Units.ONE_MB + 13)
+        cls.path.write_bytes(cls.data)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def read(self, io_backend, offset=0, length=None, buffer_in_bytes=4099):
+        with open_reader(io_backend, self.path, buffer_in_bytes) as reader:
+            chunks = [bytes(chunk) for chunk in reader.chunks(offset, length)]
+        self.assertTrue(all(len(chunk) <= buffer_in_bytes for chunk in chunks))
+        return b"".join(chunks)
+
+    def test_every_backend_reads_the_whole_file(self):
+        for io_backend in IOBackend.ALL:
+            with self.subTest(io_backend=io_backend):
+                self.assertEqual(self.read(io_backend), self.data)
+
+    def test_every_backend_reads_a_range(self):
+        for io_backend in IOBackend.ALL:
+            with self.subTest(io_backend=io_backend):
+                self.assertEqual(self.read(io_backend, 5000, 70001), self.data[5000:75001])
+                self.assertEqual(self.read(io_backend, len(self.data) - 10, 100), self.data[-10:])
+
+    def test_mmap_maps_the_file_once(self):
+        with mock.patch("s3id_readers.mmap.mmap", wraps=mmap.mmap) as mapping:
+            with open_reader(IOBackend.MMAP, self.path, 4099) as reader:
+                first = b"".join(bytes(chunk) for chunk in reader.chunks(0, 10000))
+                chunks = reader.chunks(20000)
+                next(chunks)
+                # A range left unfinished releases its chunk, so the reader still closes
+                chunks.close()
+                last = b"".join(bytes(chunk) for chunk in reader.chunks(len(self.data) - 10))
+        self.assertEqual(mapping.call_count, 1)
+        self.assertEqual(first, self.data[:10000])
+        self.assertEqual(last, self.data[-10:])
+
+    def test_with_an_invalid_backend(self):
+        with self.assertRaisesRegex(ValueError, "Invalid io_backend parameter 'nope'"):
+            open_reader("nope", self.path, Units.ONE_KB)
+
+    def test_sparse_chunks_skip_holes(self):
+        path = Path(self.directory.name) / "sparse.bin"
+        with open(path, "wb") as f:
+            f.truncate(16 * Units.ONE_MB)
+            f.seek(8 * Units.ONE_MB)
+            f.write(self.data)
+        expected = bytes(8 * Units.ONE_MB) + self.data + bytes(8 * Units.ONE_MB - len(self.data))
+        for io_backend in IOBackend.ALL:
+            with self.subTest(io_backend=io_backend):
+                with open_reader(io_backend, path, Units.ONE_MB) as reader:
+                    chunks = [
+                        c if isinstance(c, ZeroRun) else bytes(c) for c in reader.sparse_chunks()
+                    ]
+                read = b"".join(bytes(len(c)) if isinstance(c, ZeroRun) else c for c in chunks)
+                self.assertEqual(read, expected)
+                # Filesystems without holes report the whole file as data
+                if is_sparse(path.stat()):
+                    self.assertIsInstance(chunks[0], ZeroRun)
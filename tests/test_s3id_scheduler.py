@@ -0,0 +1,99 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from calculator import Calculator
+from constants import Strategy, Units
+from s3id import S3ID
+from s3id_scheduler import DeviceScheduler
+
+
+class TestDeviceScheduler(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+        self.device = os.stat(self.root).st_dev
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_concurrency_per_device(self):
+        scheduler = DeviceScheduler(concurrency=1, limits={self.device + 1: (3, None)})
+        running, peak = {}, {}
+        lock = threading.Lock()
+
+        def chunks(device):
+            with lock:
+                running[device] = running.get(device, 0) + 1
+                peak[device] = max(peak.get(device, 0), running[device])
+            time.sleep(0.02)
+            yield memoryview(b"x")
+            with lock:
+                running[device] -= 1
+
+        def read(device):
+            for _ in scheduler.read(device, chunks(device)):
+                pass
+
+        threads = [
+            threading.Thread(target=read, args=(device,))
+            for device in [self.device] * 4 + [self.device + 1] * 4
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(peak, {self.device: 1, self.device + 1: 3})
+
+    def test_bandwidth(self):
+        scheduler = DeviceScheduler(bytes_per_second=4 * Units.ONE_MB)
+        started = time.monotonic()
+        chunks = (memoryview(bytes(Units.ONE_MB)) for _ in range(3))
+        self.assertEqual(len(list(scheduler.read(self.device, chunks))), 3)
+        self.assertGreaterEqual(time.monotonic() - started, 0.45)
+
+    def test_limits_by_path(self):
+        scheduler = DeviceScheduler(limits={self.root: (5, None)})
+        self.assertEqual(scheduler.limits, {self.device: (5, None)})
+        with self.assertRaises(ValueError):
+            DeviceScheduler(limits={self.root: (0, None)})
+
+    def test_read_size(self):
+        path = self.root / "file.bin"
+        path.write_bytes(b"x")
+        scheduler = DeviceScheduler(read_in_bytes=16 * Units.ONE_MB)
+        default = Calculator(path, Strategy.MULTI_PART, scheduler=scheduler)
+        self.assertEqual(default.buffer_in_bytes, 16 * Units.ONE_MB)
+        explicit = Calculator(path, Strategy.MULTI_PART, buffer_in_bytes=Units.ONE_MB, scheduler=scheduler)
+        self.assertEqual(explicit.buffer_in_bytes, Units.ONE_MB)
+
+    def test_order_by_inode(self):
+        paths = [self.root / f"file_{index}" for index in range(5)]
+        for path in paths:
+            path.write_bytes(b"x")
+        missing = self.root / "missing"
+        items = [("etag", path) for path in reversed(paths)] + [("etag", missing)]
+        ordered = [path for _, path in DeviceScheduler(window=3).order(items, key=lambda i: i[1])]
+        self.assertEqual(len(ordered), 6)
+        inodes = [path.stat().st_ino for path in ordered[:3] if path != missing]
+        self.assertEqual(inodes, sorted(inodes))
+
+    def test_unpack_many(self):
+        items = []
+        for index in range(4):
+            path = self.root / f"file_{index}"
+            path.write_bytes(os.urandom(Units.ONE_MB + index))
+            etag = Calculator(path, Strategy.MULTI_PART).calculate(Units.ONE_MB)["signature"]
+            items.append((etag, path))
+        scheduler = DeviceScheduler(concurrency=1, physical=True)
+        results = list(
+            S3ID.unpack_many(items, concurrency=4, partition_set_in_bytes={Units.ONE_MB}, scheduler=scheduler)
+        )
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result["match"] for _, _, result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import json
+import os
+import socket
+import stat
+import tempfile
+import threading
+import unittest
+import urllib.request
+from pathlib import Path
+from unittest import mock
+from s3id_cache import DigestCache
+from calculator import Calculator
+from constants import Strategy, Units
+from s3id_server import VerificationQueue, make_server, verify_remote
+
+
+class TestVerificationQueue(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "file.bin"
+        self.path.write_bytes(os.urandom(2 * Units.ONE_MB + 1))
+        self.etag = Calculator(self.path, Strategy.MULTI_PART).calculate(Units.ONE_MB)["signature"]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_priority_order(self):
+        queue = VerificationQueue(concurrency=1, partition_set_in_bytes={Units.ONE_MB})
+        order = []
+        started, release = threading.Event(), threading.Event()
+
+        def unpack(etag, **options):
+            if etag == "blocker":
+                started.set()
+                release.wait()
+            order.append(etag)
+            return {"match": True}
+
+        with mock.patch("s3id_server.S3ID.unpack", side_effect=unpack):
+            queue.submit("blocker", self.path)
+            started.wait()
+            futures = [queue.submit("low", self.path, 5), queue.submit("high", self.path, -1)]
+            release.set()
+            for future in futures:
+                future.result()
+        queue.close()
+        self.assertEqual(order, ["blocker", "high", "low"])
+
+    def test_concurrent_identical_requests_are_deduplicated(self):
+        queue = VerificationQueue(concurrency=2, partition_set_in_bytes={Units.ONE_MB})
+        release = threading.Event()
+
+        def unpack(etag, **options):
+            release.wait()
+            return {"match": True}
+
+        with mock.patch("s3id_server.S3ID.unpack", side_effect=unpack) as patched:
+            futures = [queue.submit(self.etag, self.path) for _ in range(3)]
+            release.set()
+            results = [future.result() for future in futures]
+        queue.close()
+        self.assertEqual(patched.call_count, 1)
+        self.assertEqual(results, [{"match": True}] * 3)
+        self.assertEqual(queue.stats()["deduplicated"], 2)
+
+    def test_errors_are_returned(self):
+        queue = VerificationQueue(concurrency=1)
+        result = queue.submit(self.etag, Path(self.directory.name) / "missing").result()
+        queue.close()
+        self.assertFalse(result["match"])
+        self.assertIn("error", result)
+        self.assertEqual(queue.stats()["errors"], 1)
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "file.bin"
+        self.path.write_bytes(os.urandom(2 * Units.ONE_MB + 1))
+        self.etag = Calculator(self.path, Strategy.MULTI_PART).calculate(Units.ONE_MB)["signature"]
+        self.cache = DigestCache(Path(self.directory.name) / "digests.sqlite")
+        self.queue = VerificationQueue(2, partition_set_in_bytes={Units.ONE_MB}, cache=self.cache)
+
+    def tearDown(self):
+        self.queue.close()
+        self.cache.close()
+        self.directory.cleanup()
+
+    def serve(self, address):
+        server = make_server(address, self.queue)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_unix_socket(self):
+        address = str(Path(self.directory.name) / "s3id.sock")
+        self.serve(address)
+        first = verify_remote(address, self.etag, self.path)
+        with mock.patch("calculator.open_reader") as open_reader:
+            second = verify_remote(address, self.etag, self.path)
+        open_reader.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(first["partition_in_bytes"], Units.ONE_MB)
+
+    def test_unix_socket_path(self):
+        address = Path(self.directory.name) / "s3id.sock"
+        address.write_text("not a socket")
+        with self.assertRaises(FileExistsError):
+            make_server(address, self.queue)
+        self.assertEqual(address.read_text(), "not a socket")
+
+        address.unlink()
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(address))
+        stale.close()
+        umask = os.umask(0o022)
+        try:
+            # The socket is created with its mode, never with the wider default of the umask
+            with mock.patch("s3id_server.os.chmod") as chmod:
+                self.serve(str(address))
+            chmod.assert_not_called()
+            self.assertEqual(os.umask(umask), 0o022)
+        finally:
+            os.umask(umask)
+        self.assertEqual(stat.S_IMODE(os.stat(address).st_mode), 0o600)
+        self.assertTrue(verify_remote(str(address), self.etag, self.path)["match"])
+
+    def test_tcp(self):
+        server = self.serve(("127.0.0.1", 0))
+        address = server.server_address[:2]
+        self.assertTrue(verify_remote(address, self.etag, self.path, priority=1)["match"])
+        self.assertEqual(verify_remote(address, '"0"', self.path), {"match": False})
+        with urllib.request.urlopen(f"http://{address[0]}:{address[1]}/stats") as response:
+            self.assertEqual(json.loads(response.read())["completed"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
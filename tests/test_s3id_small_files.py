@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from calculator import Calculator
+from constants import Strategy, Units
+from s3id import S3ID
+from s3id_small_files import SmallFileVerifier
+
+
+class TestSmallFileVerifier(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+        (self.root / "nested" / "deeper").mkdir(parents=True)
+        (self.root / "unrelated").mkdir()
+        self.files = {
+            "single.bin": os.urandom(100),
+            "nested/multi.bin": os.urandom(5 * Units.ONE_KB),
+            "nested/deeper/empty.bin": b"",
+            "large.bin": os.urandom(Units.ONE_MB + 1),
+        }
+        self.etags = {}
+        for index, (key, data) in enumerate(self.files.items()):
+            (self.root / key).write_bytes(data)
+            strategy = Strategy.MULTI_PART if index % 2 else Strategy.SINGLE_PART
+            self.etags[key] = Calculator(self.root / key, strategy).calculate(Units.ONE_MB)["signature"]
+        self.verifier = SmallFileVerifier({Units.ONE_MB, 8 * Units.ONE_MB})
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_matches_unpack(self):
+        results = {r.path: r for r in self.verifier.verify_directory(self.root, self.etags)}
+        for key in ("single.bin", "nested/multi.bin", "nested/deeper/empty.bin"):
+            path = self.root / key
+            expected = S3ID.unpack(self.etags[key], path, partition_set_in_bytes={Units.ONE_MB})
+            self.assertEqual(results[str(path)].summary(), expected)
+        multi = results[str(self.root / "nested/multi.bin")].summary()
+        self.assertEqual(multi["partition_in_bytes"], Units.ONE_MB)
+        large = results[str(self.root / "large.bin")]
+        self.assertIsNone(large.match)
+        self.assertEqual(large.summary(), {"match": False, "reason": "unverified"})
+
+    def test_one_open_per_file(self):
+        with mock.patch("s3id_small_files.os.open", side_effect=os.open) as opened:
+            results = list(self.verifier.verify_directory(self.root, self.etags))
+        self.assertEqual(opened.call_count, 2)
+        self.assertEqual(len(results), 4)
+
+    def test_part_count_mismatch_is_not_read(self):
+        path = self.root / "single.bin"
+        result = next(self.verifier.verify_many([(f'"{"0" * 32}-2"', path)]))
+        self.assertFalse(result.match)
+        self.assertEqual(self.verifier.counters["bytes_read"], 0)
+        self.assertEqual(self.verifier.counters["skipped"], 1)
+
+    def test_changed_and_missing(self):
+        (self.root / "single.bin").write_bytes(b"changed")
+        etags = {**self.etags, "missing.bin": self.etags["single.bin"]}
+        results = {r.path: r for r in self.verifier.verify_directory(self.root, etags)}
+        self.assertEqual(results[str(self.root / "single.bin")].summary(), {"match": False})
+        self.assertIn("error", results[str(self.root / "missing.bin")].summary())
+
+    def test_max_size_cannot_exceed_partition(self):
+        with self.assertRaises(ValueError):
+            SmallFileVerifier({Units.ONE_MB}, max_size_in_bytes=2 * Units.ONE_MB)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from s3id_cache import DigestCache
+from calculator import Calculator
+from constants import Executor, Strategy, Units
+from s3id import S3ID
+from s3id_stats import S3IDStats, StatsdHook
+
+
+class TestStats(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = Path(cls.directory.name) / "random_20mb.bin"
+        cls.path.write_bytes(os.urandom(20 * Units.ONE_MB))
+        cls.etag = Calculator(cls.path, Strategy.MULTI_PART).calculate(8 * Units.ONE_MB)["signature"]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_include_stats(self):
+        stats = S3ID.unpack(self.etag, self.path, include_stats=True)["stats"]
+        self.assertEqual(stats["bytes_read"], 20 * Units.ONE_MB)
+        self.assertEqual(stats["parts_hashed"], 3)
+        self.assertEqual(stats["partition_sizes_tried"], [8 * Units.ONE_MB])
+        self.assertEqual(stats["partition_sizes_pruned"], [15 * Units.ONE_MB, 16 * Units.ONE_MB])
+        self.assertGreater(stats["hash_seconds"], 0)
+        self.assertGreaterEqual(stats["total_seconds"], stats["io_seconds"] + stats["hash_seconds"])
+
+    def test_stats_with_workers(self):
+        stats = S3ID.unpack(
+            self.etag,
+            self.path,
+            partition_set_in_bytes={Units.ONE_MB, 8 * Units.ONE_MB},
+            workers=2,
+            executor=Executor.PROCESS,
+            include_stats=True,
+        )["stats"]
+        self.assertEqual(stats["bytes_read"], 20 * Units.ONE_MB)
+        self.assertEqual(stats["parts_hashed"], 3)
+
+    def test_hooks_receive_stats_and_cache_hits(self):
+        hook = mock.Mock()
+        with DigestCache(Path(self.directory.name) / "digests.sqlite") as cache:
+            S3ID.unpack(self.etag, self.path, cache=cache)
+            result = S3ID.unpack(self.etag, self.path, cache=cache, hooks=[hook])
+
+        stats, hooked_result = hook.call_args[0]
+        self.assertIsInstance(stats, S3IDStats)
+        self.assertEqual(hooked_result, result)
+        self.assertNotIn("stats", result)
+        self.assertEqual((stats.cache_hits, stats.cache_misses, stats.bytes_read), (1, 0, 0))
+
+    def test_failing_hook_does_not_fail_the_comparison(self):
+        def failing_hook(stats, result):
+            raise RuntimeError("exporter down")
+
+        with self.assertLogs("s3id.s3id_stats", "ERROR"):
+            self.assertTrue(S3ID.unpack(self.etag, self.path, hooks=[failing_hook])["match"])
+
+    def test_statsd_hook(self):
+        client = mock.Mock()
+        S3ID.unpack(self.etag, self.path, hooks=[StatsdHook(client, tags=["team:storage"])])
+        client.increment.assert_any_call("s3id.bytes_read", 20 * Units.ONE_MB, tags=["team:storage"])
+        client.increment.assert_any_call("s3id.matches", 1, tags=["team:storage"])
+        self.assertEqual(
+            {c[0][0] for c in client.timing.call_args_list},
+            {"s3id.io_time", "s3id.hash_time", "s3id.total_time"},
+        )
@@ -0,0 +1,66 @@
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from calculator import Calculator
+from constants import Strategy, Units
+from s3id import S3ID
+from s3id_stream import StreamCalculator
+
+
+class TestStreamCalculator(unittest.TestCase):
+    partition_set_in_bytes = {Units.ONE_MB, 5 * Units.ONE_MB}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.data = os.urandom(7 * Units.ONE_MB + 5)
+        cls.path = Path(cls.directory.name) / "random_7mb.bin"
+        cls.path.write_bytes(cls.data)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_signatures_match_the_file_calculator(self):
+        single_part, multi_part = (
+            StreamCalculator(self.partition_set_in_bytes).consume(io.BytesIO(self.data)).signatures()
+        )
+        self.assertEqual(
+            (single_part, multi_part),
+            Calculator(self.path, Strategy.MULTI_PART).calculate_all(self.partition_set_in_bytes),
+        )
+
+    def test_tee(self):
+        chunks = [self.data[i : i + 1000003] for i in range(0, len(self.data), 1000003)]
+        stream = StreamCalculator(self.partition_set_in_bytes)
+        self.assertEqual(b"".join(stream.tee(iter(chunks))), self.data)
+        self.assertEqual(stream.size, len(self.data))
+
+        etag = Calculator(self.path, Strategy.MULTI_PART).calculate(5 * Units.ONE_MB)["signature"]
+        self.assertEqual(
+            stream.compare(etag),
+            S3ID.unpack(etag, self.path, partition_set_in_bytes=self.partition_set_in_bytes),
+        )
+
+    def test_non_blocking_source_without_data_is_not_the_end(self):
+        read, write = os.pipe()
+        os.set_blocking(read, False)
+        os.write(write, b"partial")
+        with io.FileIO(read, "r") as source:
+            stream = StreamCalculator(self.partition_set_in_bytes)
+            with self.assertRaises(BlockingIOError):
+                stream.consume(source)
+        os.close(write)
+        self.assertEqual(stream.size, len(b"partial"))
+
+    def test_compare_single_part(self):
+        stream = StreamCalculator(self.partition_set_in_bytes).consume(io.BufferedReader(io.BytesIO(self.data)))
+        etag = Calculator(self.path, Strategy.SINGLE_PART).calculate(Units.ONE_MB)["signature"]
+        self.assertEqual(
+            stream.compare(etag.strip('"')),
+            {"match": True, "signature": etag, "upload_strategy": "single_part"},
+        )
+        with self.assertRaisesRegex(ValueError, "Cannot update a StreamCalculator"):
+            stream.update(b"late")